@@ -0,0 +1,446 @@
+#!/usr/bin/env python
+# -*- encoding: utf8 -*-
+#
+#  Module that provides the buffers written by the stress tests
+#
+#  (C) Copyright 2009 Olivier Delhomme
+#  e-mail : olivier.delhomme@free.fr
+#
+#  This program is free software; you can redistribute it and/or modify
+#  it under the terms of the GNU General Public License as published by
+#  the Free Software Foundation; either version 2, or (at your option)
+#  any later version.
+#
+#  This program is distributed in the hope that it will be useful,
+#  but WITHOUT ANY WARRANTY; without even the implied warranty of
+#  MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#  GNU General Public License for more details.
+#
+#  You should have received a copy of the GNU General Public License
+#  along with this program; if not, write to the Free Software Foundation,
+#  Inc., 59 Temple Place - Suite 330, Boston, MA 02111-1307, USA.
+#
+
+"""module providing the buffers written by the stress tests
+
+Class BufferPool : preallocated, page aligned, buffers filled with a
+                   pattern
+
+get_private_buffer() gives each thread its own buffer to read into (and
+get_private() the whole buffer, for the libc). get_buffer_array() gives
+the ctypes array of a buffer of the pool (for the libc too).
+next_buffer() and next_buffer_array() give the buffer to write next :
+the same one for every pattern but 'incompressible'.
+
+Buffers are anonymous mmaps (hence page aligned) seen through writable
+memoryviews : tests write them (or slices of them) without any copy.
+A pattern is a string such as 'constant', 'random' or 'random:42' (a
+seeded pseudo-random fill).
+"""
+
+__author__ = "Olivier Delhomme <olivier.delhomme@free.fr>"
+__date__ = "17.10.2026"
+__version__ = "Revision: 0.0.1"
+__credits__ = "Thanks to Python makers"
+
+import os
+import mmap
+import random
+import ctypes
+import binascii
+import threading
+
+
+# Fill patterns of the buffers :
+#  . zeros          : zero bytes
+#  . constant       : one byte (a space by default) repeated
+#  . random         : a seeded pseudo-random block (1 MB at most) repeated
+#  . incompressible : random bytes from os.urandom. Writers walk a block of
+#                     INCOMPRESSIBLE_SIZE bytes at least (see next_buffer) :
+#                     its size is not a multiple of any block size, so that
+#                     the data written does not repeat block by block
+PATTERNS = ('zeros', 'constant', 'random', 'incompressible')
+RANDOM_BLOCK_SIZE = 1 << 20
+INCOMPRESSIBLE_SIZE = (8 << 20) + 4093
+
+
+def parse_pattern(pattern):
+    """Returns the (name, seed) of a pattern string
+
+    >>> parse_pattern('random:42')
+    ('random', 42)
+    >>> parse_pattern('zeros')
+    ('zeros', 0)
+    >>> parse_pattern('bricks')
+    Traceback (most recent call last):
+    ...
+    ValueError: unknown fill pattern 'bricks'
+    """
+
+    (name, sep, seed) = pattern.partition(':')
+
+    if name not in PATTERNS:
+        raise ValueError("unknown fill pattern '%s'" % pattern)
+
+    if seed == '':
+        seed = 0
+    else:
+        try:
+            seed = int(seed)
+        except ValueError, err:
+            raise ValueError("invalid seed in fill pattern '%s'" % pattern)
+
+    return (name, seed)
+
+# End of parse_pattern function
+
+
+def tile(view, length):
+    """Repeats the length first bytes of view over the whole view
+
+    The copied part doubles at each step (log(n) copies of the view in
+    itself).
+
+    >>> view = memoryview(bytearray('ab' + '.' * 5))
+    >>> tile(view, 2)
+    >>> view.tobytes()
+    'abababa'
+    """
+
+    size = len(view)
+
+    while length < size:
+        count = min(length, size - length)
+        view[length:length + count] = view[0:count]
+        length += count
+
+# End of tile function
+
+
+def fill(view, pattern, byte=' '):
+    """Fills a (writable) view with a pattern
+
+    >>> view = memoryview(bytearray(6))
+    >>> fill(view, 'constant')
+    >>> view.tobytes()
+    '      '
+    >>> fill(view, 'random:1')
+    >>> first = view.tobytes()
+    >>> fill(view, 'random:1')
+    >>> view.tobytes() == first
+    True
+    >>> fill(view, 'zeros')
+    >>> view.tobytes()
+    '\\x00\\x00\\x00\\x00\\x00\\x00'
+    """
+
+    (name, seed) = parse_pattern(pattern)
+    size = len(view)
+
+    if size <= 0:
+        return None
+
+    if name == 'zeros':
+        view[0:1] = '\0'
+        tile(view, 1)
+
+    elif name == 'constant':
+        view[0:1] = byte
+        tile(view, 1)
+
+    elif name == 'random':
+        length = min(size, RANDOM_BLOCK_SIZE)
+        generator = random.Random(seed)
+        hexa = '%x' % generator.getrandbits(length * 8)
+        view[0:length] = binascii.unhexlify(hexa.zfill(length * 2))
+        tile(view, length)
+
+    elif name == 'incompressible':
+        offset = 0
+        while offset < size:
+            length = min(size - offset, RANDOM_BLOCK_SIZE)
+            view[offset:offset + length] = os.urandom(length)
+            offset += length
+
+# End of fill function
+
+
+def allocate(size):
+    """Allocates a new page aligned buffer of size bytes (zeroed)
+
+    Returns a (mmap, array, view) tuple : view is the writable
+    memoryview of the buffer (the mmap and the array must be kept as long
+    as the view is used).
+
+    >>> (a_mmap, an_array, view) = allocate(10)
+    >>> len(view), view.tobytes() == '\\x00' * 10
+    (10, True)
+    """
+
+    a_mmap = mmap.mmap(-1, size)
+    an_array = (ctypes.c_char * size).from_buffer(a_mmap)
+
+    return (a_mmap, an_array, memoryview(an_array))
+
+# End of allocate function
+
+
+class BufferPool:
+    """Class BufferPool : page aligned buffers, built once and reused
+
+    A buffer is identified by its size and its pattern : it is built
+    (and filled) the first time it is asked and then the same one is
+    returned. Buffers are shared by all the threads of a process and
+    must not be modified by the tests.
+
+    properties :
+        buffers : dictionnary of the (mmap, array, view) tuples of the
+                  buffers indexed by (size, pattern)
+        lock    : lock protecting buffers
+        offset  : offset of the next incompressible buffer in its block
+                  (see next_offset)
+
+    >>> pool = BufferPool()
+    >>> view = pool.get(4096, 'constant')
+    >>> view.tobytes() == ' ' * 4096
+    True
+    >>> pool.get(4096, 'constant') is view
+    True
+    >>> pool.aligned(view)
+    True
+    >>> pool.nb_bytes()
+    4096
+    >>> pool.get(0, 'constant')
+    ''
+    >>> pool.clear()
+    >>> pool.nb_bytes()
+    0
+    """
+
+    buffers = {}
+    lock = None
+    offset = 0
+
+    def __init__(self):
+        """Creates an empty pool"""
+
+        self.buffers = {}
+        self.lock = threading.Lock()
+        self.offset = 0
+
+
+    def get(self, size, pattern='constant'):
+        """Returns a memoryview of a buffer of size bytes filled with
+        pattern ('' if size is not positive)
+        """
+
+        if size <= 0:
+            return ''
+
+        key = (size, pattern)
+
+        self.lock.acquire()
+        try:
+            if key not in self.buffers:
+                a_buffer = allocate(size)
+                fill(a_buffer[2], pattern)
+                self.buffers[key] = a_buffer
+
+            return self.buffers[key][2]
+        finally:
+            self.lock.release()
+
+
+    def next_offset(self, size):
+        """Returns the (mmap, array, view) tuple of the incompressible
+        block and the offset of the next buffer of size bytes in it
+
+        The block holds INCOMPRESSIBLE_SIZE bytes (twice size at least)
+        and the offset rotates through it : successive buffers (of all the
+        writers of the process) are successive slices of the block.
+
+        >>> pool = BufferPool()
+        >>> (a_block, first) = pool.next_offset(4096)
+        >>> (a_block, second) = pool.next_offset(4096)
+        >>> first, second, len(a_block[2]) == INCOMPRESSIBLE_SIZE
+        (0, 4096, True)
+        """
+
+        length = max(INCOMPRESSIBLE_SIZE, 2 * size)
+        self.get(length, 'incompressible')
+
+        self.lock.acquire()
+        try:
+            offset = self.offset
+            if offset + size > length:
+                offset = 0
+            self.offset = (offset + size) % (length - size)
+            return (self.buffers[(length, 'incompressible')], offset)
+        finally:
+            self.lock.release()
+
+
+    def aligned(self, view):
+        """Tells wether a buffer of the pool begins on a page boundary"""
+
+        for (a_mmap, an_array, a_view) in self.buffers.itervalues():
+            if a_view is view:
+                return ctypes.addressof(an_array) % mmap.PAGESIZE == 0
+
+        return False
+
+
+    def nb_bytes(self):
+        """Returns the number of bytes held by the pool"""
+
+        return sum([size for (size, pattern) in self.buffers.iterkeys()])
+
+
+    def clear(self):
+        """Forgets all the buffers of the pool
+
+        mmaps are not closed here : each one is unmapped when its last
+        view goes away (a test may still hold one).
+        """
+
+        self.lock.acquire()
+        try:
+            self.buffers = {}
+        finally:
+            self.lock.release()
+
+# End for Class BufferPool
+
+
+# The pool of the current process
+pool = BufferPool()
+
+
+def get_buffer(size, pattern='constant'):
+    """Returns a buffer of the pool of the current process (see
+    BufferPool.get)
+
+    >>> get_buffer(3, 'constant').tobytes()
+    '   '
+    """
+
+    return pool.get(size, pattern)
+
+# End of get_buffer function
+
+
+def get_buffer_array(size, pattern='constant'):
+    """Returns the ctypes array of a buffer of the pool of the current
+    process (see BufferPool.get) : it may be given to the libc (pwrite
+    for instance). size must be positive
+
+    >>> an_array = get_buffer_array(3, 'constant')
+    >>> an_array.raw
+    '   '
+    >>> memoryview(an_array).tobytes() == get_buffer(3).tobytes()
+    True
+    """
+
+    pool.get(size, pattern)
+
+    return pool.buffers[(size, pattern)][1]
+
+# End of get_buffer_array function
+
+
+def next_buffer(size, pattern='constant'):
+    """Returns the buffer of size bytes to write next with pattern
+
+    This is the buffer of the pool (see get_buffer) except for the
+    'incompressible' pattern : successive buffers are then successive
+    slices of a big block of random bytes (see BufferPool.next_offset)
+    so that a file bigger than one buffer is not one buffer repeated.
+
+    >>> next_buffer(3, 'constant') is get_buffer(3, 'constant')
+    True
+    >>> first = next_buffer(4096, 'incompressible').tobytes()
+    >>> next_buffer(4096, 'incompressible').tobytes() != first
+    True
+    """
+
+    if size <= 0 or pattern != 'incompressible':
+        return pool.get(size, pattern)
+
+    ((a_mmap, an_array, view), offset) = pool.next_offset(size)
+
+    return view[offset:offset + size]
+
+# End of next_buffer function
+
+
+def next_buffer_array(size, pattern='constant'):
+    """Returns the ctypes array of the buffer of size bytes to write
+    next with pattern (see next_buffer) : it may be given to the libc.
+    size must be positive
+
+    >>> an_array = next_buffer_array(4096, 'incompressible')
+    >>> len(an_array), an_array.raw != next_buffer_array(4096,
+    ...                                                  'incompressible').raw
+    (4096, True)
+    """
+
+    if pattern != 'incompressible':
+        return get_buffer_array(size, pattern)
+
+    ((a_mmap, an_array, view), offset) = pool.next_offset(size)
+
+    return (ctypes.c_char * size).from_buffer(an_array, offset)
+
+# End of next_buffer_array function
+
+
+# The private buffers of the current thread
+private = threading.local()
+
+
+def get_private(size):
+    """Returns the (mmap, array, view) tuple (see allocate) of the page
+    aligned buffer of size bytes that belongs to the current thread
+
+    The array may be given to the libc (pread for instance). The buffer
+    is allocated the first time it is asked and then reused.
+
+    >>> (a_mmap, an_array, view) = get_private(4096)
+    >>> get_private_buffer(4096) is view
+    True
+    """
+
+    buffers = getattr(private, 'buffers', None)
+
+    if buffers == None:
+        buffers = {}
+        private.buffers = buffers
+
+    if size not in buffers:
+        buffers[size] = allocate(size)
+
+    return buffers[size]
+
+# End of get_private function
+
+
+def get_private_buffer(size):
+    """Returns a page aligned buffer of size bytes that belongs to the
+    current thread
+
+    Tests may write into it (to read files for instance). The buffer is
+    allocated the first time it is asked and then reused.
+
+    >>> view = get_private_buffer(4096)
+    >>> get_private_buffer(4096) is view
+    True
+    >>> get_private_buffer(0)
+    ''
+    """
+
+    if size <= 0:
+        return ''
+
+    return get_private(size)[2]
+
+# End of get_private_buffer function
@@ -35,6 +35,7 @@ import os
 import base64
 import hashlib
 import stress
+import meter
 
 
 def cpu_hash_stress_test(context):
@@ -58,7 +59,7 @@ def cpu_hash_stress_test(context):
         encoded_sha = clef_sha.hexdigest()
         encoded_md5 = clef_md5.hexdigest()
 
-        for i in xrange(nb_tests):
+        for i in meter.get_meter().ops(nb_tests):
             clef_sha.update(encoded_sha + encoded_md5)
             clef_md5.update(encoded_md5 + encoded_sha)
             encoded_sha = clef_sha.hexdigest()
@@ -91,7 +92,7 @@ def cpu_encode_stress_test(context):
 
         decoded = a_string
 
-        for i in xrange(nb_tests):
+        for i in meter.get_meter().ops(nb_tests):
             encoded = base64.b64encode(decoded)
             decoded = base64.b64decode(encoded)
             decoded = decoded.encode('rot13')
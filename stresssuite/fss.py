@@ -33,40 +33,155 @@ __version__ = "Revision: 0.0.1"
 __credits__ = "Thanks to Python makers"
 
 import os
+import io
+import math
+import time
+import errno
+import shutil
+import ctypes
+import hashlib
+import mmap
+import random
+import bisect
+import fcntl
+import threading
 import stress
+import meter
+import results
+import buffers
+
+# Directories are listed with scandir when it is available (python 3.5 or
+# the scandir module) : it does not build the whole list of names
+try:
+    from os import scandir as list_directory
+except ImportError:
+    try:
+        from scandir import scandir as list_directory
+    except ImportError:
+        list_directory = os.listdir
+
+
+# Files are created with buffers of CREATE_BUFFER_SIZE bytes at most
+CREATE_BUFFER_SIZE = 1 << 20
+
+# The sequential read test reads SRT_NB_FILES files of SRT_FILE_SIZE bytes
+# in each process
+SRT_NB_FILES = 16
+SRT_FILE_SIZE = 4 << 20
+
+# The random read test reads RRT_NB_READS blocks of RRT_BLOCK_SIZE bytes at
+# random offsets of RRT_NB_FILES files of RRT_FILE_SIZE bytes
+RRT_NB_FILES = 8
+RRT_FILE_SIZE = 8 << 20
+RRT_NB_READS = 1024
+RRT_BLOCK_SIZE = 4096
+RRT_SEED = 1
+
+# Ways of reading the files of the random read test
+READ_ACCESSES = ('pread', 'mmap')
+
+# The durable write test writes DWT_NB_FILES files of DWT_FILE_SIZE bytes by
+# blocks of DWT_BLOCK_SIZE bytes (a multiple of the block size of most
+# filesystems, as needed by O_DIRECT)
+DWT_NB_FILES = 64
+DWT_FILE_SIZE = 64 << 10
+DWT_BLOCK_SIZE = 4096
+
+# Test directories are emptied by CLEAN_NB_THREADS threads at most, each
+# one removing CLEAN_MIN_ENTRIES entries at least
+CLEAN_NB_THREADS = 8
+CLEAN_MIN_ENTRIES = 64
+
+# Durability modes of the durable write test (see durable_write_test)
+DURABILITIES = ('none', 'fsync', 'fdatasync', 'dsync', 'direct')
+
+# Layouts of the entries created by the tests (see layout_namer) with the
+# default number of levels (hashed) and of entries by directory (fanout)
+LAYOUTS = ('flat', 'hashed', 'fanout')
+HASHED_LEVELS = 2
+FANOUT = 256
+
+# The deep nesting test nests directories named DNT_DIR_NAME up to a depth
+# of DNT_DEPTH and times DNT_NB_LOOKUPS lookups at some depths
+DNT_DEPTH = 64
+DNT_DIR_NAME = 'd'
+DNT_NB_LOOKUPS = 100
+
+# The mixed sizes files creation test creates MFT_NB_FILES files whose sizes
+# come from a distribution (MFT_SIZE_DIST by default, see parse_size_dist)
+# and are never bigger than MFT_MAX_FILE_SIZE bytes
+SIZE_DISTRIBUTIONS = ('fixed', 'uniform', 'lognormal', 'histogram')
+MFT_NB_FILES = 1024
+MFT_SIZE_DIST = 'lognormal:4k,2.5'
+MFT_SEED = 1
+MFT_MAX_FILE_SIZE = 256 << 20
+
+# Size classes of the files : (biggest size, name) of each class, the last
+# one holds the bigger files
+SIZE_CLASSES = ((4 << 10, '<=4k'), (64 << 10, '<=64k'), (1 << 20, '<=1M'), \
+                (16 << 20, '<=16M'), (None, '>16M'))
+
+# The shared file test writes SFT_NB_RECORDS records of SFT_RECORD_SIZE bytes
+# in each process to one single file named SFT_FILE_NAME (shared by all the
+# processes) in one of the SHARED_MODES (see shared_file_test)
+SHARED_MODES = ('append', 'disjoint', 'interleaved', 'locked')
+SFT_NB_RECORDS = 1024
+SFT_RECORD_SIZE = 512
+SFT_FILE_NAME = 'shared'
+
+# fcntl locks belong to processes : the threads of one process first take
+# this lock in the locked mode of the shared file test
+shared_file_lock = threading.Lock()
+
+# The libc (for the *at() system calls) and the flag of unlinkat that
+# removes directories
+libc = ctypes.CDLL(None, use_errno=True)
+AT_REMOVEDIR = 0x200
+
+# Bytes of the buffer that receives the struct stat of fstatat (bigger than
+# the struct stat of any system)
+STAT_BUFFER_SIZE = 512
+
 
 def make_directory_test(context):
     """Make directory test
 
-    Creates a number of directories, in one single directory.
+    Creates a number of directories, in one single directory or spread
+    in a tree of directories (see layout_namer).
     context is a tuple containing :
     . a path where we want to run the test
     . the current path (I order to return correctly after the test)
     . a number that indicates how many directories we want to create
-    This last number may be modified in order to reflect an error while
-    executing the test
+    . the layout of the directories
+    The number of directories may be modified in order to reflect an
+    error while executing the test
 
-    >>> make_directory_test(('', '', 3))
-    (False, ('', '', 3))
+    >>> make_directory_test(('', '', 3, 'flat'))
+    (False, ('', '', 3, 'flat'))
 
 
-    >>> context = fss_tests_init(('/tmp/fss', '~/', 3))
-    >>> make_directory_test(('/tmp/fss', '~/', 3))
-    (True, ('/tmp/fss', '~/', 3))
+    >>> context = fss_tests_init(('/tmp/fss', '~/', 3, 'flat'))
+    >>> make_directory_test(('/tmp/fss', '~/', 3, 'flat'))
+    (True, ('/tmp/fss', '~/', 3, 'flat'))
+    >>> make_directory_test(('/tmp/fss', '~/', 3, 'hashed:1'))
+    (True, ('/tmp/fss', '~/', 3, 'hashed:1'))
+    >>> os.path.isdir('/tmp/fss/c4/1')
+    True
     >>> clean_directory(('/tmp/fss', '', 3))
     ('/tmp/fss', '', 3)
 
     """
-    path, current_path, nb_tests = context
+    path, current_path, nb_tests, layout = context
 
     first_err = -1
     i = 0
 
     if path != '':
-        for i in xrange(nb_tests):
-            dir = path + '/' + str(i)
+        entry_name = layout_namer(layout, nb_tests)
+        for i in meter.get_meter().ops(nb_tests):
+            dir = path + '/' + entry_name(i)
             try:
-                os.mkdir(dir)
+                make_entry(os.mkdir, dir)
             except (OSError, IOError), err:
                 if first_err == -1:
                     first_err = i
@@ -75,7 +190,7 @@ def make_directory_test(context):
         print("Test could not perform to the end ! Test finished at %d"\
               % first_err)
         nb_tests = first_err
-        context = path, current_path, nb_tests
+        context = path, current_path, nb_tests, layout
         return (False, context)
     else:
         if i == 0:
@@ -86,33 +201,201 @@ def make_directory_test(context):
 # End of make_directory_test function
 
 
-def fss_tests_init(context):
-    """Inits FileSystem tests
+def parse_layout(layout):
+    """Returns the (name, number) of a layout string
+
+    number is the number of levels of a 'hashed:L' layout (HASHED_LEVELS
+    by default) or the maximum number of entries by directory of a
+    'fanout:N' layout (FANOUT by default).
+
+    >>> parse_layout('hashed:3')
+    ('hashed', 3)
+    >>> parse_layout('fanout')
+    ('fanout', 256)
+    >>> parse_layout('flat')
+    ('flat', 0)
+    >>> parse_layout('fanout:1')
+    Traceback (most recent call last):
+    ...
+    ValueError: invalid number in layout 'fanout:1'
+    >>> parse_layout('tree')
+    Traceback (most recent call last):
+    ...
+    ValueError: unknown layout 'tree'
+    """
 
-    Get its basepath before changing it to the test directory
+    (name, sep, number) = layout.partition(':')
 
-    >>> context = fss_tests_init(('/tmp/fss', '', 3))
-    >>> path, current_path, nb_tests = context
-    >>> path == '/tmp/fss' and nb_tests == 3 and current_path != ''
-    True
+    if name not in LAYOUTS or (sep != '' and name == 'flat'):
+        raise ValueError("unknown layout '%s'" % layout)
+
+    if name == 'flat':
+        return (name, 0)
+
+    if number == '':
+        if name == 'hashed':
+            return (name, HASHED_LEVELS)
+        else:
+            return (name, FANOUT)
 
+    try:
+        number = int(number)
+    except ValueError, err:
+        number = 0
+
+    if (name == 'hashed' and number < 1) or (name == 'fanout' and number < 2):
+        raise ValueError("invalid number in layout '%s'" % layout)
+
+    return (name, number)
+
+# End of parse_layout function
+
+
+def layout_namer(layout, nb_entries):
+    """Returns a function that gives the name (relative to the test
+    directory) of the entry number i of a test creating nb_entries entries
+
+    . flat     : entries are all in the test directory ('i')
+    . hashed:L : entries are spread in L levels of 256 directories named
+                 after the md5 of the name of the entry ('8f/14/i' for
+                 2 levels)
+    . fanout:N : entries are spread in a tree whose directories hold N
+                 entries (or N subdirectories) at most. Its depth is the
+                 one needed by nb_entries entries, one level at least :
+                 the test directory holds directories only (entries
+                 beyond nb_entries, in time-boxed mode, go one level
+                 deeper and never clash with an entry)
+
+    >>> [layout_namer('flat', 10)(i) for i in (0, 7)]
+    ['0', '7']
+    >>> layout_namer('hashed:2', 10)(7)
+    '8f/14/7'
+    >>> [layout_namer('fanout:10', 1000)(i) for i in (7, 999, 1000)]
+    ['0/0/7', '9/9/999', '1/0/0/1000']
+    >>> [layout_namer('fanout:10', 10)(i) for i in (7, 10, 100)]
+    ['0/7', '1/10', '1/0/100']
     """
 
-    path, current_path, nb_tests = context
+    (name, number) = parse_layout(layout)
+
+    if name == 'hashed':
+        def entry_name(i):
+            digest = hashlib.md5(str(i)).hexdigest()
+            buckets = [digest[2 * level:2 * level + 2] \
+                       for level in xrange(number)]
+            return '/'.join(buckets) + '/' + str(i)
+
+    elif name == 'fanout':
+        depth = 1
+        while number ** (depth + 1) < nb_entries:
+            depth += 1
+
+        def entry_name(i):
+            directory = i // number
+            digits = []
+            while directory > 0 or len(digits) < depth:
+                digits.insert(0, str(directory % number))
+                directory //= number
+            digits.append(str(i))
+            return '/'.join(digits)
+
+    else:
+        entry_name = str
+
+    return entry_name
+
+# End of layout_namer function
+
+
+def make_entry(create_func, a_name):
+    """Creates the entry a_name with create_func
+
+    If the parent directories of the entry do not exist yet (layouts
+    other than flat) they are made first : the time to make them is then
+    part of the creation of the entry.
+
+    >>> make_entry(os.mkdir, '/tmp/fss_make_entry/a/b')
+    >>> os.path.isdir('/tmp/fss_make_entry/a/b')
+    True
+    >>> shutil.rmtree('/tmp/fss_make_entry')
+    """
 
-    current_path = os.getcwd()
     try:
-        os.chdir(path)
+        create_func(a_name)
     except (OSError, IOError), err:
+        if err.errno != errno.ENOENT:
+            raise
+        try:
+            os.makedirs(os.path.dirname(a_name))
+        except OSError, err:
+            # an other worker may have made it in the meantime
+            if err.errno != errno.EEXIST:
+                raise
+        create_func(a_name)
+
+# End of make_entry function
+
+
+def create_empty_file(a_file_name):
+    """Creates an empty file (as the files creation test does)"""
+
+    a_file = file(a_file_name, 'w', 0)
+    a_file.close()
+
+# End of create_empty_file function
+
+
+def make_test_directory(path):
+    """Makes sure that the test directory path exists
+
+    Returns the absolute path of the directory or '' if it can not be
+    created (tests do nothing with an empty path).
+
+    >>> make_test_directory('/tmp/fss')
+    '/tmp/fss'
+    >>> make_test_directory('')
+    ''
+    """
+
+    if path == '':
+        return path
+
+    path = os.path.abspath(path)
+
+    if not os.path.isdir(path):
         try:
             os.makedirs(path)
-            os.chdir(path)
         except OSError, err:
-            print("%s" % str(err))
-            context = '', current_path, nb_tests
-            return context
+            # an other worker may have created it in the meantime
+            if not os.path.isdir(path):
+                print("%s" % str(err))
+                return ''
+
+    return path
+
+# End of make_test_directory function
+
+
+def fss_tests_init(context):
+    """Inits FileSystem tests
 
-    context = path, current_path, nb_tests
+    Get its basepath and makes sure that the test directory exists. The
+    working directory is not changed (it is shared by all the threads of
+    a process) : tests only use absolute paths.
+
+    >>> context = fss_tests_init(('/tmp/fss', '', 3, 'flat'))
+    >>> path, current_path, nb_tests, layout = context
+    >>> path == '/tmp/fss' and nb_tests == 3 and current_path != ''
+    True
+
+    """
+
+    path, current_path, nb_tests, layout = context
+
+    current_path = os.getcwd()
+    path = make_test_directory(path)
+
+    context = path, current_path, nb_tests, layout
     return context
 
 # End of fss_tests_init function
@@ -122,21 +405,12 @@ def fss_tests_final(context):
     """Finishes the FileSystem tests
 
     Removes all the directories contained in the test directory
-    and returns to the original location
     """
 
-    path, current_path, nb_tests = context
-
-    clean_directory(context)
+    path, current_path, nb_tests, layout = context
 
-    if current_path != '':
-        try:
-            os.chdir(current_path)
-        except OSError, err:
-            print("%s" % str(err))
-            return context
+    clean_directory((path, current_path, nb_tests))
 
-    context = path, current_path, nb_tests
     return context
 
 # End of fss_tests_final function
@@ -145,16 +419,16 @@ def fss_tests_final(context):
 def fss_tests_vary(step, context):
     """Function to vary nb_tests in context tuple
 
-    >>> fss_tests_vary(2, ('/tmp/fss', '', 3))
-    ('/tmp/fss', '', 6)
+    >>> fss_tests_vary(2, ('/tmp/fss', '', 3, 'flat'))
+    ('/tmp/fss', '', 6, 'flat')
     """
 
 
-    path, current_path, nb_tests = context
+    path, current_path, nb_tests, layout = context
 
     nb_tests *= step
 
-    context = path, current_path, nb_tests
+    context = path, current_path, nb_tests, layout
     return context
 
 # End of fss_tests_vary function
@@ -163,52 +437,137 @@ def fss_tests_vary(step, context):
 def fss_print_c(what, context):
     """Function to resume context to a string with mimimun length
 
-    >>> fss_print_c('print', ('/tmp/fss', '', 3))
+    The layout is told when it is not the flat one.
+
+    >>> fss_print_c('print', ('/tmp/fss', '', 3, 'flat'))
     'Tests : 3'
 
-    >>> fss_print_c('config', ('/tmp/fss', '', 3))
+    >>> fss_print_c('print', ('/tmp/fss', '', 3, 'hashed:2'))
+    'Tests : 3 ; hashed:2'
+
+    >>> fss_print_c('config', ('/tmp/fss', '', 3, 'flat'))
     'Number of files/directories created'
 
-    >>> fss_print_c('vary', ('/tmp/fss', '', 3))
+    >>> fss_print_c('config', ('/tmp/fss', '', 3, 'fanout:100'))
+    'Number of files/directories created (fanout:100 layout)'
+
+    >>> fss_print_c('vary', ('/tmp/fss', '', 3, 'flat'))
     3
     """
 
-    path, current_path, nb_tests = context
+    path, current_path, nb_tests, layout = context
 
     if what == 'print':
-        return 'Tests : ' + str(nb_tests)
+        if layout == 'flat':
+            return 'Tests : ' + str(nb_tests)
+        else:
+            return 'Tests : %d ; %s' % (nb_tests, layout)
     elif what == 'config':
-        return 'Number of files/directories created'
+        if layout == 'flat':
+            return 'Number of files/directories created'
+        else:
+            return 'Number of files/directories created (%s layout)' % \
+                   layout
     elif what == 'vary':
         return nb_tests
 
 # End of fss_print_c function
 
 
+def list_entries(path):
+    """Returns the paths of the entries of the directory path (an empty
+    list if it can not be listed)
+
+    The whole list of paths is built : clean_directory needs the number
+    of entries to share them among its threads. The directory itself is
+    read with scandir when it is available (see list_directory).
+
+    >>> list_entries('/nonexistent')
+    []
+    """
+
+    try:
+        return [path + '/' + getattr(entry, 'name', entry) \
+                for entry in list_directory(path)]
+    except OSError, err:
+        return []
+
+# End of list_entries function
+
+
+def remove_entries(entries):
+    """Removes the files, links and directories (with all their content)
+    whose paths are in the list entries
+
+    >>> remove_entries(['/nonexistent'])
+    """
+
+    for an_entry in entries:
+        try:
+            os.remove(an_entry)
+        except OSError, err:
+            try:
+                os.rmdir(an_entry)
+            except OSError, err:
+                shutil.rmtree(an_entry, True)
+
+# End of remove_entries function
+
+
 def clean_directory(context):
     """Removes all created files or directories (if any) from the
     FileSystem tests.
 
+    Every entry of the test directory is removed (and not only the
+    nb_tests first ones) as time-boxed runs may create any number of
+    them. Directories are removed with all their content (layouts other
+    than flat make trees of directories). Entries are shared among
+    CLEAN_NB_THREADS threads (unlink and rmdir release the GIL) when
+    there are enough of them.
+    This runs in the final functions : it is timed apart (see
+    workers.run_test) and not included in the measured times.
+
     >>> clean_directory(('', '', 3))
     ('', '', 3)
 
     >>> clean_directory(('/tmp/fss', '', 3))
     ('/tmp/fss', '', 3)
 
+    >>> create_empty_file('/tmp/fss.clean')
+    >>> clean_directory(('/tmp/fss.clean', '', 3))
+    ('/tmp/fss.clean', '', 3)
+    >>> os.remove('/tmp/fss.clean')
+
+    >>> os.mkdir('/tmp/fss.clean')
+    >>> for i in xrange(200):
+    ...     create_empty_file('/tmp/fss.clean/%d' % i)
+    >>> os.makedirs('/tmp/fss.clean/a/b')
+    >>> clean_directory(('/tmp/fss.clean', '', 3))
+    ('/tmp/fss.clean', '', 3)
+    >>> os.listdir('/tmp/fss.clean')
+    []
+    >>> os.rmdir('/tmp/fss.clean')
+
     """
 
     path, current_path, nb_tests = context
 
     if path != '':
-        for i in xrange(nb_tests):
-            a_file = path + '/' + str(i)
-            try:
-                os.remove(a_file)
-            except OSError, err:
-                try:
-                    os.rmdir(a_file)
-                except OSError, err:
-                    pass
+        entries = list_entries(path)
+        nb_threads = min(CLEAN_NB_THREADS, len(entries) // CLEAN_MIN_ENTRIES)
+
+        if nb_threads > 1:
+            threads = []
+            for i in xrange(nb_threads):
+                a_thread = threading.Thread(target=remove_entries, \
+                                            args=(entries[i::nb_threads],))
+                a_thread.start()
+                threads.append(a_thread)
+
+            for a_thread in threads:
+                a_thread.join()
+        else:
+            remove_entries(entries)
 
     return context
 
@@ -218,32 +577,46 @@ def clean_directory(context):
 def make_files_test(context):
     """Creates a huge number of empty files
 
-    All files are created in one directory.
+    All files are created in one directory or spread in a tree of
+    directories (see layout_namer).
     context is a tuple containing :
     . a path where we want to run the test
     . the current path (In order to return correctly after the test)
     . a number that indicates how many files we want to create
+    . the layout of the files
 
-    >>> make_files_test(('', '', 3))
-    (False, ('', '', 3))
+    >>> make_files_test(('', '', 3, 'flat'))
+    (False, ('', '', 3, 'flat'))
 
-    ... fss_tests_init(('/tmp/fss', '~/', 3))
-    >>> make_files_test(('/tmp/fss', '~/', 3))
+    ... fss_tests_init(('/tmp/fss', '~/', 3, 'flat'))
+    >>> make_files_test(('/tmp/fss', '~/', 3, 'fanout:2'))
     ... clean_directory(('/tmp/fss', '', 3))
-    (True, ('/tmp/fss', '~/', 3))
+    (True, ('/tmp/fss', '~/', 3, 'fanout:2'))
 
+    Files beyond the number asked (time-boxed mode) go deeper in the
+    tree of directories without clashing with the first ones :
+
+    >>> a_meter = meter.OpMeter({'duration': 0.2})
+    >>> meter.set_meter(a_meter)
+    >>> a_meter.start()
+    >>> make_files_test(('/tmp/fss_fanout', '', 20, 'fanout:20'))[0]
+    True
+    >>> a_meter.count > 20
+    True
+    >>> meter.set_meter(meter.OpMeter())
+    >>> shutil.rmtree('/tmp/fss_fanout')
     """
-    path, current_path, nb_tests = context
+    path, current_path, nb_tests, layout = context
 
     first_err = -1
     i = 0
 
     if path != '':
-        for i in xrange(nb_tests):
-            a_file_name = path + '/' + str(i)
+        entry_name = layout_namer(layout, nb_tests)
+        for i in meter.get_meter().ops(nb_tests):
+            a_file_name = path + '/' + entry_name(i)
             try:
-                a_file = file(a_file_name, 'w', 0)
-                a_file.close()
+                make_entry(create_empty_file, a_file_name)
             except (OSError, IOError), err:
                 if first_err == -1:
                     first_err = i
@@ -252,7 +625,7 @@ def make_files_test(context):
         print("Test could not perform to the end ! Test finished at %d"\
               % first_err)
         nb_tests = first_err
-        context = path, current_path, nb_tests
+        context = path, current_path, nb_tests, layout
         return (False, context)
     else:
         if (i == 0):
@@ -263,12 +636,51 @@ def make_files_test(context):
 # End of make_files_test function
 
 
-def write_to_the_file(a_file, file_buffer, file_size):
+def next_block(a_buffer, pattern):
+    """Returns the buffer to write next : a_buffer itself unless pattern
+    is 'incompressible' (the next slice of the incompressible block is
+    then returned, see buffers.next_buffer)
+
+    >>> a_buffer = make_buffer(4)
+    >>> next_block(a_buffer, 'constant') is a_buffer
+    True
+    >>> len(next_block(make_buffer(4, 'incompressible'), 'incompressible'))
+    4
+    """
+
+    if pattern == 'incompressible':
+        return buffers.next_buffer(len(a_buffer), pattern)
+    else:
+        return a_buffer
+
+# End of next_block function
+
+
+def write_to_the_file(a_file, file_buffer, file_size, pattern='constant'):
     """Writes file_buffer to a file
 
-    Writes file_buffer to a file until it reaches file_size.
-    If file_size is not a multiple of file_buffer's len then
-    the files are truncated to the closest multiple.
+    Writes file_buffer to a file until it reaches file_size. If
+    file_size is not a multiple of file_buffer's len the last write is
+    a slice of the buffer. The buffer (a memoryview) is never copied.
+    With the 'incompressible' pattern each write takes the next slice of
+    the incompressible block (see next_block) : the file is not one
+    buffer repeated.
+
+    >>> a_file = open('/tmp/fss_write_to_the_file', 'wb', 0)
+    >>> write_to_the_file(a_file, make_buffer(4), 10)
+    True
+    >>> a_file.close()
+    >>> os.path.getsize('/tmp/fss_write_to_the_file')
+    10
+    >>> a_file = open('/tmp/fss_write_to_the_file', 'wb', 0)
+    >>> write_to_the_file(a_file, make_buffer(4096, 'incompressible'),
+    ...                   8192, 'incompressible')
+    True
+    >>> a_file.close()
+    >>> data = open('/tmp/fss_write_to_the_file', 'rb').read()
+    >>> data[0:4096] != data[4096:8192]
+    True
+    >>> os.remove('/tmp/fss_write_to_the_file')
     """
 
     buffer_size = len(file_buffer)
@@ -276,12 +688,20 @@ def write_to_the_file(a_file, file_buffer, file_size):
     if (file_size > 0 and buffer_size > 0):
 
         max = file_size / buffer_size
+        rest = file_size % buffer_size
 
-        for i in xrange(max):
-            try:
-                a_file.write(file_buffer)
-            except:
-                return False
+        try:
+            if pattern == 'incompressible':
+                for i in xrange(max):
+                    a_file.write(next_block(file_buffer, pattern))
+            else:
+                for i in xrange(max):
+                    a_file.write(file_buffer)
+
+            if rest > 0:
+                a_file.write(next_block(file_buffer, pattern)[0:rest])
+        except:
+            return False
 
         return True
     else:
@@ -290,65 +710,97 @@ def write_to_the_file(a_file, file_buffer, file_size):
 # End of write_to_the_file function
 
 
+def print_iodepth(iodepth):
+    """Returns the end of a printed context that tells the queue depth
+    (nothing when operations are done one after the other)
+
+    >>> print_iodepth(1), print_iodepth(8)
+    ('', ' ; Qd : 8')
+    """
+
+    if iodepth > 1:
+        return ' ; Qd : %d' % iodepth
+    else:
+        return ''
+
+# End of print_iodepth function
+
+
 def make_zero_filed_files_test(context):
     """Creates a defined number of zero filed files
 
-    All files are created in one directory.
+    All files are created in one directory, iodepth of them at the same
+    time (see meter.OpMeter.run_ops).
     context is a tuple containing :
     . a path where we want to run the test
     . the current path (In order to return correctly after the test)
     . a number that indicates how many files we want to create
-    . a buffer of the proper size
+    . the fill pattern of the buffer (see make_buffer)
     . a size for the file (in bytes)
     . a buffer size (in bytes)
-
-    >>> context = mzfft_init(('/tmp/mzfft', '', 3, '    ', 512, 4))
-    >>> make_zero_filed_files_test(('/tmp/mzfft', '', 3, '    ', 512, 4))
-    ... clean_directory(('/tmp/mzfft', '', 3))
-    (True, ('/tmp/mzfft', '', 3, '    ', 512, 4))
-
-    >>> make_zero_filed_files_test(('', '', 3, '    ', 512, 4))
-    (False, ('', '', 3, '    ', 512, 4))
+    . the queue depth (number of files created at the same time)
+    The buffer itself is taken from the buffer pool of the worker (it
+    is built by mzfft_init).
+
+    >>> context = mzfft_init(('/tmp/mzfft', '', 3, 'constant', 512, 4, 1))
+    >>> make_zero_filed_files_test(('/tmp/mzfft', '', 3, 'constant', 512, 4,
+    ...                             1))
+    (True, ('/tmp/mzfft', '', 3, 'constant', 512, 4, 1))
+    >>> make_zero_filed_files_test(('/tmp/mzfft', '', 8, 'constant', 512, 4,
+    ...                             4))
+    (True, ('/tmp/mzfft', '', 8, 'constant', 512, 4, 4))
+    >>> sorted(os.listdir('/tmp/mzfft'), key=int)
+    ['0', '1', '2', '3', '4', '5', '6', '7']
+    >>> clean_directory(('/tmp/mzfft', '', 8))
+    ('/tmp/mzfft', '', 8)
+
+    >>> make_zero_filed_files_test(('', '', 3, 'constant', 512, 4, 1))
+    (False, ('', '', 3, 'constant', 512, 4, 1))
 
     """
-    path, current_path, nb_tests, file_buffer, file_size, buffer_size = context
+    path, current_path, nb_tests, file_buffer, file_size, buffer_size, \
+    iodepth = context
 
     first_err = -1
-    i = 0
-    result = True
+    nb_done = 0
 
     if path != '':
-        for i in xrange(nb_tests):
-            a_file_name = path + '/' + str(i)
-            try:
-                a_file = file(a_file_name, 'wb', 0)
-                result = write_to_the_file(a_file, file_buffer, file_size)
-            except:
-                if first_err == -1:
-                    first_err = i
+        a_buffer = make_buffer(buffer_size, file_buffer)
+        a_meter = meter.get_meter()
 
-            if result == False:
-                if first_err == -1:
-                    first_err = i
+        def create_one(i):
+            """Creates the file number i"""
 
             try:
-                a_file.close()
-            except:
-                if first_err == -1:
-                    first_err = i
+                a_file = file(path + '/' + str(i), 'wb', 0)
+                try:
+                    result = write_to_the_file(a_file, a_buffer, file_size, \
+                                               file_buffer)
+                finally:
+                    a_file.close()
+            except (OSError, IOError), err:
+                return False
+
+            if result == True:
+                a_meter.add_bytes(file_size)
+
+            return result
+
+        count = a_meter.count
+        first_err = a_meter.run_ops(nb_tests, create_one, iodepth)
+        nb_done = a_meter.count - count
 
     if first_err != -1:
         print("Test could not perform to the end ! Test finished at %d"\
               % first_err)
         nb_tests = first_err
         context = path, current_path, nb_tests, file_buffer, file_size, \
-                  buffer_size
+                  buffer_size, iodepth
+        return (False, context)
+    elif nb_done == 0:
         return (False, context)
     else:
-        if i == 0:
-            return (False, context)
-        else:
-            return (True, context)
+        return (True, context)
 
 # End  of make_zero_filed_files_test function
 
@@ -360,38 +812,32 @@ def mzfft_init(context):
     . a path where we want to run the test
     . the current path (In order to return correctly after the test)
     . a number that indicates how many files we want to create
-    . a buffer to be created here
+    . the fill pattern of the buffer (built here, out of the measured
+      time, in the buffer pool of the worker)
     . a size for the file (in bytes)
     . a buffer size (in bytes)
+    . the queue depth
 
-    >>> context = mzfft_init(('/tmp/mzfft', '', 3, '    ', 512, 4))
-    >>> path, current_path, nb_tests, file_buffer, file_size, buffer_size = \
-        context
+    >>> context = mzfft_init(('/tmp/mzfft', '', 3, 'constant', 512, 4, 1))
+    >>> path, current_path, nb_tests, file_buffer, file_size, buffer_size, \
+        iodepth = context
     >>> path == '/tmp/mzfft' and nb_tests == 3
     True
 
-    >>> file_buffer == '    ' and file_size == 512 and current_path != ''
+    >>> file_buffer == 'constant' and file_size == 512 and current_path != ''
     True
     """
 
-    path, current_path, nb_tests, file_buffer, file_size, buffer_size = context
+    path, current_path, nb_tests, file_buffer, file_size, buffer_size, \
+    iodepth = context
 
-    file_buffer = make_buffer(buffer_size, True)
+    make_buffer(buffer_size, file_buffer)
 
     current_path = os.getcwd()
-    try:
-        os.chdir(path)
-    except (OSError, IOError), err:
-        try:
-            os.makedirs(path)
-            os.chdir(path)
-        except OSError, err:
-            print("%s" % str(err))
-            context = '', current_path, nb_tests, file_buffer, file_size, \
-                      buffer_size
-            return context
+    path = make_test_directory(path)
 
-    context = path, current_path, nb_tests, file_buffer, file_size, buffer_size
+    context = path, current_path, nb_tests, file_buffer, file_size, \
+              buffer_size, iodepth
     return context
 
 # End of mzfft_init function
@@ -401,25 +847,17 @@ def mzfft_final(context):
     """Finishes make_zero_filed_files test
 
     Removes all the Files contained in the test directory
-    and returns to the original location
     """
 
-    path, current_path, nb_tests, file_buffer, file_size, buffer_size = context
-
-    file_buffer = ''
+    path, current_path, nb_tests, file_buffer, file_size, buffer_size, \
+    iodepth = context
 
     clean_context = path, current_path, nb_tests
 
     clean_directory(clean_context)
 
-    if current_path != '':
-        try:
-            os.chdir(current_path)
-        except OSError, err:
-            print("%s" % str(err))
-            return context
-
-    context = path, current_path, nb_tests, file_buffer, file_size, buffer_size
+    context = path, current_path, nb_tests, file_buffer, file_size, \
+              buffer_size, iodepth
     return context
 
 # End of mzfft_final function
@@ -428,15 +866,17 @@ def mzfft_final(context):
 def mzfft_vary_file_size(step, context):
     """A vary function for the make_zero_filed_files test
 
-    >>> mzfft_vary_file_size(2, ('/tmp/mzfft', '', 3, '    ', 512, 4))
-    ('/tmp/mzfft', '', 3, '    ', 1024, 4)
+    >>> mzfft_vary_file_size(2, ('/tmp/mzfft', '', 3, 'constant', 512, 4, 1))
+    ('/tmp/mzfft', '', 3, 'constant', 1024, 4, 1)
     """
 
-    path, current_path, nb_tests, file_buffer, file_size, buffer_size = context
+    path, current_path, nb_tests, file_buffer, file_size, buffer_size, \
+    iodepth = context
 
     file_size *= step
 
-    context = path, current_path, nb_tests, file_buffer, file_size, buffer_size
+    context = path, current_path, nb_tests, file_buffer, file_size, \
+              buffer_size, iodepth
     return context
 
 # End of mzfft_vary function
@@ -445,24 +885,29 @@ def mzfft_vary_file_size(step, context):
 def mzfft_print_c(what, context):
     """Function to resume context to a string with mimimun length
 
-    >>> mzfft_print_c('print', ('/tmp/mzfft', '', 3, '    ', 512, 4))
+    >>> mzfft_print_c('print', ('/tmp/mzfft', '', 3, 'constant', 512, 4, 1))
     'T : 3 ; Bs : 4 ; Fs : 512'
 
-    >>> mzfft_print_c('config', ('/tmp/mzfft', '', 3, '    ', 512, 4))
+    >>> mzfft_print_c('print', ('/tmp/mzfft', '', 3, 'constant', 512, 4, 8))
+    'T : 3 ; Bs : 4 ; Fs : 512 ; Qd : 8'
+
+    >>> mzfft_print_c('config', ('/tmp/mzfft', '', 3, 'constant', 512, 4, 1))
     'File size (creating 3 files with a buffer of 4 bytes)'
 
-    >>> mzfft_print_c('vary', ('/tmp/mzfft', '', 3, '    ', 512, 4))
+    >>> mzfft_print_c('vary', ('/tmp/mzfft', '', 3, 'constant', 512, 4, 1))
     512
     """
 
-    path, current_path, nb_tests, file_buffer, file_size, buffer_size = context
+    path, current_path, nb_tests, file_buffer, file_size, buffer_size, \
+    iodepth = context
 
     if what == 'print':
         return 'T : ' + str(nb_tests) + ' ; Bs : ' +  \
-                str(len(file_buffer)) + ' ; Fs : ' + str(file_size)
+                str(buffer_size) + ' ; Fs : ' + str(file_size) + \
+                print_iodepth(iodepth)
     elif what == 'config':
         return 'File size (creating %d files with a buffer of %d bytes)' % \
-               (nb_tests, len(file_buffer))
+               (nb_tests, buffer_size)
     elif what == 'vary':
         return file_size
 
@@ -470,17 +915,18 @@ def mzfft_print_c(what, context):
 
 
 def mzfft_make_context_list(basepath, current_path, nb_tests, file_buffer, \
-                            file_size, buffer_size, nb_process):
+                            file_size, buffer_size, iodepth, nb_process):
     """Make a context list for the FileSystem test suite
 
-    >>> mzfft_make_context_list('/tmp/mzfft', '', 3, '    ', 512, 4, 2)
-    [('/tmp/mzfft/0', '', 3, '    ', 512, 4), ('/tmp/mzfft/1', '', 3, '    ', 512, 4)]
+    >>> mzfft_make_context_list('/tmp/mzfft', '', 3, 'constant', 512, 4, 1,
+    ...                         2)
+    [('/tmp/mzfft/0', '', 3, 'constant', 512, 4, 1), ('/tmp/mzfft/1', '', 3, 'constant', 512, 4, 1)]
     """
 
     context_list = []
     for i in xrange(nb_process):
         a_context = basepath + '/' + str(i), current_path, nb_tests, \
-                    file_buffer, file_size, buffer_size
+                    file_buffer, file_size, buffer_size, iodepth
         context_list.append(a_context)
 
     return context_list
@@ -488,119 +934,2428 @@ def mzfft_make_context_list(basepath, current_path, nb_tests, file_buffer, \
 # End of mzfft_make_context_list function
 
 
-def make_buffer(buffer_size, zero):
-    """ Creates a buffer of buffer_size len
-
-    Filled with spaces if zero is True and with some random if zero is False
-
-    >>> make_buffer(3, True)
-    '   '
+def create_file(a_file_name, file_size, pattern='constant'):
+    """Creates (or recreates) a file of file_size bytes filled with
+    pattern (see make_buffer)
 
-    >>> make_buffer(-1, True)
-    ''
+    Returns True if the file was created.
 
-    >>> make_buffer(-1, True)
-    ''
+    >>> create_file('/tmp/fss_create_file', 10000)
+    True
+    >>> os.path.getsize('/tmp/fss_create_file')
+    10000
+    >>> os.remove('/tmp/fss_create_file')
     """
 
-    a_buffer = ''
+    a_buffer = make_buffer(min(file_size, CREATE_BUFFER_SIZE), pattern)
 
     try:
-        for i in xrange(buffer_size):
-            if zero == True:
-                a_buffer += ' '
+        a_file = file(a_file_name, 'wb', 0)
+        try:
+            if file_size > 0:
+                result = write_to_the_file(a_file, a_buffer, file_size, \
+                                           pattern)
             else:
-                a_buffer += chr(randint(0, 255))
+                result = True
+        finally:
+            a_file.close()
+    except (OSError, IOError), err:
+        print("%s" % str(err))
+        return False
 
-    except err:
-        return ''
+    return result
 
-    return a_buffer
+# End of create_file function
 
-# End of make_buffer function
 
+def sequential_read_test(context):
+    """Reads files sequentially
 
-def fss_make_context_list(basepath, current_path, nb_times, nb_process):
-    """Make a context list for the FileSystem test suite
+    Each file is read from its beginning to its end by blocks of
+    block_size bytes into a preallocated buffer (no allocation while
+    reading). In time-boxed mode the files are read again and again.
+    The bytes read are counted by the meter (MB/s are printed with the
+    stats). Files may well be read from the page cache.
+    context is a tuple containing :
+    . a path where the files are
+    . the current path
+    . the number of files to read
+    . the size of each file (in bytes)
+    . the block size (in bytes)
+    . the fill pattern of the files (see make_buffer)
+
+    >>> context = srt_init(('/tmp/srt', '', 2, 10000, 4096, 'constant'))
+    >>> a_meter = meter.OpMeter()
+    >>> meter.set_meter(a_meter)
+    >>> sequential_read_test(context)[0]
+    True
+    >>> a_meter.bytes == 20000
+    True
+    >>> srt_final(context)[0]
+    '/tmp/srt'
+    >>> meter.set_meter(meter.OpMeter())
 
-    >>> fss_make_context_list('/tmp/mzfft', '', 3, 2)
-    [('/tmp/mzfft/0', '', 3), ('/tmp/mzfft/1', '', 3)]
+    >>> sequential_read_test(('', '', 2, 10000, 4096, 'constant'))
+    (False, ('', '', 2, 10000, 4096, 'constant'))
     """
 
-    context_list = []
-    for i in xrange(nb_process):
-        a_context = basepath + '/' + str(i), current_path, nb_times
-        context_list.append(a_context)
+    path, current_path, nb_files, file_size, block_size, pattern = context
 
-    return context_list
+    first_err = -1
+    i = 0
+    nb_bytes = 0
+    a_meter = meter.get_meter()
 
-# End of fss_make_context_list
+    if path != '' and nb_files > 0:
+        a_buffer = buffers.get_private_buffer(block_size)
+        for i in a_meter.ops(nb_files):
+            a_file_name = path + '/' + str(i % nb_files)
+            try:
+                a_file = io.open(a_file_name, 'rb', buffering=0)
+                try:
+                    nb_read = a_file.readinto(a_buffer)
+                    while nb_read > 0:
+                        nb_bytes += nb_read
+                        nb_read = a_file.readinto(a_buffer)
+                finally:
+                    a_file.close()
+            except (OSError, IOError), err:
+                if first_err == -1:
+                    first_err = i
 
+    a_meter.add_bytes(nb_bytes)
 
-def FileSystem_Tests(basepath, nb_process, step, debug, buffer_size):
-    """Filesystem test collector
+    if first_err != -1:
+        print("Test could not perform to the end ! Test finished at %d"\
+              % first_err)
+        context = path, current_path, first_err, file_size, block_size, \
+                  pattern
+        return (False, context)
+    elif path == '' or nb_bytes == 0:
+        return (False, context)
+    else:
+        return (True, context)
 
-    Collects all defined tests for the FileSystem tests and returns it
-    as a TestSuite
+# End of sequential_read_test function
+
+
+def srt_init(context):
+    """Inits the sequential read test
+
+    Creates the files to read (out of the measured time) and the
+    buffer to read them into.
+
+    >>> srt_init(('/tmp/srt', '', 2, 100, 4096, 'constant'))[0]
+    '/tmp/srt'
+    >>> os.path.getsize('/tmp/srt/1')
+    100
+    >>> srt_final(('/tmp/srt', '', 2, 100, 4096, 'constant'))[0]
+    '/tmp/srt'
     """
 
-    stressfs = stress.TestSuite('Files', 'Files related tests')
+    path, current_path, nb_files, file_size, block_size, pattern = context
 
+    current_path = os.getcwd()
+    path = make_test_directory(path)
 
-    # Test 0 : Directories Creation
-    dir_context = fss_make_context_list(basepath, '', 100, nb_process)
+    if path != '':
+        for i in xrange(nb_files):
+            if create_file(path + '/' + str(i), file_size, pattern) == False:
+                path = ''
+                break
 
-    dir_funcs = fss_tests_init, make_directory_test, fss_tests_final, \
-                fss_tests_vary, fss_print_c
+    buffers.get_private_buffer(block_size)
 
-    how_many_directories = stress.Test('Directory creation',    \
-      'Creates directories in one single directory', dir_funcs, \
-      dir_context, step, debug)
+    context = path, current_path, nb_files, file_size, block_size, pattern
+    return context
 
-    stressfs.add_test(how_many_directories)
+# End of srt_init function
 
 
-    # Test 1 : Files Creation
-    file_context = fss_make_context_list(basepath, '', 512, nb_process)
+def srt_final(context):
+    """Finishes the sequential read test
 
-    file_funcs = fss_tests_init, make_files_test, fss_tests_final, \
-                 fss_tests_vary, fss_print_c
+    Removes the files that were read
+    """
 
-    how_many_files = stress.Test('Files creation',         \
-      'Creates files in one single directory', file_funcs, \
-      file_context, step, debug)
+    path, current_path, nb_files, file_size, block_size, pattern = context
 
-    stressfs.add_test(how_many_files)
+    clean_directory((path, current_path, nb_files))
 
+    return context
 
-    # Test 2 : Zero Filed Files Creation (file_size variation)
-    # Context is : path, current path, number of files to create, buffer to fill
-    # the files with, size of the files (in  bytes), buffer size (in bytes)
-    a_buffer = '' # Is created at init time
-    mzfft_context = mzfft_make_context_list(basepath, '', 2048, a_buffer,  \
-                                            512, buffer_size, nb_process)
+# End of srt_final function
 
-    mzfft_funcs = mzfft_init, make_zero_filed_files_test, mzfft_final,     \
-                  mzfft_vary_file_size, mzfft_print_c
 
-    mzfft = stress.Test('Space filed files creation',
-            'Creates space filed files (size vary - buffer size is an option)',\
-            mzfft_funcs, mzfft_context, step, debug)
+def srt_vary_block_size(step, context):
+    """A vary function for the sequential read test
 
-    stressfs.add_test(mzfft)
+    >>> srt_vary_block_size(2, ('/tmp/srt', '', 2, 100, 4096, 'constant'))
+    ('/tmp/srt', '', 2, 100, 8192, 'constant')
+    """
 
-    # Add here tests with buffer variation and may be number of files variation
-    # Add same tests with random values
-    # Try if it is possible to mix two or three variations !
+    path, current_path, nb_files, file_size, block_size, pattern = context
+
+    block_size *= step
+
+    context = path, current_path, nb_files, file_size, block_size, pattern
+    return context
 
-    # Other tests to add : create a fix number of files (of a fixed size) and
-    # read them randomly (in random positions) (Force random to be the same at
-    # each tests). Two tests can be made : same files for all process or
-    # different files
+# End of srt_vary_block_size function
 
-    # See if it is possible to do a test that will mix the others at a time.
 
-    # Add a max subdirectory test (dir in dir in dir in dir ...)
+def srt_print_c(what, context):
+    """Function to resume context to a string with mimimun length
+
+    >>> srt_print_c('print', ('/tmp/srt', '', 2, 100, 4096, 'constant'))
+    'F : 2 ; Fs : 100 ; Bs : 4096'
+
+    >>> srt_print_c('config', ('/tmp/srt', '', 2, 100, 4096, 'constant'))
+    'Block size (reading 2 files of 100 bytes)'
+
+    >>> srt_print_c('vary', ('/tmp/srt', '', 2, 100, 4096, 'constant'))
+    4096
+    """
+
+    path, current_path, nb_files, file_size, block_size, pattern = context
+
+    if what == 'print':
+        return 'F : %d ; Fs : %d ; Bs : %d' % (nb_files, file_size, \
+                                               block_size)
+    elif what == 'config':
+        return 'Block size (reading %d files of %d bytes)' % (nb_files, \
+                                                              file_size)
+    elif what == 'vary':
+        return block_size
+
+# End of srt_print_c function
+
+
+def srt_make_context_list(basepath, current_path, nb_files, file_size, \
+                          block_size, pattern, nb_process):
+    """Make a context list for the sequential read test
+
+    >>> srt_make_context_list('/tmp/srt', '', 2, 100, 4096, 'constant', 2)
+    [('/tmp/srt/0', '', 2, 100, 4096, 'constant'), ('/tmp/srt/1', '', 2, 100, 4096, 'constant')]
+    """
+
+    context_list = []
+    for i in xrange(nb_process):
+        a_context = basepath + '/' + str(i), current_path, nb_files, \
+                    file_size, block_size, pattern
+        context_list.append(a_context)
+
+    return context_list
+
+# End of srt_make_context_list function
+
+
+def create_shared_file(a_file_name, file_size, pattern='constant'):
+    """Creates a file of file_size bytes unless it already exists
+
+    The file is written under a temporary name (private to the process
+    and the thread) and then renamed : workers that share the file never
+    see it partially written.
+
+    >>> create_shared_file('/tmp/fss_shared_file', 10000)
+    True
+    >>> create_shared_file('/tmp/fss_shared_file', 10000)
+    True
+    >>> os.path.getsize('/tmp/fss_shared_file')
+    10000
+    >>> os.remove('/tmp/fss_shared_file')
+    """
+
+    if os.path.isfile(a_file_name) and \
+       os.path.getsize(a_file_name) == file_size:
+        return True
+
+    temp_name = '%s.%d.%d' % (a_file_name, os.getpid(), \
+                              threading.current_thread().ident)
+
+    if create_file(temp_name, file_size, pattern) == False:
+        return False
+
+    try:
+        os.rename(temp_name, a_file_name)
+    except OSError, err:
+        print("%s" % str(err))
+        try:
+            os.remove(temp_name)
+        except OSError, err:
+            pass
+        return False
+
+    return True
+
+# End of create_shared_file function
+
+
+def read_at(a_file, size, offset):
+    """Reads size bytes of a_file at offset into the private buffer of
+    the thread (see buffers.get_private_buffer)
+
+    a_file is either an mmap or an unbuffered file object. Python 2 has
+    no os.pread : pread is called from the libc. It does not use the
+    position of the file (several threads may read the same file) and
+    the GIL is released while it reads. Returns the number of bytes
+    read.
+
+    >>> create_file('/tmp/fss_read_at', 8192)
+    True
+    >>> a_file = io.open('/tmp/fss_read_at', 'rb', buffering=0)
+    >>> read_at(a_file, 4096, 4096)
+    4096
+    >>> read_at(a_file, 4096, 6144)
+    2048
+    >>> a_map = mmap.mmap(a_file.fileno(), 0, access=mmap.ACCESS_READ)
+    >>> read_at(a_map, 4096, 4096)
+    4096
+    >>> a_map.close()
+    >>> a_file.close()
+    >>> os.remove('/tmp/fss_read_at')
+    """
+
+    (a_mmap, an_array, a_buffer) = buffers.get_private(size)
+
+    if isinstance(a_file, mmap.mmap):
+        a_buffer[0:size] = a_file[offset:offset + size]
+        return size
+    else:
+        return libc_check(libc.pread(a_file.fileno(), an_array,       \
+                                     ctypes.c_size_t(size),           \
+                                     ctypes.c_longlong(offset)), 'pread')
+
+# End of read_at function
+
+
+def write_at(fd, an_array, size, offset):
+    """Writes the size first bytes of an_array (a ctypes array, see
+    buffers.get_buffer_array) at offset of the file fd
+
+    Python 2 has no os.pwrite : pwrite is called from the libc (see
+    read_at). Returns the number of bytes written.
+
+    >>> fd = os.open('/tmp/fss_write_at', os.O_WRONLY | os.O_CREAT, 0644)
+    >>> write_at(fd, buffers.get_buffer_array(4096), 4096, 8192)
+    4096
+    >>> os.close(fd)
+    >>> os.path.getsize('/tmp/fss_write_at')
+    12288
+    >>> os.remove('/tmp/fss_write_at')
+    """
+
+    return libc_check(libc.pwrite(fd, an_array, ctypes.c_size_t(size), \
+                                  ctypes.c_longlong(offset)), 'pwrite')
+
+# End of write_at function
+
+
+def random_read_test(context):
+    """Reads blocks of files at random offsets
+
+    nb_reads blocks of block_size bytes are read (into a preallocated
+    buffer) at block aligned offsets of randomly chosen files. The
+    pseudo-random sequence is seeded : the same blocks are read at each
+    run. Files are opened (or mapped) by the init function. Each read is
+    one operation of the meter : ops/s are the IOPS and the latencies
+    are the ones of the reads. In time-boxed mode reads go on until the
+    deadline (the sequence then goes further). iodepth reads are in
+    flight at the same time (see meter.OpMeter.run_ops) : each block
+    (file and offset) is drawn with one single call to the generator
+    (under a lock), so that the same blocks are read whatever the way
+    the threads interleave (but not always in the same order).
+    context is a tuple containing :
+    . a path where the files are
+    . the current path
+    . the number of files
+    . the size of each file (in bytes)
+    . the block size (in bytes)
+    . the number of reads
+    . the seed of the pseudo-random sequence
+    . the access to the files ('pread' or 'mmap')
+    . the fill pattern of the files (see make_buffer)
+    . the queue depth (number of reads in flight)
+    . the opened files (a tuple of file objects or mmaps)
+
+    >>> context = rrt_init(('/tmp/rrt', '', 2, 16384, 4096, 10, 1,
+    ...                     'pread', 'constant', 1, ()))
+    >>> a_meter = meter.OpMeter()
+    >>> meter.set_meter(a_meter)
+    >>> random_read_test(context)[0]
+    True
+    >>> a_meter.count, a_meter.bytes == 40960
+    (10, True)
+    >>> rrt_final(context)[-1]
+    ()
+
+    >>> context = rrt_init(('/tmp/rrt', '', 2, 16384, 4096, 100, 1,
+    ...                     'pread', 'constant', 8, ()))
+    >>> random_read_test(context)[0]
+    True
+    >>> a_meter.count, a_meter.bytes == 450560
+    (110, True)
+    >>> rrt_final(context)[-1]
+    ()
+
+    The same blocks are read at each run, even with threads switching
+    as often as possible :
+
+    >>> import sys
+    >>> module = random_read_test.func_globals
+    >>> def read_blocks(context):
+    ...     blocks = []
+    ...     def recording_read_at(a_file, size, offset):
+    ...         blocks.append((context[-1].index(a_file), offset))
+    ...         time.sleep(0)
+    ...         return size
+    ...     module['read_at'] = recording_read_at
+    ...     try:
+    ...         random_read_test(context)
+    ...     finally:
+    ...         module['read_at'] = read_at
+    ...     return sorted(blocks)
+    >>> interval = sys.getcheckinterval()
+    >>> sys.setcheckinterval(1)
+    >>> context = rrt_init(('/tmp/rrt', '', 4, 1 << 20, 4096, 2000, 1,
+    ...                     'pread', 'constant', 8, ()))
+    >>> first = read_blocks(context)
+    >>> len(first), read_blocks(context) == first
+    (2000, True)
+    >>> sys.setcheckinterval(interval)
+    >>> rrt_final(context)[-1]
+    ()
+    >>> meter.set_meter(meter.OpMeter())
+
+    >>> random_read_test(('', '', 2, 16384, 4096, 10, 1, 'pread',
+    ...                   'constant', 1, ()))[0]
+    False
+    """
+
+    (path, current_path, nb_files, file_size, block_size, nb_reads, seed, \
+     access, pattern, iodepth, files) = context
+
+    first_err = -1
+    nb_bytes = 0
+    a_meter = meter.get_meter()
+
+    if block_size > 0:
+        nb_blocks = file_size // block_size
+    else:
+        nb_blocks = 0
+
+    if path != '' and len(files) > 0 and nb_blocks > 0:
+        generator = random.Random(seed)
+        lock = threading.Lock()
+
+        def read_one(i):
+            """Reads one block of a file at a random offset"""
+
+            lock.acquire()
+            block = generator.randrange(len(files) * nb_blocks)
+            lock.release()
+            a_file = files[block // nb_blocks]
+            offset = (block % nb_blocks) * block_size
+            try:
+                a_meter.add_bytes(read_at(a_file, block_size, offset))
+            except (OSError, IOError, ValueError), err:
+                return False
+
+            return True
+
+        nb_bytes = a_meter.bytes
+        first_err = a_meter.run_ops(nb_reads, read_one, iodepth)
+        nb_bytes = a_meter.bytes - nb_bytes
+
+    if first_err != -1:
+        print("Test could not perform to the end ! Test finished at %d"\
+              % first_err)
+        context = path, current_path, nb_files, file_size, block_size, \
+                  first_err, seed, access, pattern, iodepth, files
+        return (False, context)
+    elif path == '' or nb_bytes == 0:
+        return (False, context)
+    else:
+        return (True, context)
+
+# End of random_read_test function
+
+
+def rrt_init(context):
+    """Inits the random read test
+
+    Creates the files to read (if they do not already exist : they may
+    be shared by all the workers) and opens them (or maps them into
+    memory when access is 'mmap'), out of the measured time.
+
+    >>> context = rrt_init(('/tmp/rrt', '', 2, 100, 4096, 10, 1, 'mmap',
+    ...                     'constant', 1, ()))
+    >>> [a_file.__class__.__name__ for a_file in context[-1]]
+    ['mmap', 'mmap']
+    >>> os.path.getsize('/tmp/rrt/1')
+    100
+    >>> rrt_final(context)[-1]
+    ()
+    """
+
+    (path, current_path, nb_files, file_size, block_size, nb_reads, seed, \
+     access, pattern, iodepth, files) = context
+
+    current_path = os.getcwd()
+    path = make_test_directory(path)
+    files = []
+
+    if path != '':
+        try:
+            for i in xrange(nb_files):
+                a_file_name = path + '/' + str(i)
+                if create_shared_file(a_file_name, file_size, pattern) == \
+                   False:
+                    path = ''
+                    break
+                a_file = io.open(a_file_name, 'rb', buffering=0)
+                if access == 'mmap':
+                    try:
+                        a_map = mmap.mmap(a_file.fileno(), 0, \
+                                          access=mmap.ACCESS_READ)
+                    finally:
+                        a_file.close()
+                    files.append(a_map)
+                else:
+                    files.append(a_file)
+        except (OSError, IOError, mmap.error), err:
+            print("%s" % str(err))
+            path = ''
+
+    buffers.get_private_buffer(block_size)
+
+    context = path, current_path, nb_files, file_size, block_size, \
+              nb_reads, seed, access, pattern, iodepth, tuple(files)
+    return context
+
+# End of rrt_init function
+
+
+def rrt_final(context):
+    """Finishes the random read test
+
+    Closes the files and removes them. When the files are shared, an
+    other worker may still be reading them : its own descriptors (or
+    mappings) keep them readable until it closes them.
+    """
+
+    (path, current_path, nb_files, file_size, block_size, nb_reads, seed, \
+     access, pattern, iodepth, files) = context
+
+    for a_file in files:
+        try:
+            a_file.close()
+        except (OSError, IOError), err:
+            pass
+
+    clean_directory((path, current_path, nb_files))
+
+    context = path, current_path, nb_files, file_size, block_size, \
+              nb_reads, seed, access, pattern, iodepth, ()
+    return context
+
+# End of rrt_final function
+
+
+def rrt_vary_nb_reads(step, context):
+    """A vary function for the random read test
+
+    >>> rrt_vary_nb_reads(2, ('/tmp/rrt', '', 2, 100, 4096, 10, 1,
+    ...                       'pread', 'constant', 1, ()))[5]
+    20
+    """
+
+    (path, current_path, nb_files, file_size, block_size, nb_reads, seed, \
+     access, pattern, iodepth, files) = context
+
+    nb_reads *= step
+
+    context = path, current_path, nb_files, file_size, block_size, \
+              nb_reads, seed, access, pattern, iodepth, files
+    return context
+
+# End of rrt_vary_nb_reads function
+
+
+def rrt_print_c(what, context):
+    """Function to resume context to a string with mimimun length
+
+    >>> context = ('/tmp/rrt', '', 2, 100, 4096, 10, 1, 'pread',
+    ...            'constant', 1, ())
+    >>> rrt_print_c('print', context)
+    'R : 10 ; F : 2 ; Bs : 4096 ; pread'
+    >>> rrt_print_c('print', context[:9] + (16, ()))
+    'R : 10 ; F : 2 ; Bs : 4096 ; pread ; Qd : 16'
+
+    >>> rrt_print_c('config', context)
+    'Number of random reads (pread, 2 files of 100 bytes)'
+
+    >>> rrt_print_c('vary', context)
+    10
+    """
+
+    (path, current_path, nb_files, file_size, block_size, nb_reads, seed, \
+     access, pattern, iodepth, files) = context
+
+    if what == 'print':
+        return 'R : %d ; F : %d ; Bs : %d ; %s%s' % (nb_reads, nb_files, \
+               block_size, access, print_iodepth(iodepth))
+    elif what == 'config':
+        return 'Number of random reads (%s, %d files of %d bytes)' % \
+               (access, nb_files, file_size)
+    elif what == 'vary':
+        return nb_reads
+
+# End of rrt_print_c function
+
+
+def rrt_make_context_list(basepath, current_path, nb_files, file_size, \
+                          block_size, nb_reads, seed, access, pattern, \
+                          iodepth, nb_process, shared=False):
+    """Make a context list for the random read test
+
+    Each process reads its own files (in its own directory) unless
+    shared is True : all processes then read the same files. Each
+    process has its own seed (seed, seed + 1, ...).
+
+    >>> rrt_make_context_list('/tmp/rrt', '', 2, 100, 4096, 10, 1,
+    ...                       'pread', 'constant', 1, 2, True)
+    [('/tmp/rrt', '', 2, 100, 4096, 10, 1, 'pread', 'constant', 1, ()), ('/tmp/rrt', '', 2, 100, 4096, 10, 2, 'pread', 'constant', 1, ())]
+    >>> rrt_make_context_list('/tmp/rrt', '', 2, 100, 4096, 10, 1,
+    ...                       'pread', 'constant', 1, 2)[1][0]
+    '/tmp/rrt/1'
+    """
+
+    context_list = []
+    for i in xrange(nb_process):
+        if shared == True:
+            path = basepath
+        else:
+            path = basepath + '/' + str(i)
+        a_context = path, current_path, nb_files, file_size, block_size, \
+                    nb_reads, seed + i, access, pattern, iodepth, \
+                    ()
+        context_list.append(a_context)
+
+    return context_list
+
+# End of rrt_make_context_list function
+
+
+def parse_durability(durability):
+    """Returns the (mode, sync_every) of a durability string
+
+    mode is one of DURABILITIES. sync_every is the number of writes
+    between two syncs in fdatasync mode (given as 'fdatasync:N', 1 by
+    default) and 0 in the other modes.
+
+    >>> parse_durability('fdatasync:4')
+    ('fdatasync', 4)
+    >>> parse_durability('fsync')
+    ('fsync', 0)
+    >>> parse_durability('fdatasync:0')
+    Traceback (most recent call last):
+    ...
+    ValueError: invalid number of writes in durability 'fdatasync:0'
+    >>> parse_durability('sometimes')
+    Traceback (most recent call last):
+    ...
+    ValueError: unknown durability 'sometimes'
+    """
+
+    (mode, sep, sync_every) = durability.partition(':')
+
+    if mode not in DURABILITIES or (sep != '' and mode != 'fdatasync'):
+        raise ValueError("unknown durability '%s'" % durability)
+
+    if mode != 'fdatasync':
+        return (mode, 0)
+
+    if sync_every == '':
+        return (mode, 1)
+
+    try:
+        sync_every = int(sync_every)
+    except ValueError, err:
+        sync_every = 0
+
+    if sync_every <= 0:
+        raise ValueError("invalid number of writes in durability '%s'" % \
+                         durability)
+
+    return (mode, sync_every)
+
+# End of parse_durability function
+
+
+def durability_flags(mode):
+    """Returns the flags used to open the files in the durability mode
+    (None if the system does not know them)
+
+    >>> durability_flags('dsync') == os.O_DSYNC
+    True
+    >>> durability_flags('fsync')
+    0
+    """
+
+    if mode == 'dsync':
+        return getattr(os, 'O_DSYNC', None)
+    elif mode == 'direct':
+        return getattr(os, 'O_DIRECT', None)
+    else:
+        return 0
+
+# End of durability_flags function
+
+
+def timed_sync(a_meter, sync_func, fd):
+    """Syncs fd with sync_func and records the time it took in the 'sync'
+    histogram of a_meter
+    """
+
+    begin = time.time()
+    sync_func(fd)
+    a_meter.record('sync', time.time() - begin)
+
+# End of timed_sync function
+
+
+def durable_write_test(context):
+    """Writes files with a durability mode
+
+    Each operation writes one file of file_size bytes by blocks of
+    block_size bytes (from a page aligned buffer) and makes it durable
+    according to the durability mode :
+    . none        : nothing is synced (the page cache is measured)
+    . fsync       : one fsync at the end of each file
+    . fdatasync:N : one fdatasync every N writes and at the end of each
+                    file
+    . dsync       : files are opened with O_DSYNC (each write is synced)
+    . direct      : files are opened with O_DIRECT (the page cache is
+                    bypassed, this is not a sync by itself). file_size
+                    and block_size must then be multiples of the block
+                    size of the filesystem
+    The time of each write is recorded in the 'write' histogram and the
+    time of each sync in the 'sync' one (latencies of the whole files are
+    the 'op' ones). iodepth files are written at the same time (see
+    meter.OpMeter.run_ops).
+    context is a tuple containing :
+    . a path where the files are written
+    . the current path
+    . the number of files to write
+    . the size of each file (in bytes)
+    . the block size (in bytes)
+    . the durability mode (see parse_durability)
+    . the fill pattern of the files (see make_buffer)
+    . the queue depth (number of files written at the same time)
+
+    >>> context = dwt_init(('/tmp/dwt', '', 2, 10000, 4096, 'fdatasync:2',
+    ...                     'constant', 1))
+    >>> a_meter = meter.OpMeter({'latency': True})
+    >>> meter.set_meter(a_meter)
+    >>> a_meter.start()
+    >>> durable_write_test(context)[0]
+    True
+    >>> a_meter.bytes, os.path.getsize('/tmp/dwt/1')
+    (20000, 10000)
+    >>> a_meter.histograms['write'].count, a_meter.histograms['sync'].count
+    (6, 4)
+    >>> dwt_final(context)[0]
+    '/tmp/dwt'
+
+    >>> context = dwt_init(('/tmp/dwt', '', 8, 10000, 4096, 'fsync',
+    ...                     'constant', 4))
+    >>> a_meter.start()
+    >>> durable_write_test(context)[0]
+    True
+    >>> a_meter.count, a_meter.bytes, a_meter.histograms['sync'].count
+    (8, 80000, 8)
+    >>> dwt_final(context)[0]
+    '/tmp/dwt'
+    >>> meter.set_meter(meter.OpMeter())
+
+    >>> durable_write_test(('', '', 2, 10000, 4096, 'fsync', 'constant',
+    ...                     1))[0]
+    False
+    """
+
+    path, current_path, nb_files, file_size, block_size, durability, \
+    pattern, iodepth = context
+
+    first_err = -1
+    a_meter = meter.get_meter()
+
+    (mode, sync_every) = parse_durability(durability)
+    flags = os.O_WRONLY | os.O_CREAT | os.O_TRUNC | durability_flags(mode)
+    sync_func = getattr(os, 'fdatasync', os.fsync)
+
+    if path != '' and block_size > 0:
+        a_buffer = make_buffer(block_size, pattern)
+
+        def write_one(i):
+            """Writes the file number i and makes it durable"""
+
+            try:
+                fd = os.open(path + '/' + str(i), flags, 0644)
+                try:
+                    offset = 0
+                    nb_writes = 0
+                    while offset < file_size:
+                        length = min(block_size, file_size - offset)
+                        begin = time.time()
+                        a_block = next_block(a_buffer, pattern)
+                        if length < block_size:
+                            offset += os.write(fd, a_block[0:length])
+                        else:
+                            offset += os.write(fd, a_block)
+                        a_meter.record('write', time.time() - begin)
+                        nb_writes += 1
+                        if sync_every > 0 and nb_writes % sync_every == 0:
+                            timed_sync(a_meter, sync_func, fd)
+
+                    if mode == 'fsync':
+                        timed_sync(a_meter, os.fsync, fd)
+                    elif sync_every > 0 and nb_writes % sync_every != 0:
+                        timed_sync(a_meter, sync_func, fd)
+                finally:
+                    os.close(fd)
+                a_meter.add_bytes(offset)
+            except (OSError, IOError), err:
+                print("%s" % str(err))
+                return False
+
+            return True
+
+        first_err = a_meter.run_ops(nb_files, write_one, iodepth)
+
+    if first_err != -1:
+        print("Test could not perform to the end ! Test finished at %d"\
+              % first_err)
+        context = path, current_path, first_err, file_size, block_size, \
+                  durability, pattern, iodepth
+        return (False, context)
+    elif path == '':
+        return (False, context)
+    else:
+        return (True, context)
+
+# End of durable_write_test function
+
+
+def dwt_init(context):
+    """Inits the durable write test
+
+    Makes sure that the test directory exists, that the durability mode
+    is supported there (O_DIRECT is refused by some filesystems such as
+    tmpfs) and builds the buffer to write.
+
+    >>> dwt_init(('/tmp/dwt', '', 2, 100, 4096, 'dsync', 'constant', 1))[0]
+    '/tmp/dwt'
+    >>> dwt_init(('/tmp/dwt', '', 2, 100, 4096, 'never', 'constant', 1))[0]
+    unknown durability 'never'
+    ''
+    """
+
+    path, current_path, nb_files, file_size, block_size, durability, \
+    pattern, iodepth = context
+
+    current_path = os.getcwd()
+    path = make_test_directory(path)
+
+    if path != '':
+        try:
+            (mode, sync_every) = parse_durability(durability)
+            flags = durability_flags(mode)
+            if flags == None:
+                print("%s mode is not supported by this system" % mode)
+                path = ''
+            elif flags != 0:
+                probe_name = path + '/probe'
+                os.close(os.open(probe_name, os.O_WRONLY | os.O_CREAT | \
+                                 flags, 0644))
+                os.remove(probe_name)
+        except ValueError, err:
+            print("%s" % str(err))
+            path = ''
+        except OSError, err:
+            print("%s mode is not supported in %s : %s" % (mode, path, \
+                  str(err)))
+            path = ''
+
+    make_buffer(block_size, pattern)
+
+    context = path, current_path, nb_files, file_size, block_size, \
+              durability, pattern, iodepth
+    return context
+
+# End of dwt_init function
+
+
+def dwt_final(context):
+    """Finishes the durable write test
+
+    Removes the files written
+    """
+
+    path, current_path, nb_files, file_size, block_size, durability, \
+    pattern, iodepth = context
+
+    clean_directory((path, current_path, nb_files))
+
+    return context
+
+# End of dwt_final function
+
+
+def dwt_vary_nb_files(step, context):
+    """A vary function for the durable write test
+
+    >>> dwt_vary_nb_files(2, ('/tmp/dwt', '', 2, 100, 4096, 'fsync',
+    ...                       'constant', 1))
+    ('/tmp/dwt', '', 4, 100, 4096, 'fsync', 'constant', 1)
+    """
+
+    path, current_path, nb_files, file_size, block_size, durability, \
+    pattern, iodepth = context
+
+    nb_files *= step
+
+    context = path, current_path, nb_files, file_size, block_size, \
+              durability, pattern, iodepth
+    return context
+
+# End of dwt_vary_nb_files function
+
+
+def dwt_print_c(what, context):
+    """Function to resume context to a string with mimimun length
+
+    >>> context = ('/tmp/dwt', '', 2, 100, 4096, 'fsync', 'constant', 1)
+    >>> dwt_print_c('print', context)
+    'F : 2 ; Fs : 100 ; Bs : 4096 ; fsync'
+    >>> dwt_print_c('print', context[:7] + (4, ))
+    'F : 2 ; Fs : 100 ; Bs : 4096 ; fsync ; Qd : 4'
+
+    >>> dwt_print_c('config', context)
+    'Number of files written (fsync, 100 bytes each)'
+
+    >>> dwt_print_c('vary', context)
+    2
+    """
+
+    path, current_path, nb_files, file_size, block_size, durability, \
+    pattern, iodepth = context
+
+    if what == 'print':
+        return 'F : %d ; Fs : %d ; Bs : %d ; %s%s' % (nb_files, file_size, \
+               block_size, durability, print_iodepth(iodepth))
+    elif what == 'config':
+        return 'Number of files written (%s, %d bytes each)' % (durability, \
+                                                                file_size)
+    elif what == 'vary':
+        return nb_files
+
+# End of dwt_print_c function
+
+
+def dwt_make_context_list(basepath, current_path, nb_files, file_size, \
+                          block_size, durability, pattern, iodepth, \
+                          nb_process):
+    """Make a context list for the durable write test
+
+    >>> dwt_make_context_list('/tmp/dwt', '', 2, 100, 4096, 'fsync',
+    ...                       'constant', 1, 2)[1]
+    ('/tmp/dwt/1', '', 2, 100, 4096, 'fsync', 'constant', 1)
+    """
+
+    context_list = []
+    for i in xrange(nb_process):
+        a_context = basepath + '/' + str(i), current_path, nb_files, \
+                    file_size, block_size, durability, pattern, iodepth
+        context_list.append(a_context)
+
+    return context_list
+
+# End of dwt_make_context_list function
+
+
+def libc_check(result, a_name):
+    """Raises an OSError if result (of a libc call on a_name) tells an
+    error and returns result otherwise
+    """
+
+    if result < 0:
+        err = ctypes.get_errno()
+        raise OSError(err, os.strerror(err), a_name)
+
+    return result
+
+# End of libc_check function
+
+
+def open_at(dir_fd, a_name, flags=os.O_RDONLY):
+    """Opens a_name relatively to the directory dir_fd (openat)
+
+    Python 2 has no dir_fd arguments : openat is called from the libc.
+
+    >>> dir_fd = os.open('/tmp', os.O_RDONLY)
+    >>> os.close(open_at(dir_fd, '.'))
+    >>> open_at(dir_fd, 'fss_no_such_file')
+    Traceback (most recent call last):
+    ...
+    OSError: [Errno 2] No such file or directory: 'fss_no_such_file'
+    >>> os.close(dir_fd)
+    """
+
+    return libc_check(libc.openat(dir_fd, a_name, flags), a_name)
+
+# End of open_at function
+
+
+def mkdir_at(dir_fd, a_name, mode=0755):
+    """Makes the directory a_name relatively to the directory dir_fd
+    (mkdirat)
+    """
+
+    libc_check(libc.mkdirat(dir_fd, a_name, mode), a_name)
+
+# End of mkdir_at function
+
+
+def rmdir_at(dir_fd, a_name):
+    """Removes the directory a_name relatively to the directory dir_fd
+    (unlinkat)
+    """
+
+    libc_check(libc.unlinkat(dir_fd, a_name, AT_REMOVEDIR), a_name)
+
+# End of rmdir_at function
+
+
+def stat_at(dir_fd, a_name):
+    """Stats a_name relatively to the directory dir_fd (fstatat)
+
+    Python 2 has no dir_fd arguments : fstatat is called from the libc.
+    The struct stat is not decoded (only the lookup is of interest).
+
+    >>> dir_fd = os.open('/tmp', os.O_RDONLY)
+    >>> stat_at(dir_fd, '.')
+    >>> stat_at(dir_fd, 'fss_no_such_file')
+    Traceback (most recent call last):
+    ...
+    OSError: [Errno 2] No such file or directory: 'fss_no_such_file'
+    >>> os.close(dir_fd)
+    """
+
+    a_buffer = ctypes.create_string_buffer(STAT_BUFFER_SIZE)
+    libc_check(libc.fstatat(dir_fd, a_name, a_buffer, 0), a_name)
+
+# End of stat_at function
+
+
+def time_lookups(a_meter, abs_path, dir_name, level, parent_fd):
+    """Times DNT_NB_LOOKUPS lookups of the directory dir_name at depth
+    level
+
+    Four ways to reach the directory are timed, each in its own
+    histogram ('stat:LEVEL', 'open:LEVEL', 'fstatat:LEVEL' and
+    'openat:LEVEL') :
+    . stat    : os.stat of its absolute path abs_path,
+    . open    : os.open (and close) of its absolute path,
+    . fstatat : fstatat of its name relatively to its parent directory
+                parent_fd (one single component to resolve),
+    . openat  : openat (and close) of its name relatively to parent_fd.
+    Absolute paths are not timed when abs_path is None (too long to be
+    resolved).
+    """
+
+    flags = os.O_RDONLY | os.O_DIRECTORY
+
+    for i in xrange(DNT_NB_LOOKUPS):
+        if abs_path != None:
+            begin = time.time()
+            os.stat(abs_path)
+            end = time.time()
+            a_meter.record('stat:%04d' % level, end - begin)
+
+            begin = time.time()
+            os.close(os.open(abs_path, flags))
+            end = time.time()
+            a_meter.record('open:%04d' % level, end - begin)
+
+        begin = time.time()
+        stat_at(parent_fd, dir_name)
+        end = time.time()
+        a_meter.record('fstatat:%04d' % level, end - begin)
+
+        begin = time.time()
+        os.close(open_at(parent_fd, dir_name, flags))
+        end = time.time()
+        a_meter.record('openat:%04d' % level, end - begin)
+
+# End of time_lookups function
+
+
+def resolvable_depth(path, dir_name, depth):
+    """Returns the (level, error) of the deepest of the depth nested
+    directories dir_name of path whose absolute path can be resolved
+
+    error is None when all of them can be resolved and the strerror of
+    the first one that can not otherwise (ENAMETOOLONG or ELOOP). The
+    length of the paths grows with the depth : a binary search needs a
+    few os.stat only. Other errors are raised.
+
+    >>> os.makedirs('/tmp/fss_resolvable/d/d')
+    >>> resolvable_depth('/tmp/fss_resolvable', 'd', 2)
+    (2, None)
+    >>> shutil.rmtree('/tmp/fss_resolvable')
+    """
+
+    def resolves(level):
+        """Tells wether the directory at level can be resolved"""
+
+        try:
+            os.stat(path + ('/' + dir_name) * level)
+        except OSError, err:
+            if err.errno in (errno.ENAMETOOLONG, errno.ELOOP):
+                return (False, err.strerror)
+            raise
+        return (True, None)
+
+    (ok, error) = resolves(depth)
+    if ok == True:
+        return (depth, None)
+
+    low = 0
+    high = depth
+    while high - low > 1:
+        middle = (low + high) // 2
+        (ok, an_error) = resolves(middle)
+        if ok == True:
+            low = middle
+        else:
+            (high, error) = (middle, an_error)
+
+    return (low, error)
+
+# End of resolvable_depth function
+
+
+def deep_nesting_test(context):
+    """Makes directories in directories
+
+    Nests directories (dir in dir in dir ...) up to a depth. Each
+    directory is one operation : it is made relatively to its parent
+    (mkdirat, timed alone in the 'mkdir' histogram) and opened to go one
+    level deeper, so that its absolute path may go beyond PATH_MAX. Once
+    the tree is made, the absolute paths are checked (out of the
+    operations) : when the deepest ones can not be resolved anymore
+    (ENAMETOOLONG or ELOOP) the depth reached is printed and the test
+    fails. Path resolution is timed by dnt_final, out of the measured
+    time (see time_lookups).
+    context is a tuple containing :
+    . a path where we want to run the test
+    . the current path
+    . the depth to reach
+    . the name of the nested directories
+
+    >>> context = fss_tests_init(('/tmp/dnt', '', 3, 'flat'))
+    >>> a_meter = meter.OpMeter({'latency': True})
+    >>> meter.set_meter(a_meter)
+    >>> a_meter.start()
+    >>> deep_nesting_test(('/tmp/dnt', '', 3, 'd'))
+    (True, ('/tmp/dnt', '', 3, 'd'))
+    >>> os.path.isdir('/tmp/dnt/d/d/d')
+    True
+    >>> sorted(a_meter.histograms.keys())
+    ['mkdir', 'op']
+    >>> a_meter.histograms['mkdir'].count
+    3
+    >>> dnt_final(('/tmp/dnt', '', 3, 'd'))
+    ('/tmp/dnt', '', 3, 'd')
+    >>> meter.set_meter(meter.OpMeter())
+
+    >>> deep_nesting_test(('/tmp/dnt', '', 3000, 'd'))[1][2] < 3000
+    Maximum depth reached : 2043 (File name too long)
+    True
+    >>> dnt_final(('/tmp/dnt', '', 3000, 'd'))[2]
+    3000
+    """
+
+    path, current_path, depth, dir_name = context
+
+    first_err = -1
+    level = 0
+    reached = None
+    a_meter = meter.get_meter()
+
+    if path != '':
+        try:
+            root_fd = os.open(path, os.O_RDONLY | os.O_DIRECTORY)
+        except OSError, err:
+            print("%s" % str(err))
+            return (False, context)
+
+        parent_fd = root_fd
+        try:
+            for i in a_meter.ops(depth):
+                if i >= depth:
+                    break
+                try:
+                    begin = time.time()
+                    mkdir_at(parent_fd, dir_name)
+                    a_meter.record('mkdir', time.time() - begin)
+                    fd = open_at(parent_fd, dir_name, os.O_RDONLY | \
+                                 os.O_DIRECTORY)
+                except OSError, err:
+                    first_err = i
+                    break
+
+                level = i + 1
+                if parent_fd != root_fd:
+                    os.close(parent_fd)
+                parent_fd = fd
+        finally:
+            if parent_fd != root_fd:
+                os.close(parent_fd)
+            os.close(root_fd)
+
+        if level > 0:
+            try:
+                (deepest, error) = resolvable_depth(path, dir_name, level)
+                if error != None:
+                    reached = (deepest, error)
+            except OSError, err:
+                print("%s" % str(err))
+                first_err = level
+
+    if reached != None:
+        print("Maximum depth reached : %d (%s)" % reached)
+        context = path, current_path, reached[0], dir_name
+        return (False, context)
+    elif first_err != -1:
+        print("Test could not perform to the end ! Test finished at %d"\
+              % first_err)
+        context = path, current_path, first_err, dir_name
+        return (False, context)
+    elif path == '' or level == 0:
+        return (False, context)
+    else:
+        return (True, context)
+
+# End of deep_nesting_test function
+
+
+def dnt_init(context):
+    """Inits the deep nesting test
+
+    >>> dnt_init(('/tmp/dnt', '', 3, 'd'))[0]
+    '/tmp/dnt'
+    """
+
+    path, current_path, depth, dir_name = context
+
+    current_path = os.getcwd()
+    path = make_test_directory(path)
+
+    context = path, current_path, depth, dir_name
+    return context
+
+# End of dnt_init function
+
+
+def dnt_final(context):
+    """Finishes the deep nesting test
+
+    Goes down the nested directories, timing the lookups (see
+    time_lookups) at each power of two of the depth and at the depth of
+    the context (the one reached when the test failed), out of the
+    measured time. Then removes the nested directories from the deepest
+    one. Everything is done relatively to file descriptors (and with
+    '..') as the absolute paths may be too long to be resolved.
+
+    >>> context = dnt_init(('/tmp/dnt', '', 3, 'd'))
+    >>> a_meter = meter.OpMeter({'latency': True})
+    >>> meter.set_meter(a_meter)
+    >>> a_meter.start()
+    >>> deep_nesting_test(context)[0]
+    True
+    >>> dnt_final(context)[2]
+    3
+    >>> sorted(a_meter.histograms.keys())[:4]
+    ['fstatat:0001', 'fstatat:0002', 'fstatat:0003', 'mkdir']
+    >>> a_meter.histograms['openat:0003'].count
+    100
+    >>> os.listdir('/tmp/dnt')
+    []
+    >>> meter.set_meter(meter.OpMeter())
+    """
+
+    path, current_path, depth, dir_name = context
+
+    if path == '':
+        return context
+
+    flags = os.O_RDONLY | os.O_DIRECTORY
+    a_meter = meter.get_meter()
+
+    try:
+        fd = os.open(path, flags)
+    except OSError, err:
+        return context
+
+    # Goes down to the deepest directory
+    level = 0
+    abs_path = path
+    try:
+        while True:
+            child_fd = open_at(fd, dir_name, flags)
+            level += 1
+            if abs_path != None:
+                abs_path += '/' + dir_name
+            if level & (level - 1) == 0 or level == depth:
+                try:
+                    if abs_path != None:
+                        os.stat(abs_path)
+                except OSError, err:
+                    abs_path = None
+                time_lookups(a_meter, abs_path, dir_name, level, fd)
+            os.close(fd)
+            fd = child_fd
+    except OSError, err:
+        pass
+
+    # And goes up removing each directory
+    try:
+        while level > 0:
+            parent_fd = open_at(fd, '..', flags)
+            os.close(fd)
+            fd = parent_fd
+            rmdir_at(fd, dir_name)
+            level -= 1
+    except OSError, err:
+        print("%s" % str(err))
+
+    os.close(fd)
+
+    return context
+
+# End of dnt_final function
+
+
+def dnt_vary_depth(step, context):
+    """A vary function for the deep nesting test
+
+    >>> dnt_vary_depth(2, ('/tmp/dnt', '', 3, 'd'))
+    ('/tmp/dnt', '', 6, 'd')
+    """
+
+    path, current_path, depth, dir_name = context
+
+    depth *= step
+
+    context = path, current_path, depth, dir_name
+    return context
+
+# End of dnt_vary_depth function
+
+
+def dnt_print_c(what, context):
+    """Function to resume context to a string with mimimun length
+
+    >>> dnt_print_c('print', ('/tmp/dnt', '', 3, 'd'))
+    'Depth : 3'
+
+    >>> dnt_print_c('config', ('/tmp/dnt', '', 3, 'd'))
+    'Depth of the nested directories'
+
+    >>> dnt_print_c('vary', ('/tmp/dnt', '', 3, 'd'))
+    3
+    """
+
+    path, current_path, depth, dir_name = context
+
+    if what == 'print':
+        return 'Depth : ' + str(depth)
+    elif what == 'config':
+        return 'Depth of the nested directories'
+    elif what == 'vary':
+        return depth
+
+# End of dnt_print_c function
+
+
+def dnt_make_context_list(basepath, current_path, depth, dir_name, \
+                          nb_process):
+    """Make a context list for the deep nesting test
+
+    >>> dnt_make_context_list('/tmp/dnt', '', 3, 'd', 2)
+    [('/tmp/dnt/0', '', 3, 'd'), ('/tmp/dnt/1', '', 3, 'd')]
+    """
+
+    context_list = []
+    for i in xrange(nb_process):
+        a_context = basepath + '/' + str(i), current_path, depth, dir_name
+        context_list.append(a_context)
+
+    return context_list
+
+# End of dnt_make_context_list function
+
+
+def parse_size_dist(size_dist):
+    """Returns the (name, parameters) of a size distribution string
+
+    name is one of SIZE_DISTRIBUTIONS :
+    . fixed:SIZE            : all files have SIZE bytes
+    . uniform:MIN,MAX       : sizes are uniformly drawn between MIN and MAX
+    . lognormal:MEDIAN,SIGMA : log-normal sizes (many small files and a
+                              few big ones) whose median is MEDIAN bytes
+                              (SIGMA is the standard deviation of the log
+                              of the sizes)
+    . histogram:PATH        : sizes are drawn from an empirical histogram
+                              read in the file PATH : one 'SIZE WEIGHT'
+                              line for each size ('#' begins a comment)
+    Sizes may be given with the k, M or G units. The parameters of an
+    histogram are its list of (size, weight). Raises ValueError if the
+    distribution is not valid.
+
+    >>> parse_size_dist('lognormal:4k,2.5')
+    ('lognormal', (4096, 2.5))
+    >>> parse_size_dist('uniform:1k,1M')
+    ('uniform', (1024, 1048576))
+    >>> parse_size_dist('fixed:512')
+    ('fixed', (512,))
+    >>> histogram = open('/tmp/fss_sizes', 'w')
+    >>> histogram.write('# size weight\\n1k 90\\n\\n64M 10\\n')
+    >>> histogram.close()
+    >>> parse_size_dist('histogram:/tmp/fss_sizes')
+    ('histogram', ((1024, 90.0), (67108864, 10.0)))
+    >>> os.remove('/tmp/fss_sizes')
+    >>> parse_size_dist('uniform:1M,1k')
+    Traceback (most recent call last):
+    ...
+    ValueError: invalid parameters in size distribution 'uniform:1M,1k'
+    >>> parse_size_dist('pareto:1')
+    Traceback (most recent call last):
+    ...
+    ValueError: unknown size distribution 'pareto:1'
+    """
+
+    (name, sep, text) = size_dist.partition(':')
+
+    if name not in SIZE_DISTRIBUTIONS:
+        raise ValueError("unknown size distribution '%s'" % size_dist)
+
+    invalid = "invalid parameters in size distribution '%s'" % size_dist
+
+    if name == 'histogram':
+        table = []
+        try:
+            a_file = open(text, 'r')
+            try:
+                for line in a_file:
+                    fields = line.split('#')[0].split()
+                    if len(fields) == 2:
+                        table.append((results.parse_size(fields[0]), \
+                                      float(fields[1])))
+                    elif len(fields) != 0:
+                        raise ValueError(invalid)
+            finally:
+                a_file.close()
+        except IOError, err:
+            raise ValueError("%s (%s)" % (invalid, err.strerror))
+
+        if table == [] or min([weight for (size, weight) in table]) < 0 or \
+           sum([weight for (size, weight) in table]) <= 0:
+            raise ValueError(invalid)
+
+        return (name, tuple(table))
+
+    fields = text.split(',')
+
+    try:
+        if name == 'fixed' and len(fields) == 1:
+            parameters = (results.parse_size(fields[0]), )
+        elif name == 'uniform' and len(fields) == 2:
+            parameters = (results.parse_size(fields[0]), \
+                          results.parse_size(fields[1]))
+        elif name == 'lognormal' and len(fields) == 2:
+            parameters = (results.parse_size(fields[0]), float(fields[1]))
+        else:
+            raise ValueError(invalid)
+    except ValueError, err:
+        raise ValueError(invalid)
+
+    if min(parameters) < 0 or (name == 'uniform' and \
+                               parameters[0] > parameters[1]):
+        raise ValueError(invalid)
+
+    return (name, parameters)
+
+# End of parse_size_dist function
+
+
+def draw_sizes(size_dist, seed, nb_files):
+    """Returns the sizes of nb_files files drawn from a size distribution
+    (see parse_size_dist) with a pseudo-random sequence seeded by seed
+
+    Sizes are never bigger than MFT_MAX_FILE_SIZE bytes.
+
+    >>> draw_sizes('fixed:1k', 1, 3)
+    [1024, 1024, 1024]
+    >>> draw_sizes('lognormal:4k,2.5', 1, 5) == \
+        draw_sizes('lognormal:4k,2.5', 1, 5)
+    True
+    >>> sizes = draw_sizes('uniform:1k,2k', 1, 100)
+    >>> min(sizes) >= 1024 and max(sizes) <= 2048
+    True
+    """
+
+    (name, parameters) = parse_size_dist(size_dist)
+    generator = random.Random(seed)
+    sizes = []
+
+    if name == 'histogram':
+        cumulated = []
+        total = 0.0
+        for (size, weight) in parameters:
+            total += weight
+            cumulated.append(total)
+
+    for i in xrange(nb_files):
+        if name == 'fixed':
+            size = parameters[0]
+        elif name == 'uniform':
+            size = generator.randint(parameters[0], parameters[1])
+        elif name == 'lognormal':
+            size = int(generator.lognormvariate(math.log(max(parameters[0], \
+                       1)), parameters[1]))
+        else:
+            size = parameters[bisect.bisect(cumulated, \
+                                            generator.random() * total)][0]
+        sizes.append(min(size, MFT_MAX_FILE_SIZE))
+
+    return sizes
+
+# End of draw_sizes function
+
+
+def size_class(size):
+    """Returns the index of the size class (see SIZE_CLASSES) of a size
+
+    >>> [size_class(size) for size in (0, 4096, 4097, 1 << 30)]
+    [0, 0, 1, 4]
+    """
+
+    for i in xrange(len(SIZE_CLASSES) - 1):
+        if size <= SIZE_CLASSES[i][0]:
+            return i
+
+    return len(SIZE_CLASSES) - 1
+
+# End of size_class function
+
+
+def mixed_files_test(context):
+    """Creates files whose sizes come from a distribution
+
+    Each operation creates one file of the size drawn for it (sizes are
+    drawn by mft_init, out of the measured time, and reused in turn in
+    time-boxed mode) with a buffer of buffer_size bytes. Files are
+    counted, along with their bytes and the time taken to create them,
+    in their size class (see SIZE_CLASSES) ; the latencies of each class
+    are recorded in its own histogram. iodepth files are created at the
+    same time (see meter.OpMeter.run_ops).
+    context is a tuple containing :
+    . a path where the files are created
+    . the current path
+    . the number of files
+    . the size distribution (see parse_size_dist)
+    . the seed of the sizes
+    . the fill pattern of the files (see make_buffer)
+    . the buffer size (in bytes)
+    . the queue depth
+    . the sizes of the files (drawn by mft_init)
+    . the (files, bytes, seconds) created in each size class (seconds
+      is the sum of the latencies of its files)
+    . the time taken by the whole run (in seconds)
+
+    >>> context = mft_init(('/tmp/mft', '', 10, 'uniform:1k,128k', 1,
+    ...                     'constant', 4096, 2, (), (), 0.0))
+    >>> a_meter = meter.OpMeter({'latency': True})
+    >>> meter.set_meter(a_meter)
+    >>> a_meter.start()
+    >>> (result, context) = mixed_files_test(context)
+    >>> result, context[8], a_meter.count
+    (True, (), 10)
+    >>> [nb_files for (nb_files, nb_bytes, seconds) in context[9]]
+    [0, 6, 4, 0, 0]
+    >>> a_meter.bytes == sum([nb_bytes for (nb_files, nb_bytes, seconds) in
+    ...                       context[9]])
+    True
+    >>> sorted(a_meter.histograms.keys())
+    ['<=1M', '<=64k', 'op']
+    >>> mft_final(context)[0]
+    '/tmp/mft'
+    >>> meter.set_meter(meter.OpMeter())
+
+    >>> mixed_files_test(('', '', 10, 'fixed:1k', 1, 'constant', 4096, 1,
+    ...                   (), (), 0.0))[0]
+    False
+    """
+
+    (path, current_path, nb_files, size_dist, seed, pattern, buffer_size, \
+     iodepth, sizes, classes, elapsed) = context
+
+    first_err = -1
+    a_meter = meter.get_meter()
+    counted = [[0, 0, 0.0] for a_class in SIZE_CLASSES]
+    lock = threading.Lock()
+    begin_run = time.time()
+
+    if path != '' and len(sizes) > 0:
+        a_buffer = make_buffer(buffer_size, pattern)
+
+        def create_one(i):
+            """Creates the file number i with its own size"""
+
+            size = sizes[i % len(sizes)]
+            begin = time.time()
+            try:
+                a_file = file(path + '/' + str(i), 'wb', 0)
+                try:
+                    result = (size == 0 or \
+                              write_to_the_file(a_file, a_buffer, size, \
+                                                pattern))
+                finally:
+                    a_file.close()
+            except (OSError, IOError), err:
+                return False
+            seconds = time.time() - begin
+
+            if result == True:
+                index = size_class(size)
+                a_meter.record(SIZE_CLASSES[index][1], seconds)
+                a_meter.add_bytes(size)
+                lock.acquire()
+                counted[index][0] += 1
+                counted[index][1] += size
+                counted[index][2] += seconds
+                lock.release()
+
+            return result
+
+        first_err = a_meter.run_ops(nb_files, create_one, iodepth)
+
+    classes = tuple([tuple(a_class) for a_class in counted])
+    elapsed = time.time() - begin_run
+
+    # sizes stay in the initialised context (they do not travel back)
+    context = path, current_path, nb_files, size_dist, seed, pattern, \
+              buffer_size, iodepth, (), classes, elapsed
+
+    if first_err != -1:
+        print("Test could not perform to the end ! Test finished at %d"\
+              % first_err)
+        context = path, current_path, first_err, size_dist, seed, \
+                  pattern, buffer_size, iodepth, (), classes, elapsed
+        return (False, context)
+    elif path == '' or len(sizes) == 0:
+        return (False, context)
+    else:
+        return (True, context)
+
+# End of mixed_files_test function
+
+
+def mft_init(context):
+    """Inits the mixed sizes files creation test
+
+    Makes sure that the test directory exists, draws the sizes of the
+    files and builds the buffer, out of the measured time.
+
+    >>> mft_init(('/tmp/mft', '', 3, 'fixed:1k', 1, 'constant', 4096, 1,
+    ...           (), (), 0.0))[8]
+    (1024, 1024, 1024)
+    >>> mft_init(('/tmp/mft', '', 3, 'fixed', 1, 'constant', 4096, 1,
+    ...           (), (), 0.0))[0]
+    invalid parameters in size distribution 'fixed'
+    ''
+    """
+
+    (path, current_path, nb_files, size_dist, seed, pattern, buffer_size, \
+     iodepth, sizes, classes, elapsed) = context
+
+    current_path = os.getcwd()
+    path = make_test_directory(path)
+
+    try:
+        sizes = tuple(draw_sizes(size_dist, seed, nb_files))
+    except ValueError, err:
+        print("%s" % str(err))
+        path = ''
+        sizes = ()
+
+    make_buffer(buffer_size, pattern)
+
+    context = path, current_path, nb_files, size_dist, seed, pattern, \
+              buffer_size, iodepth, sizes, (), 0.0
+    return context
+
+# End of mft_init function
+
+
+def mft_final(context):
+    """Finishes the mixed sizes files creation test
+
+    Removes the files created
+    """
+
+    (path, current_path, nb_files, size_dist, seed, pattern, buffer_size, \
+     iodepth, sizes, classes, elapsed) = context
+
+    clean_directory((path, current_path, nb_files))
+
+    context = path, current_path, nb_files, size_dist, seed, pattern, \
+              buffer_size, iodepth, (), (), elapsed
+    return context
+
+# End of mft_final function
+
+
+def mft_vary_nb_files(step, context):
+    """A vary function for the mixed sizes files creation test
+
+    >>> mft_vary_nb_files(2, ('/tmp/mft', '', 3, 'fixed:1k', 1, 'constant',
+    ...                       4096, 1, (), (), 0.0))[2]
+    6
+    """
+
+    (path, current_path, nb_files, size_dist, seed, pattern, buffer_size, \
+     iodepth, sizes, classes, elapsed) = context
+
+    nb_files *= step
+
+    context = path, current_path, nb_files, size_dist, seed, pattern, \
+              buffer_size, iodepth, sizes, classes, elapsed
+    return context
+
+# End of mft_vary_nb_files function
+
+
+def mft_print_c(what, context):
+    """Function to resume context to a string with mimimun length
+
+    'details' gives one line for each size class where files were
+    created : the number of files, their bytes, the throughput of the
+    class over the whole run (files/s and MB/s, the classes share the
+    time of the run) and the mean latency of its files.
+
+    >>> context = ('/tmp/mft', '', 3, 'lognormal:4k,2.5', 1, 'constant',
+    ...            4096, 1, (), ((2, 3072, 0.5), (0, 0, 0.0), (0, 0, 0.0),
+    ...                          (1, 1048576, 0.25), (0, 0, 0.0)), 0.5)
+    >>> mft_print_c('print', context)
+    'F : 3 ; lognormal:4k,2.5 ; Bs : 4096'
+
+    >>> mft_print_c('config', context)
+    'Number of files (sizes lognormal:4k,2.5, seed 1)'
+
+    >>> mft_print_c('vary', context)
+    3
+    >>> for line in mft_print_c('details', context):
+    ...     print(line)
+    <=4k  ;     2 files ;     0.00 MB ;      4.0 files/s ;     0.01 MB/s ; 250.00ms
+    <=16M ;     1 files ;     1.00 MB ;      2.0 files/s ;     2.00 MB/s ; 250.00ms
+    """
+
+    (path, current_path, nb_files, size_dist, seed, pattern, buffer_size, \
+     iodepth, sizes, classes, elapsed) = context
+
+    if what == 'print':
+        return 'F : %d ; %s ; Bs : %d%s' % (nb_files, size_dist, \
+               buffer_size, print_iodepth(iodepth))
+    elif what == 'config':
+        return 'Number of files (sizes %s, seed %d)' % (size_dist, seed)
+    elif what == 'vary':
+        return nb_files
+    elif what == 'details':
+        lines = []
+        for i in xrange(len(classes)):
+            (nb_class_files, nb_bytes, seconds) = classes[i]
+            if nb_class_files > 0 and elapsed > 0:
+                mbytes = nb_bytes / stress.MEGA_BYTE
+                lines.append('%s ; %5d files ; %8.02f MB ; %8.01f files/s ; \
+%8.02f MB/s ; %s' % (SIZE_CLASSES[i][1].ljust(5), nb_class_files, mbytes, \
+                nb_class_files / elapsed, mbytes / elapsed,               \
+                results.format_time(seconds / nb_class_files)))
+        return lines
+
+# End of mft_print_c function
+
+
+def mft_make_context_list(basepath, current_path, nb_files, size_dist, \
+                          seed, pattern, buffer_size, iodepth, nb_process):
+    """Make a context list for the mixed sizes files creation test
+
+    Each process has its own seed (seed, seed + 1, ...).
+
+    >>> mft_make_context_list('/tmp/mft', '', 3, 'fixed:1k', 1, 'constant',
+    ...                       4096, 1, 2)[1]
+    ('/tmp/mft/1', '', 3, 'fixed:1k', 2, 'constant', 4096, 1, (), (), 0.0)
+    """
+
+    context_list = []
+    for i in xrange(nb_process):
+        a_context = basepath + '/' + str(i), current_path, nb_files, \
+                    size_dist, seed + i, pattern, buffer_size, iodepth, \
+                    (), (), 0.0
+        context_list.append(a_context)
+
+    return context_list
+
+# End of mft_make_context_list function
+
+
+def record_offset(mode, i, record_size, nb_records, rank, nb_workers):
+    """Returns the offset where the worker rank (out of nb_workers) writes
+    its record number i in the disjoint and interleaved modes of the
+    shared file test
+
+    In the disjoint mode each worker owns a region of nb_records records
+    of the file ; in the interleaved mode the records of the workers
+    alternate (neighbours share pages and blocks of the file). Records
+    beyond nb_records (time-boxed mode) are written again in place.
+
+    >>> [record_offset('disjoint', i, 10, 3, 1, 2) for i in xrange(4)]
+    [30, 40, 50, 30]
+    >>> [record_offset('interleaved', i, 10, 3, 1, 2) for i in xrange(4)]
+    [10, 30, 50, 10]
+    """
+
+    i = i % nb_records
+
+    if mode == 'disjoint':
+        return (rank * nb_records + i) * record_size
+    else:
+        return (i * nb_workers + rank) * record_size
+
+# End of record_offset function
+
+
+def shared_file_test(context):
+    """Writes records to one file shared by all the workers
+
+    Each operation writes one record of record_size bytes to the shared
+    file, according to the mode :
+    . append      : the file is opened with O_APPEND (the kernel
+                    serializes the writes at the end of the file)
+    . disjoint    : pwrite in a region of the file owned by the worker
+    . interleaved : pwrite at offsets that alternate with the other
+                    workers (see record_offset)
+    . locked      : the end of the file is locked (fcntl byte-range lock
+                    from the end of the file) and the record is written
+                    there before unlocking, as a log shared by processes
+                    does
+    The time spent waiting for the fcntl locks (the wait between
+    processes) is recorded in the 'lock' histogram and summed in the
+    context ; the time spent waiting for shared_file_lock (the threads of
+    one process, see iodepth) is recorded apart in the 'mutex' one.
+    iodepth records are written at the same time (see
+    meter.OpMeter.run_ops).
+    context is a tuple containing :
+    . a path where the shared file is
+    . the current path
+    . the number of records
+    . the size of each record (in bytes)
+    . the mode (see SHARED_MODES)
+    . the rank of the worker and the number of workers
+    . the fill pattern of the records (see make_buffer)
+    . the queue depth
+    . the file descriptor of the shared file (opened by sft_init)
+    . the time spent waiting for the fcntl locks (in seconds)
+
+    >>> context = sft_init(('/tmp/sft', '', 10, 512, 'append', 0, 1,
+    ...                     'constant', 2, -1, 0.0))
+    >>> a_meter = meter.OpMeter({'latency': True})
+    >>> meter.set_meter(a_meter)
+    >>> a_meter.start()
+    >>> shared_file_test(context)[0]
+    True
+    >>> a_meter.count, a_meter.bytes, os.path.getsize('/tmp/sft/shared')
+    (10, 5120, 5120)
+    >>> sft_final(context)[0]
+    '/tmp/sft'
+
+    >>> context = sft_init(('/tmp/sft', '', 10, 512, 'interleaved', 1, 2,
+    ...                     'constant', 1, -1, 0.0))
+    >>> shared_file_test(context)[0]
+    True
+    >>> os.path.getsize('/tmp/sft/shared')
+    10240
+    >>> sft_final(context)[0]
+    '/tmp/sft'
+
+    >>> context = sft_init(('/tmp/sft', '', 10, 512, 'locked', 0, 1,
+    ...                     'constant', 4, -1, 0.0))
+    >>> a_meter.start()
+    >>> (result, context) = shared_file_test(context)
+    >>> result, context[10] > 0, a_meter.histograms['lock'].count
+    (True, True, 10)
+    >>> a_meter.histograms['mutex'].count
+    10
+    >>> os.path.getsize('/tmp/sft/shared')
+    5120
+    >>> sft_final(context)[0]
+    '/tmp/sft'
+    >>> meter.set_meter(meter.OpMeter())
+
+    >>> shared_file_test(('', '', 10, 512, 'append', 0, 1, 'constant', 1,
+    ...                   -1, 0.0))[0]
+    False
+    """
+
+    (path, current_path, nb_records, record_size, mode, rank, nb_workers, \
+     pattern, iodepth, fd, lock_wait) = context
+
+    first_err = -1
+    a_meter = meter.get_meter()
+    waited = [0.0]
+
+    if path != '' and fd >= 0 and record_size > 0:
+        a_buffer = make_buffer(record_size, pattern)
+        an_array = buffers.get_buffer_array(record_size, pattern)
+
+        def write_one(i):
+            """Writes the record number i"""
+
+            a_record = an_array
+            if pattern == 'incompressible' and mode != 'append':
+                a_record = buffers.next_buffer_array(record_size, pattern)
+            try:
+                if mode == 'append':
+                    written = os.write(fd, next_block(a_buffer, pattern))
+                elif mode == 'locked':
+                    begin = time.time()
+                    shared_file_lock.acquire()
+                    try:
+                        locking = time.time()
+                        a_meter.record('mutex', locking - begin)
+                        # locks from the end of the file to the infinity
+                        fcntl.lockf(fd, fcntl.LOCK_EX, 0, 0, os.SEEK_END)
+                        seconds = time.time() - locking
+                        a_meter.record('lock', seconds)
+                        waited[0] += seconds
+                        try:
+                            written = write_at(fd, a_record, record_size, \
+                                               os.fstat(fd).st_size)
+                        finally:
+                            fcntl.lockf(fd, fcntl.LOCK_UN)
+                    finally:
+                        shared_file_lock.release()
+                else:
+                    offset = record_offset(mode, i, record_size, \
+                                           nb_records, rank, nb_workers)
+                    written = write_at(fd, a_record, record_size, offset)
+                a_meter.add_bytes(written)
+            except (OSError, IOError), err:
+                print("%s" % str(err))
+                return False
+
+            return True
+
+        first_err = a_meter.run_ops(nb_records, write_one, iodepth)
+
+    lock_wait = waited[0]
+    context = path, current_path, nb_records, record_size, mode, rank, \
+              nb_workers, pattern, iodepth, fd, lock_wait
+
+    if first_err != -1:
+        print("Test could not perform to the end ! Test finished at %d"\
+              % first_err)
+        context = path, current_path, first_err, record_size, mode, rank, \
+                  nb_workers, pattern, iodepth, fd, lock_wait
+        return (False, context)
+    elif path == '' or fd < 0:
+        return (False, context)
+    else:
+        return (True, context)
+
+# End of shared_file_test function
+
+
+def sft_init(context):
+    """Inits the shared file test
+
+    Makes sure that the test directory exists and opens the shared file
+    (it is created by the first worker that opens it and never
+    truncated : the other workers may already write to it), out of the
+    measured time.
+
+    >>> context = sft_init(('/tmp/sft', '', 10, 512, 'append', 0, 1,
+    ...                     'constant', 1, -1, 0.0))
+    >>> context[9] >= 0
+    True
+    >>> sft_final(context)[9]
+    -1
+    >>> sft_init(('/tmp/sft', '', 10, 512, 'shuffled', 0, 1, 'constant',
+    ...           1, -1, 0.0))[0]
+    unknown shared file mode 'shuffled'
+    ''
+    """
+
+    (path, current_path, nb_records, record_size, mode, rank, nb_workers, \
+     pattern, iodepth, fd, lock_wait) = context
+
+    current_path = os.getcwd()
+    path = make_test_directory(path)
+    fd = -1
+
+    if mode not in SHARED_MODES:
+        print("unknown shared file mode '%s'" % mode)
+        path = ''
+
+    if path != '':
+        flags = os.O_WRONLY | os.O_CREAT
+        if mode == 'append':
+            flags |= os.O_APPEND
+        try:
+            fd = os.open(path + '/' + SFT_FILE_NAME, flags, 0644)
+        except OSError, err:
+            print("%s" % str(err))
+            path = ''
+
+    if record_size > 0:
+        make_buffer(record_size, pattern)
+
+    context = path, current_path, nb_records, record_size, mode, rank, \
+              nb_workers, pattern, iodepth, fd, 0.0
+    return context
+
+# End of sft_init function
+
+
+def sft_final(context):
+    """Finishes the shared file test
+
+    Closes the shared file and removes it. An other worker may still be
+    writing to it : its own descriptor keeps the file until it closes
+    it.
+    """
+
+    (path, current_path, nb_records, record_size, mode, rank, nb_workers, \
+     pattern, iodepth, fd, lock_wait) = context
+
+    if fd >= 0:
+        try:
+            os.close(fd)
+        except OSError, err:
+            pass
+
+    if path != '':
+        try:
+            os.remove(path + '/' + SFT_FILE_NAME)
+        except OSError, err:
+            if err.errno != errno.ENOENT:
+                print("%s" % str(err))
+
+    context = path, current_path, nb_records, record_size, mode, rank, \
+              nb_workers, pattern, iodepth, -1, lock_wait
+    return context
+
+# End of sft_final function
+
+
+def sft_vary_nb_records(step, context):
+    """A vary function for the shared file test
+
+    >>> sft_vary_nb_records(2, ('/tmp/sft', '', 10, 512, 'append', 0, 1,
+    ...                         'constant', 1, -1, 0.0))[2]
+    20
+    """
+
+    (path, current_path, nb_records, record_size, mode, rank, nb_workers, \
+     pattern, iodepth, fd, lock_wait) = context
+
+    nb_records *= step
+
+    context = path, current_path, nb_records, record_size, mode, rank, \
+              nb_workers, pattern, iodepth, fd, lock_wait
+    return context
+
+# End of sft_vary_nb_records function
+
+
+def sft_print_c(what, context):
+    """Function to resume context to a string with mimimun length
+
+    'details' gives the time the worker spent waiting for the locks (in
+    the locked mode).
+
+    >>> context = ('/tmp/sft', '', 10, 512, 'locked', 0, 2, 'constant', 1,
+    ...            -1, 0.25)
+    >>> sft_print_c('print', context)
+    'R : 10 ; Rs : 512 ; locked'
+
+    >>> sft_print_c('config', context)
+    'Number of records written (locked, 2 workers, 512 bytes each)'
+
+    >>> sft_print_c('vary', context)
+    10
+    >>> sft_print_c('details', context)
+    ['lock wait : 0.2500 s ; 25000.0 us per record']
+    >>> sft_print_c('details', context[:4] + ('append', ) + context[5:])
+    """
+
+    (path, current_path, nb_records, record_size, mode, rank, nb_workers, \
+     pattern, iodepth, fd, lock_wait) = context
+
+    if what == 'print':
+        return 'R : %d ; Rs : %d ; %s%s' % (nb_records, record_size, mode, \
+               print_iodepth(iodepth))
+    elif what == 'config':
+        return 'Number of records written (%s, %d workers, %d bytes each)' \
+               % (mode, nb_workers, record_size)
+    elif what == 'vary':
+        return nb_records
+    elif what == 'details':
+        if mode == 'locked' and nb_records > 0:
+            return ['lock wait : %.4f s ; %.01f us per record' % \
+                    (lock_wait, lock_wait * 1e6 / nb_records)]
+
+# End of sft_print_c function
+
+
+def sft_make_context_list(basepath, current_path, nb_records, record_size, \
+                          mode, pattern, iodepth, nb_process):
+    """Make a context list for the shared file test
+
+    All the processes write to the same file : each one knows its rank.
+
+    >>> sft_make_context_list('/tmp/sft', '', 10, 512, 'append',
+    ...                       'constant', 1, 2)[1]
+    ('/tmp/sft', '', 10, 512, 'append', 1, 2, 'constant', 1, -1, 0.0)
+    """
+
+    context_list = []
+    for i in xrange(nb_process):
+        a_context = basepath, current_path, nb_records, record_size, mode, \
+                    i, nb_process, pattern, iodepth, -1, 0.0
+        context_list.append(a_context)
+
+    return context_list
+
+# End of sft_make_context_list function
+
+
+def make_buffer(buffer_size, pattern='constant'):
+    """ Creates a buffer of buffer_size len
+
+    Filled with pattern (see buffers.PATTERNS) : spaces (the default
+    'constant' pattern), zeros, seeded pseudo-random bytes ('random' or
+    'random:SEED') or incompressible random bytes (see next_block). The
+    buffer is a memoryview of a page aligned buffer of the pool of the
+    process : asking the same buffer again does not build it again.
+
+    >>> make_buffer(3).tobytes()
+    '   '
+
+    >>> make_buffer(3, 'zeros').tobytes()
+    '\\x00\\x00\\x00'
+
+    >>> make_buffer(-1)
+    ''
+    """
+
+    return buffers.get_buffer(buffer_size, pattern)
+
+# End of make_buffer function
+
+
+def fss_make_context_list(basepath, current_path, nb_times, nb_process, \
+                          layout='flat'):
+    """Make a context list for the FileSystem test suite
+
+    >>> fss_make_context_list('/tmp/mzfft', '', 3, 2)
+    [('/tmp/mzfft/0', '', 3, 'flat'), ('/tmp/mzfft/1', '', 3, 'flat')]
+    """
+
+    context_list = []
+    for i in xrange(nb_process):
+        a_context = basepath + '/' + str(i), current_path, nb_times, layout
+        context_list.append(a_context)
+
+    return context_list
+
+# End of fss_make_context_list
+
+
+def layout_test_name(name, layout, layouts):
+    """Returns the name of a test run with layout : the layout is told
+    when the tests are run with more than one layout
+
+    >>> layout_test_name('Files creation', 'flat', ['flat'])
+    'Files creation'
+    >>> layout_test_name('Files creation', 'flat', ['flat', 'hashed'])
+    'Files creation (flat)'
+    """
+
+    if len(layouts) > 1:
+        return '%s (%s)' % (name, layout)
+    else:
+        return name
+
+# End of layout_test_name function
+
+
+def layout_test_desc(what, layout):
+    """Returns the description of a test creating what with layout
+
+    >>> layout_test_desc('files', 'flat')
+    'Creates files in one single directory'
+    >>> layout_test_desc('files', 'hashed:2')
+    'Creates files in a tree of directories (hashed:2 layout)'
+    """
+
+    if layout == 'flat':
+        return 'Creates %s in one single directory' % what
+    else:
+        return 'Creates %s in a tree of directories (%s layout)' % (what, \
+                                                                   layout)
+
+# End of layout_test_desc function
+
+
+def FileSystem_Tests(basepath, nb_process, step, debug, buffer_size, \
+                     fill='constant', read_access='pread', \
+                     durability='fsync', layouts=('flat',), iodepth=1, \
+                     size_dist=MFT_SIZE_DIST, size_seed=MFT_SEED, \
+                     shared_modes=SHARED_MODES):
+    """Filesystem test collector
+
+    Collects all defined tests for the FileSystem tests and returns it
+    as a TestSuite. fill is the fill pattern of the buffers written to
+    the files (see make_buffer), read_access the way the random read
+    tests read them (see READ_ACCESSES) and durability the way the
+    durable write test makes its files durable (see parse_durability).
+    Directories and files creation tests are added once for each layout
+    of layouts (see layout_namer). iodepth is the number of operations
+    that each process of the space filed files creation, random read and
+    durable write tests keeps in flight (see meter.OpMeter.run_ops).
+    size_dist and size_seed give the sizes of the files of the mixed
+    sizes files creation test (see parse_size_dist). The shared file
+    test is added once for each mode of shared_modes (see SHARED_MODES)
+    """
+
+    stressfs = stress.TestSuite('Files', 'Files related tests')
+
+
+    # Test 0 : Directories Creation
+    dir_funcs = fss_tests_init, make_directory_test, fss_tests_final, \
+                fss_tests_vary, fss_print_c
+
+    for layout in layouts:
+        dir_context = fss_make_context_list(basepath + '/directories', '', \
+                                            100, nb_process, layout)
+
+        how_many_directories = stress.Test(layout_test_name(             \
+          'Directory creation', layout, layouts),                        \
+          layout_test_desc('directories', layout), dir_funcs,            \
+          dir_context, step, debug)
+
+        stressfs.add_test(how_many_directories)
+
+
+    # Test 1 : Files Creation
+    file_funcs = fss_tests_init, make_files_test, fss_tests_final, \
+                 fss_tests_vary, fss_print_c
+
+    for layout in layouts:
+        file_context = fss_make_context_list(basepath + '/files', '', 512, \
+                                             nb_process, layout)
+
+        how_many_files = stress.Test(layout_test_name('Files creation',  \
+          layout, layouts),                                              \
+          layout_test_desc('files', layout), file_funcs,                 \
+          file_context, step, debug)
+
+        stressfs.add_test(how_many_files)
+
+
+    # Test 2 : Zero Filed Files Creation (file_size variation)
+    # Context is : path, current path, number of files to create, fill pattern
+    # of the buffer to fill the files with (the buffer is created at init
+    # time), size of the files (in  bytes), buffer size (in bytes), queue
+    # depth
+    mzfft_context = mzfft_make_context_list(basepath + '/space_filed', '', \
+                                            2048, fill,                    \
+                                            512, buffer_size, iodepth,     \
+                                            nb_process)
+
+    mzfft_funcs = mzfft_init, make_zero_filed_files_test, mzfft_final,     \
+                  mzfft_vary_file_size, mzfft_print_c
+
+    mzfft = stress.Test('Space filed files creation',
+            'Creates space filed files (size vary - buffer size is an option)',\
+            mzfft_funcs, mzfft_context, step, debug)
+    # Parameters that a grid may set (index in the context)
+    mzfft.parameters = {'nb_files': 2, 'file_size': 4, 'buffer_size': 5, \
+                        'iodepth': 6}
+
+    stressfs.add_test(mzfft)
+
+    # Test 3 : Sequential read (block_size variation)
+    # Context is : path, current path, number of files, size of the files
+    # (in bytes), block size (in bytes), fill pattern of the files
+    srt_context = srt_make_context_list(basepath + '/sequential_read', '', \
+                                        SRT_NB_FILES, SRT_FILE_SIZE, 4096, \
+                                        fill, nb_process)
+
+    srt_funcs = srt_init, sequential_read_test, srt_final,                 \
+                srt_vary_block_size, srt_print_c
+
+    srt = stress.Test('Sequential read',
+            'Reads files sequentially (block size vary)',                  \
+            srt_funcs, srt_context, step, debug)
+    srt.parameters = {'nb_files': 2, 'file_size': 3, 'block_size': 4}
+
+    stressfs.add_test(srt)
+
+    # Test 4 : Random read (number of reads variation)
+    # Context is : path, current path, number of files, size of the files
+    # (in bytes), block size (in bytes), number of reads, seed, access,
+    # fill pattern of the files, queue depth, opened files (at init time).
+    # Each process reads its own files
+    rrt_context = rrt_make_context_list(basepath + '/random_read', '',    \
+                                        RRT_NB_FILES, RRT_FILE_SIZE,       \
+                                        RRT_BLOCK_SIZE, RRT_NB_READS,      \
+                                        RRT_SEED, read_access, fill,       \
+                                        iodepth, nb_process)
+
+    rrt_funcs = rrt_init, random_read_test, rrt_final,                     \
+                rrt_vary_nb_reads, rrt_print_c
+
+    rrt = stress.Test('Random read',
+            'Reads files at random offsets (number of reads vary)',        \
+            rrt_funcs, rrt_context, step, debug)
+    # IOPS are meaningless without the latencies of the reads
+    rrt.latency = True
+    rrt.parameters = {'nb_files': 2, 'file_size': 3, 'block_size': 4, \
+                      'nb_reads': 5, 'iodepth': 9}
+
+    stressfs.add_test(rrt)
+
+    # Test 5 : Shared random read (number of reads variation)
+    # Same context as the random read test but all processes read the same
+    # files
+    srrt_context = rrt_make_context_list(basepath + '/shared_random_read', \
+                                         '', RRT_NB_FILES, RRT_FILE_SIZE,  \
+                                         RRT_BLOCK_SIZE, RRT_NB_READS,     \
+                                         RRT_SEED, read_access, fill,      \
+                                         iodepth, nb_process, True)
+
+    srrt = stress.Test('Shared random read',
+            'Reads files shared by all processes at random offsets',       \
+            rrt_funcs, srrt_context, step, debug)
+    srrt.latency = True
+    srrt.parameters = rrt.parameters
+
+    stressfs.add_test(srrt)
+
+    # Test 6 : Durable write (number of files variation)
+    # Context is : path, current path, number of files, size of the files
+    # (in bytes), block size (in bytes), durability mode, fill pattern of
+    # the files, queue depth
+    dwt_context = dwt_make_context_list(basepath + '/durable_write', '',  \
+                                        DWT_NB_FILES, DWT_FILE_SIZE,       \
+                                        DWT_BLOCK_SIZE, durability, fill,  \
+                                        iodepth, nb_process)
+
+    dwt_funcs = dwt_init, durable_write_test, dwt_final,                   \
+                dwt_vary_nb_files, dwt_print_c
+
+    dwt = stress.Test('Durable write',
+            'Writes files and makes them durable (number of files vary)',  \
+            dwt_funcs, dwt_context, step, debug)
+    # write and sync latencies are the point of this test
+    dwt.latency = True
+    dwt.parameters = {'nb_files': 2, 'file_size': 3, 'block_size': 4, \
+                      'iodepth': 7}
+
+    stressfs.add_test(dwt)
+
+    # Test 7 : Deep nesting (depth variation)
+    # Context is : path, current path, depth, name of the nested directories
+    dnt_context = dnt_make_context_list(basepath + '/deep_nesting', '',   \
+                                        DNT_DEPTH, DNT_DIR_NAME, nb_process)
+
+    dnt_funcs = dnt_init, deep_nesting_test, dnt_final, dnt_vary_depth,   \
+                dnt_print_c
+
+    dnt = stress.Test('Deep nesting',
+            'Nests directories and times lookups (depth vary)',            \
+            dnt_funcs, dnt_context, step, debug)
+    # lookups latencies at each depth are the point of this test
+    dnt.latency = True
+    dnt.parameters = {'depth': 2}
+
+    stressfs.add_test(dnt)
+
+    # Test 8 : Mixed sizes files creation (number of files variation)
+    # Context is : path, current path, number of files, size distribution,
+    # seed, fill pattern of the files, buffer size (in bytes), queue depth,
+    # sizes of the files (at init time), files created in each size class,
+    # time taken by the run
+    mft_context = mft_make_context_list(basepath + '/mixed_sizes', '',    \
+                                        MFT_NB_FILES, size_dist, size_seed,\
+                                        fill, buffer_size, iodepth,       \
+                                        nb_process)
+
+    mft_funcs = mft_init, mixed_files_test, mft_final, mft_vary_nb_files, \
+                mft_print_c
+
+    mft = stress.Test('Mixed sizes files creation',
+            'Creates files whose sizes come from a distribution (number of \
+files vary)', mft_funcs, mft_context, step, debug)
+    # latencies of each size class are the point of this test
+    mft.latency = True
+    mft.parameters = {'nb_files': 2, 'seed': 4, 'buffer_size': 6, \
+                      'iodepth': 7}
+
+    stressfs.add_test(mft)
+
+
+    # Test 9 : Shared file writes (number of records variation)
+    # Context is : path, current path, number of records, record size (in
+    # bytes), mode, rank of the process, number of processes, fill pattern of
+    # the records, queue depth, descriptor of the shared file (opened at init
+    # time), time spent waiting for the fcntl locks
+    sft_funcs = sft_init, shared_file_test, sft_final, sft_vary_nb_records, \
+                sft_print_c
+
+    for mode in shared_modes:
+        sft_context = sft_make_context_list(basepath + '/shared_file', '', \
+                                            SFT_NB_RECORDS, SFT_RECORD_SIZE,\
+                                            mode, fill, iodepth, nb_process)
+
+        sft = stress.Test('Shared file writes (%s)' % mode,
+                'Writes records to one file shared by all processes (%s \
+mode)' % mode, sft_funcs, sft_context, step, debug)
+        # latencies of the writes (and lock waits) under contention
+        sft.latency = True
+        sft.parameters = {'nb_records': 2, 'record_size': 3, 'iodepth': 8}
+
+        stressfs.add_test(sft)
+
+    # Add here tests with buffer variation and may be number of files variation
+    # Add same tests with random values
+    # Two or three variations are mixed by a grid of the parameters of the
+    # tests (see stress.Test.start_grid)
 
     if debug == True:
         print('%s' % str(stressfs))
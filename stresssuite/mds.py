@@ -0,0 +1,556 @@
+#!/usr/bin/env python
+# -*- encoding: utf8 -*-
+#
+#  Tools to stress the metadata of your filesystem. Use at your own risks !
+#
+#  (C) Copyright 2009 Olivier Delhomme
+#  e-mail : olivier.delhomme@free.fr
+#
+#  This program is free software; you can redistribute it and/or modify
+#  it under the terms of the GNU General Public License as published by
+#  the Free Software Foundation; either version 2, or (at your option)
+#  any later version.
+#
+#  This program is distributed in the hope that it will be useful,
+#  but WITHOUT ANY WARRANTY; without even the implied warranty of
+#  MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#  GNU General Public License for more details.
+#
+#  You should have received a copy of the GNU General Public License
+#  along with this program; if not, write to the Free Software Foundation,
+#  Inc., 59 Temple Place - Suite 330, Boston, MA 02111-1307, USA.
+#
+
+"""mds stands for MetaDataStress
+
+Collection of tools and functions to stress the metadata operations of
+your filesystem (stat, rename, unlink and directory listing) on
+directories holding a large number of entries. Use at your own risks
+"""
+
+__author__ = "Olivier Delhomme <olivier.delhomme@free.fr>"
+__date__ = "17.10.2026"
+__version__ = "Revision: 0.0.1"
+__credits__ = "Thanks to Python makers"
+
+import os
+import ctypes
+import stress
+import meter
+import fss
+
+# Tests begin with MDS_NB_ENTRIES entries in their directory
+MDS_NB_ENTRIES = 1000
+
+# Each run of the listing test lists its directory MDS_NB_LISTINGS times
+MDS_NB_LISTINGS = 5
+
+# Where the kernel is asked to drop its dentries and inodes caches
+DROP_CACHES = '/proc/sys/vm/drop_caches'
+
+
+def populate(path, nb_entries, layout='flat'):
+    """Creates nb_entries empty files named 0, 1, ... in path (spread in
+    a tree of directories when layout is not flat, see fss.layout_namer)
+
+    Returns True if all the files were created.
+
+    >>> populate(fss.make_test_directory('/tmp/mds'), 3)
+    True
+    >>> sorted(os.listdir('/tmp/mds'))
+    ['0', '1', '2']
+    >>> populate('/tmp/mds', 3, 'hashed:1')
+    True
+    >>> os.path.isfile('/tmp/mds/c8/2')
+    True
+    >>> mds_final(('/tmp/mds', '', 3, 'flat'))[0]
+    '/tmp/mds'
+    """
+
+    flags = os.O_WRONLY | os.O_CREAT
+    entry_name = fss.layout_namer(layout, nb_entries)
+
+    def create(a_name):
+        os.close(os.open(a_name, flags, 0644))
+
+    try:
+        for i in xrange(nb_entries):
+            fss.make_entry(create, path + '/' + entry_name(i))
+    except OSError, err:
+        print("%s" % str(err))
+        return False
+
+    return True
+
+# End of populate function
+
+
+def drop_caches():
+    """Asks the kernel to write back and then to drop its dentries and
+    inodes caches
+
+    Only root may do this : returns False (and the caches stay hot) if it
+    could not be done.
+    """
+
+    try:
+        ctypes.CDLL(None).sync()
+        a_file = open(DROP_CACHES, 'w')
+        try:
+            a_file.write('2\n')
+        finally:
+            a_file.close()
+    except (OSError, IOError, AttributeError), err:
+        return False
+
+    return True
+
+# End of drop_caches function
+
+
+def mds_init(context):
+    """Inits the metadata tests
+
+    Makes sure that the test directory exists and fills it with
+    nb_entries empty files laid out with the layout of the context (out
+    of the measured time).
+
+    >>> context = mds_init(('/tmp/mds', '', 3, 'flat'))
+    >>> context[0], len(os.listdir('/tmp/mds'))
+    ('/tmp/mds', 3)
+    >>> mds_final(context)[0]
+    '/tmp/mds'
+    """
+
+    path, current_path, nb_entries, layout = context
+
+    current_path = os.getcwd()
+    path = fss.make_test_directory(path)
+
+    if path != '' and populate(path, nb_entries, layout) == False:
+        path = ''
+
+    context = path, current_path, nb_entries, layout
+    return context
+
+# End of mds_init function
+
+
+def mds_cold_init(context):
+    """Inits the cold metadata tests
+
+    Same as mds_init but the dentries and inodes caches of the kernel are
+    then dropped (only root may do it : a warning is printed otherwise
+    and the caches are hot).
+    """
+
+    context = mds_init(context)
+
+    if context[0] != '' and drop_caches() == False:
+        print("Could not drop the caches (%s) : entries are not cold" % \
+              DROP_CACHES)
+
+    return context
+
+# End of mds_cold_init function
+
+
+def mds_across_init(context):
+    """Inits the metadata tests that move entries between two directories
+
+    The nb_entries files are created in the 'from' subdirectory of the
+    test directory and the 'to' subdirectory is created empty. The layout
+    is always the flat one.
+
+    >>> context = mds_across_init(('/tmp/mds', '', 3, 'flat'))
+    >>> len(os.listdir('/tmp/mds/from')), len(os.listdir('/tmp/mds/to'))
+    (3, 0)
+    >>> mds_final(context)[0]
+    '/tmp/mds'
+    """
+
+    path, current_path, nb_entries, layout = context
+
+    current_path = os.getcwd()
+    path = fss.make_test_directory(path)
+
+    if path != '':
+        from_path = fss.make_test_directory(path + '/from')
+        to_path = fss.make_test_directory(path + '/to')
+        if from_path == '' or to_path == '' or \
+           populate(from_path, nb_entries) == False:
+            path = ''
+
+    context = path, current_path, nb_entries, layout
+    return context
+
+# End of mds_across_init function
+
+
+def mds_final(context):
+    """Finishes the metadata tests
+
+    Removes all the entries of the test directory (and of its 'from' and
+    'to' subdirectories if any)
+
+    >>> mds_final(('', '', 3, 'flat'))
+    ('', '', 3, 'flat')
+    """
+
+    path, current_path, nb_entries, layout = context
+
+    if path != '':
+        for subdirectory in ('/from', '/to'):
+            if os.path.isdir(path + subdirectory):
+                fss.clean_directory((path + subdirectory, current_path, \
+                                     nb_entries))
+
+    fss.clean_directory((path, current_path, nb_entries))
+
+    return context
+
+# End of mds_final function
+
+
+def stat_test(context):
+    """lstats the entries of the test directory
+
+    Each lstat is one operation (a lookup of each directory of the path
+    of the entry when the layout is not flat). In time-boxed mode the
+    entries are lstated again and again.
+
+    >>> context = mds_init(('/tmp/mds', '', 3, 'flat'))
+    >>> a_meter = meter.OpMeter()
+    >>> meter.set_meter(a_meter)
+    >>> stat_test(context)[0]
+    True
+    >>> a_meter.count
+    3
+    >>> mds_final(context)[0]
+    '/tmp/mds'
+    >>> meter.set_meter(meter.OpMeter())
+
+    >>> stat_test(('/tmp/mds', '', 3, 'flat'))
+    Test could not perform to the end ! Test finished at 0
+    (False, ('/tmp/mds', '', 0, 'flat'))
+    """
+
+    path, current_path, nb_entries, layout = context
+
+    first_err = -1
+
+    if path != '' and nb_entries > 0:
+        entry_name = fss.layout_namer(layout, nb_entries)
+        for i in meter.get_meter().ops(nb_entries):
+            try:
+                os.lstat(path + '/' + entry_name(i % nb_entries))
+            except OSError, err:
+                first_err = i
+                break
+
+    return mds_result(context, first_err)
+
+# End of stat_test function
+
+
+def rename_test(context):
+    """Renames the entries of the test directory
+
+    Each rename is one operation : entry N is renamed N.r (or, when the
+    test directory has 'from' and 'to' subdirectories, 'from/N' is
+    renamed 'to/N'). In time-boxed mode the entries are then renamed back
+    and so on. The layout must be the flat one.
+
+    >>> context = mds_init(('/tmp/mds', '', 3, 'flat'))
+    >>> rename_test(context)[0]
+    True
+    >>> sorted(os.listdir('/tmp/mds'))
+    ['0.r', '1.r', '2.r']
+    >>> mds_final(context)[0]
+    '/tmp/mds'
+
+    >>> context = mds_across_init(('/tmp/mds', '', 3, 'flat'))
+    >>> rename_test(context)[0]
+    True
+    >>> len(os.listdir('/tmp/mds/from')), len(os.listdir('/tmp/mds/to'))
+    (0, 3)
+    >>> mds_final(context)[0]
+    '/tmp/mds'
+    """
+
+    path, current_path, nb_entries, layout = context
+
+    first_err = -1
+
+    if path != '' and nb_entries > 0:
+        if os.path.isdir(path + '/from'):
+            names = (path + '/from/', path + '/to/'), ('', '')
+        else:
+            names = (path + '/', path + '/'), ('', '.r')
+
+        (directories, suffixes) = names
+
+        for i in meter.get_meter().ops(nb_entries):
+            name = str(i % nb_entries)
+            # 0 when renaming forth, 1 when renaming back
+            way = (i // nb_entries) % 2
+            try:
+                os.rename(directories[way] + name + suffixes[way], \
+                          directories[1 - way] + name + suffixes[1 - way])
+            except OSError, err:
+                first_err = i
+                break
+
+    return mds_result(context, first_err)
+
+# End of rename_test function
+
+
+def unlink_test(context):
+    """Unlinks the entries of the test directory
+
+    Each unlink is one operation. The test stops when all the entries
+    are unlinked (even in time-boxed mode). Only the entries themselves
+    are unlinked (not the directories of a layout).
+
+    >>> context = mds_init(('/tmp/mds', '', 3, 'flat'))
+    >>> a_meter = meter.OpMeter({'duration': 10})
+    >>> meter.set_meter(a_meter)
+    >>> a_meter.start()
+    >>> unlink_test(context)[0]
+    True
+    >>> a_meter.count, os.listdir('/tmp/mds')
+    (3, [])
+    >>> mds_final(context)[0]
+    '/tmp/mds'
+    >>> meter.set_meter(meter.OpMeter())
+    """
+
+    path, current_path, nb_entries, layout = context
+
+    first_err = -1
+
+    if path != '' and nb_entries > 0:
+        entry_name = fss.layout_namer(layout, nb_entries)
+        for i in meter.get_meter().ops(nb_entries):
+            if i >= nb_entries:
+                break
+            try:
+                os.unlink(path + '/' + entry_name(i))
+            except OSError, err:
+                first_err = i
+                break
+
+    return mds_result(context, first_err)
+
+# End of unlink_test function
+
+
+def listing_test(context):
+    """Lists the test directory
+
+    Each listing of the whole directory is one operation (MDS_NB_LISTINGS
+    listings are done). scandir is used when available and listdir
+    otherwise. The test fails if an entry is missing. The layout must be
+    the flat one.
+
+    >>> context = mds_init(('/tmp/mds', '', 3, 'flat'))
+    >>> a_meter = meter.OpMeter()
+    >>> meter.set_meter(a_meter)
+    >>> listing_test(context)[0]
+    True
+    >>> a_meter.count == MDS_NB_LISTINGS
+    True
+    >>> mds_final(context)[0]
+    '/tmp/mds'
+    >>> meter.set_meter(meter.OpMeter())
+    """
+
+    path, current_path, nb_entries, layout = context
+
+    first_err = -1
+
+    if path != '' and nb_entries > 0:
+        for i in meter.get_meter().ops(MDS_NB_LISTINGS):
+            nb_listed = 0
+            try:
+                for entry in fss.list_directory(path):
+                    nb_listed += 1
+            except OSError, err:
+                pass
+
+            if nb_listed < nb_entries:
+                first_err = i
+                break
+
+    return mds_result(context, first_err)
+
+# End of listing_test function
+
+
+def mds_result(context, first_err):
+    """Returns the result of a metadata test
+
+    first_err is the number of the operation that failed (-1 if none
+    did) : the context is then modified in order not to continue the
+    test.
+
+    >>> mds_result(('/tmp/mds', '', 3, 'flat'), -1)
+    (True, ('/tmp/mds', '', 3, 'flat'))
+    >>> mds_result(('', '', 3, 'flat'), -1)
+    (False, ('', '', 3, 'flat'))
+    """
+
+    path, current_path, nb_entries, layout = context
+
+    if first_err != -1:
+        print("Test could not perform to the end ! Test finished at %d"\
+              % first_err)
+        context = path, current_path, first_err, layout
+        return (False, context)
+    elif path == '' or nb_entries <= 0:
+        return (False, context)
+    else:
+        return (True, context)
+
+# End of mds_result function
+
+
+def mds_print_c(what, context):
+    """Function to resume context to a string with mimimun length
+
+    >>> mds_print_c('print', ('/tmp/mds', '', 3, 'flat'))
+    'Entries : 3'
+
+    >>> mds_print_c('print', ('/tmp/mds', '', 3, 'hashed:2'))
+    'Entries : 3 ; hashed:2'
+
+    >>> mds_print_c('config', ('/tmp/mds', '', 3, 'flat'))
+    'Number of entries in the directory'
+
+    >>> mds_print_c('vary', ('/tmp/mds', '', 3, 'flat'))
+    3
+    """
+
+    path, current_path, nb_entries, layout = context
+
+    if what == 'print':
+        if layout == 'flat':
+            return 'Entries : ' + str(nb_entries)
+        else:
+            return 'Entries : %d ; %s' % (nb_entries, layout)
+    elif what == 'config':
+        if layout == 'flat':
+            return 'Number of entries in the directory'
+        else:
+            return 'Number of entries (%s layout)' % layout
+    elif what == 'vary':
+        return nb_entries
+
+# End of mds_print_c function
+
+
+def Metadata_Tests(basepath, nb_process, step, debug, layouts=('flat',)):
+    """Metadata test collector
+
+    Collects all defined tests for the metadata tests and returns it as
+    a TestSuite. Each test times each of its operations (latencies are
+    always printed). The number of entries of the directories is
+    multiplied by step at each run (use -s 10 to go from 10^3 to 10^6
+    entries). Stat tests are added once for each layout of layouts (see
+    fss.layout_namer) : the other ones always use the flat layout.
+
+    >>> a_testsuite = Metadata_Tests('/tmp/mds', 2, 10, False)
+    >>> [a_test.name for a_test in a_testsuite.testlist]
+    ['Stat hot', 'Stat cold', 'Rename', 'Rename across directories', 'Unlink', 'Directory listing']
+    >>> a_testsuite = Metadata_Tests('/tmp/mds', 2, 10, False,
+    ...                              ('flat', 'hashed:2'))
+    >>> [a_test.name for a_test in a_testsuite.testlist][:4]
+    ['Stat hot (flat)', 'Stat hot (hashed:2)', 'Stat cold (flat)', 'Stat cold (hashed:2)']
+    """
+
+    stressmd = stress.TestSuite('Metadata', 'Metadata related tests')
+
+    # Context is : path, current path, number of entries in the directory,
+    # layout of the entries
+    # Test 0 : lstat of entries whose dentries and inodes are cached
+    stat_hot_funcs = mds_init, stat_test, mds_final, fss.fss_tests_vary, \
+                     mds_print_c
+
+    for layout in layouts:
+        stat_hot = stress.Test(fss.layout_test_name('Stat hot', layout,   \
+                layouts),                                                  \
+                'lstats entries of one directory (in the caches)',         \
+                stat_hot_funcs, fss.fss_make_context_list(basepath +       \
+                '/stat_hot', '', MDS_NB_ENTRIES, nb_process, layout),      \
+                step, debug)
+
+        stressmd.add_test(stat_hot)
+
+    # Test 1 : lstat of entries whose dentries and inodes were dropped
+    stat_cold_funcs = mds_cold_init, stat_test, mds_final,                \
+                      fss.fss_tests_vary, mds_print_c
+
+    for layout in layouts:
+        stat_cold = stress.Test(fss.layout_test_name('Stat cold', layout, \
+                layouts),                                                  \
+                'lstats entries of one directory (caches dropped, root only)',\
+                stat_cold_funcs, fss.fss_make_context_list(basepath +      \
+                '/stat_cold', '', MDS_NB_ENTRIES, nb_process, layout),     \
+                step, debug)
+
+        stressmd.add_test(stat_cold)
+
+    # Test 2 : rename within one directory
+    rename_funcs = mds_init, rename_test, mds_final, fss.fss_tests_vary,  \
+                   mds_print_c
+
+    rename = stress.Test('Rename',
+            'Renames entries within one directory',                        \
+            rename_funcs, fss.fss_make_context_list(basepath +             \
+            '/rename', '', MDS_NB_ENTRIES, nb_process), step, debug)
+
+    stressmd.add_test(rename)
+
+    # Test 3 : rename from one directory to an other one
+    rename_across_funcs = mds_across_init, rename_test, mds_final,        \
+                          fss.fss_tests_vary, mds_print_c
+
+    rename_across = stress.Test('Rename across directories',
+            'Renames entries from one directory to an other one',          \
+            rename_across_funcs, fss.fss_make_context_list(basepath +      \
+            '/rename_across', '', MDS_NB_ENTRIES, nb_process), step, debug)
+
+    stressmd.add_test(rename_across)
+
+    # Test 4 : unlink
+    unlink_funcs = mds_init, unlink_test, mds_final, fss.fss_tests_vary,  \
+                   mds_print_c
+
+    unlink = stress.Test('Unlink',
+            'Unlinks entries of one directory',                            \
+            unlink_funcs, fss.fss_make_context_list(basepath +             \
+            '/unlink', '', MDS_NB_ENTRIES, nb_process), step, debug)
+
+    stressmd.add_test(unlink)
+
+    # Test 5 : listing of the whole directory
+    listing_funcs = mds_init, listing_test, mds_final, fss.fss_tests_vary, \
+                    mds_print_c
+
+    listing = stress.Test('Directory listing',
+            'Lists one directory (number of entries vary)',                \
+            listing_funcs, fss.fss_make_context_list(basepath +            \
+            '/listing', '', MDS_NB_ENTRIES, nb_process), step, debug)
+
+    stressmd.add_test(listing)
+
+    for a_test in stressmd.testlist:
+        a_test.latency = True
+
+    if debug == True:
+        print('%s' % str(stressmd))
+
+    return stressmd
+
+# End of Metadata_Tests function
@@ -0,0 +1,508 @@
+#!/usr/bin/env python
+# -*- encoding: utf8 -*-
+#
+#  Module that meters the operations done by the stress tests
+#
+#  (C) Copyright 2009 Olivier Delhomme
+#  e-mail : olivier.delhomme@free.fr
+#
+#  This program is free software; you can redistribute it and/or modify
+#  it under the terms of the GNU General Public License as published by
+#  the Free Software Foundation; either version 2, or (at your option)
+#  any later version.
+#
+#  This program is distributed in the hope that it will be useful,
+#  but WITHOUT ANY WARRANTY; without even the implied warranty of
+#  MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#  GNU General Public License for more details.
+#
+#  You should have received a copy of the GNU General Public License
+#  along with this program; if not, write to the Free Software Foundation,
+#  Inc., 59 Temple Place - Suite 330, Boston, MA 02111-1307, USA.
+#
+
+"""module providing tools to meter the operations done by the tests
+
+Class OpMeter : counts (and times) the operations done by a test in one
+                worker
+
+Test functions loop over their operations with :
+    for i in meter.get_meter().ops(nb_tests):
+        ...
+so that the worker decides how many operations are really done (a fixed
+count or as many as possible before a deadline) and wether each of them
+is timed or not. Parts of an operation may also be timed with record().
+Tests that keep several operations in flight (a queue depth) give each
+operation to run_ops() instead.
+
+resources() and resources_delta() give the resources (getrusage and
+/proc/self/io counters) used by a worker around a test.
+"""
+
+__author__ = "Olivier Delhomme <olivier.delhomme@free.fr>"
+__date__ = "17.10.2026"
+__version__ = "Revision: 0.0.1"
+__credits__ = "Thanks to Python makers"
+
+import sys
+import time
+import resource
+import threading
+
+import results
+
+
+class OpMeter:
+    """Class OpMeter : meters the operations of a test in one worker
+
+    properties :
+        duration : if greater than 0, the test runs in a time-boxed mode :
+                   operations are repeated until duration seconds have
+                   elapsed (the number of operations asked by the test is
+                   then ignored). Otherwise the test does exactly the
+                   number of operations it asks for.
+        latency  : if True each operation is timed and recorded in the
+                   'op' histogram
+        rate     : if greater than 0, the test runs in an open loop :
+                   operations are issued at rate operations per second
+                   whatever the time the previous ones took. Each
+                   operation is then timed from the time it should have
+                   been issued ('op' histogram, so the queueing delay
+                   of an overloaded system is counted) and from the time
+                   it really began ('service' histogram).
+        deadline : end of the time box (time.time() based)
+        count    : number of operations done since start()
+        bytes    : number of bytes transfered since start() (as told by
+                   the test with add_bytes())
+        histograms : dictionnary of the Histograms (by name) recorded
+                     since start()
+        lock     : lock protecting count, bytes and histograms when
+                   several operations are in flight (see run_ops)
+
+    >>> a_meter = OpMeter()
+    >>> a_meter.start()
+    >>> list(a_meter.ops(3))
+    [0, 1, 2]
+    >>> a_meter.count
+    3
+
+    >>> a_meter = OpMeter({'duration': 0.05})
+    >>> a_meter.start()
+    >>> nb_ops = len(list(a_meter.ops(3)))
+    >>> nb_ops > 3 and a_meter.count == nb_ops
+    True
+
+    >>> a_meter = OpMeter({'latency': True})
+    >>> a_meter.start()
+    >>> for i in a_meter.ops(5):
+    ...     time.sleep(0.001)
+    >>> a_meter.histograms['op'].count
+    5
+    >>> a_meter.histograms['op'].min >= 0.001
+    True
+
+    >>> a_meter = OpMeter({'rate': 200})
+    >>> a_meter.start()
+    >>> begin = time.time()
+    >>> for i in a_meter.ops(10):
+    ...     time.sleep(0.02)
+    >>> time.time() - begin >= 0.2
+    True
+    >>> sorted(a_meter.histograms.keys())
+    ['op', 'service']
+    >>> a_meter.histograms['op'].max > a_meter.histograms['service'].max
+    True
+    """
+
+    duration = 0
+    latency = False
+    rate = 0
+    deadline = None
+    count = 0
+    bytes = 0
+    histograms = {}
+    lock = None
+
+    def __init__(self, settings=None):
+        """Creates a meter from the settings (a dictionnary) of the test"""
+
+        if settings == None:
+            settings = {}
+
+        self.duration = settings.get('duration', 0)
+        self.rate = settings.get('rate', 0)
+        # An open loop is useless if its operations are not timed
+        self.latency = settings.get('latency', False) or self.rate > 0
+        self.deadline = None
+        self.count = 0
+        self.bytes = 0
+        self.histograms = {}
+        self.lock = threading.Lock()
+
+
+    def start(self):
+        """Starts metering (called just before the test itself)"""
+
+        self.count = 0
+        self.bytes = 0
+        self.histograms = {}
+
+        if self.duration > 0:
+            self.deadline = time.time() + self.duration
+        else:
+            self.deadline = None
+
+
+    def ops(self, nb_ops):
+        """Returns an iterable over the operations to do
+
+        nb_ops is the number of operations the test wants to do. In
+        time-boxed mode, operations are yielded until the deadline. When
+        latency is True each operation is timed.
+        """
+
+        if self.deadline == None and self.latency == False:
+            if nb_ops > 0:
+                self.count += nb_ops
+            return xrange(nb_ops)
+        else:
+            return self.metered_ops(nb_ops)
+
+
+    def metered_ops(self, nb_ops):
+        """Yields operations numbers until the deadline (if any) or until
+        nb_ops operations are done. The time between two resumes is the
+        time taken by one operation. In an open loop each operation is
+        yielded at its scheduled time (or at once when late)
+        """
+
+        i = 0
+        deadline = self.deadline
+        a_histogram = None
+        service = None
+        interval = 0
+
+        if self.latency == True:
+            a_histogram = self.histogram('op')
+
+        if self.rate > 0:
+            interval = 1.0 / self.rate
+            service = self.histogram('service')
+
+        begin = time.time()
+        scheduled = begin
+
+        while (deadline == None and i < nb_ops) or \
+              (deadline != None and scheduled < deadline):
+
+            if interval > 0:
+                begin = time.time()
+                if begin < scheduled:
+                    time.sleep(scheduled - begin)
+                    begin = time.time()
+
+            yield i
+            end = time.time()
+
+            if interval > 0:
+                # latency as seen by a client that sent it on time
+                a_histogram.record(end - scheduled)
+                service.record(end - begin)
+                scheduled += interval
+            else:
+                if a_histogram != None:
+                    a_histogram.record(end - begin)
+                begin = end
+                scheduled = end
+
+            i += 1
+            self.count += 1
+
+
+    def add_bytes(self, nb_bytes):
+        """Counts nb_bytes more bytes transfered by the test
+
+        >>> a_meter = OpMeter()
+        >>> a_meter.add_bytes(4096)
+        >>> a_meter.add_bytes(4096)
+        >>> a_meter.bytes
+        8192
+        """
+
+        self.lock.acquire()
+        self.bytes += nb_bytes
+        self.lock.release()
+
+
+    def histogram(self, name):
+        """Returns the histogram 'name' (created if needed)"""
+
+        if name not in self.histograms:
+            self.histograms[name] = results.Histogram()
+
+        return self.histograms[name]
+
+
+    def record(self, name, seconds):
+        """Records a time (in s) in the histogram 'name'
+
+        Used by tests to time a part of their operations (a sync for
+        instance). Nothing is recorded if latency is False.
+        """
+
+        if self.latency == True:
+            self.lock.acquire()
+            self.histogram(name).record(seconds)
+            self.lock.release()
+
+
+    def run_ops(self, nb_ops, func, depth=1):
+        """Runs the operations of a test with depth of them in flight
+
+        func(i) does the operation number i and returns False if it
+        failed. With a depth of 1 the operations are done one after the
+        other by the calling thread (see ops). Otherwise depth threads
+        each take the next operation to do as soon as their previous one
+        is done (as fio's iodepth does) : operations that release the
+        GIL (system calls, I/O) are then in flight at the same time.
+        Each operation is timed on its own, from the time it should have
+        been issued in an open loop. No operation is issued after one
+        has failed. Returns the number of the first operation that failed
+        (-1 if none).
+
+        >>> a_meter = OpMeter({'latency': True})
+        >>> a_meter.start()
+        >>> done = []
+        >>> a_meter.run_ops(20, lambda i: done.append(i) or True, 4)
+        -1
+        >>> sorted(done) == range(20), a_meter.count
+        (True, 20)
+        >>> a_meter.histograms['op'].count
+        20
+        >>> a_meter.run_ops(20, lambda i: i < 5, 4) >= 5
+        True
+
+        >>> a_meter = OpMeter({'duration': 0.05})
+        >>> a_meter.start()
+        >>> a_meter.run_ops(3, lambda i: time.sleep(0.001) or True, 4)
+        -1
+        >>> a_meter.count > 3
+        True
+        """
+
+        if depth <= 1:
+            for i in self.ops(nb_ops):
+                if func(i) == False:
+                    return i
+            return -1
+
+        # next operation to issue and first failed one (shared by threads)
+        state = {'next': 0, 'failed': -1, 'begin': time.time()}
+        threads = []
+
+        for j in xrange(depth):
+            a_thread = threading.Thread(target=self.issue_ops, \
+                                        args=(nb_ops, func, state))
+            a_thread.start()
+            threads.append(a_thread)
+
+        for a_thread in threads:
+            a_thread.join()
+
+        return state['failed']
+
+
+    def issue_ops(self, nb_ops, func, state):
+        """Issues operations until there are no more to do (one thread of
+        run_ops)
+        """
+
+        set_meter(self)
+
+        interval = 0
+        if self.rate > 0:
+            interval = 1.0 / self.rate
+
+        while True:
+            self.lock.acquire()
+            i = state['next']
+            state['next'] = i + 1
+            self.lock.release()
+
+            scheduled = state['begin'] + i * interval
+            if state['failed'] != -1:
+                break
+            elif self.deadline == None and i >= nb_ops:
+                break
+            elif self.deadline != None and interval > 0 and \
+                 scheduled >= self.deadline:
+                break
+            elif self.deadline != None and time.time() >= self.deadline:
+                break
+
+            begin = time.time()
+            if interval > 0 and begin < scheduled:
+                time.sleep(scheduled - begin)
+                begin = time.time()
+            elif interval <= 0:
+                scheduled = begin
+
+            result = func(i)
+            end = time.time()
+
+            self.lock.acquire()
+            self.count += 1
+            if self.latency == True:
+                self.histogram('op').record(end - scheduled)
+                if interval > 0:
+                    self.histogram('service').record(end - begin)
+            if result == False and (state['failed'] == -1 or \
+                                    i < state['failed']):
+                state['failed'] = i
+            self.lock.release()
+
+
+    def export(self):
+        """Returns the histograms in a small picklable dictionnary"""
+
+        exported = {}
+        for (name, a_histogram) in self.histograms.iteritems():
+            exported[name] = a_histogram.to_sparse()
+
+        return exported
+
+# End for Class OpMeter
+
+
+# Resource counters recorded around each test (see resources())
+RESOURCE_FIELDS = ('utime', 'stime', 'nvcsw', 'nivcsw', 'minflt', 'majflt',
+                   'inblock', 'oublock', 'maxrss', 'read_bytes',
+                   'write_bytes')
+
+
+# getrusage() scope of one thread (not exported by the resource module of
+# older pythons ; 1 is its value on Linux)
+if sys.platform.startswith('linux'):
+    RUSAGE_THREAD = getattr(resource, 'RUSAGE_THREAD', 1)
+else:
+    RUSAGE_THREAD = getattr(resource, 'RUSAGE_THREAD', resource.RUSAGE_SELF)
+
+
+def read_proc_io(path='/proc/self/io'):
+    """Returns the (read_bytes, write_bytes) counters of path
+
+    Those are the bytes really read from and written to the storage
+    layer (page cache hits are not counted). (0, 0) is returned when the
+    file does not exist or can not be read (not a Linux box, no
+    CONFIG_TASK_IO_ACCOUNTING, ...).
+
+    >>> read_proc_io('/nonexistent/io')
+    (0, 0)
+    """
+
+    counters = {}
+
+    try:
+        io_file = open(path, 'r')
+        try:
+            for line in io_file:
+                (name, sep, value) = line.partition(':')
+                counters[name.strip()] = value.strip()
+        finally:
+            io_file.close()
+    except (OSError, IOError), err:
+        return (0, 0)
+
+    try:
+        return (int(counters.get('read_bytes', 0)), \
+                int(counters.get('write_bytes', 0)))
+    except ValueError, err:
+        return (0, 0)
+
+# End of read_proc_io function
+
+
+def resources(threaded=False):
+    """Returns a snapshot of the resources used by the current process
+
+    When threaded is True the snapshot is the one of the current thread
+    only (when the system knows how to tell them apart). The snapshot is
+    a tuple in RESOURCE_FIELDS order.
+
+    >>> len(resources()) == len(RESOURCE_FIELDS)
+    True
+    >>> len(resources(True)) == len(RESOURCE_FIELDS)
+    True
+    """
+
+    if threaded == True:
+        usage = resource.getrusage(RUSAGE_THREAD)
+        (read_bytes, write_bytes) = read_proc_io('/proc/thread-self/io')
+    else:
+        usage = resource.getrusage(resource.RUSAGE_SELF)
+        (read_bytes, write_bytes) = read_proc_io()
+
+    return (usage.ru_utime, usage.ru_stime, usage.ru_nvcsw, usage.ru_nivcsw,
+            usage.ru_minflt, usage.ru_majflt, usage.ru_inblock,
+            usage.ru_oublock, usage.ru_maxrss, read_bytes, write_bytes)
+
+# End of resources function
+
+
+def resources_delta(before, after):
+    """Returns the resources used between two snapshots
+
+    Every counter is the difference between the two snapshots except
+    maxrss (a peak, in KB) which is the one of the last snapshot.
+
+    >>> before = (1.0, 0.5, 10, 2, 100, 0, 8, 16, 5000, 0, 4096)
+    >>> after = (1.5, 0.75, 12, 2, 150, 1, 8, 32, 5200, 0, 8192)
+    >>> resources_delta(before, after)
+    (0.5, 0.25, 2, 0, 50, 1, 0, 16, 5200, 0, 4096)
+    """
+
+    maxrss = RESOURCE_FIELDS.index('maxrss')
+    delta = []
+
+    for i in xrange(len(RESOURCE_FIELDS)):
+        if i == maxrss:
+            delta.append(after[i])
+        else:
+            delta.append(after[i] - before[i])
+
+    return tuple(delta)
+
+# End of resources_delta function
+
+
+# The meter of the current worker (one for each thread)
+current = threading.local()
+
+
+def get_meter():
+    """Returns the meter of the current worker
+
+    A meter that does exactly what the test asks is returned when no
+    meter was set (when a test function is called outside a worker).
+
+    >>> get_meter().duration
+    0
+    """
+
+    a_meter = getattr(current, 'meter', None)
+
+    if a_meter == None:
+        a_meter = OpMeter()
+        current.meter = a_meter
+
+    return a_meter
+
+# End of get_meter function
+
+
+def set_meter(a_meter):
+    """Sets the meter of the current worker"""
+
+    current.meter = a_meter
+
+# End of set_meter function
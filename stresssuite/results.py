@@ -0,0 +1,837 @@
+#!/usr/bin/env python
+# -*- encoding: utf8 -*-
+#
+#  Module that stores the results of the stress tests
+#
+#  (C) Copyright 2009 Olivier Delhomme
+#  e-mail : olivier.delhomme@free.fr
+#
+#  This program is free software; you can redistribute it and/or modify
+#  it under the terms of the GNU General Public License as published by
+#  the Free Software Foundation; either version 2, or (at your option)
+#  any later version.
+#
+#  This program is distributed in the hope that it will be useful,
+#  but WITHOUT ANY WARRANTY; without even the implied warranty of
+#  MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#  GNU General Public License for more details.
+#
+#  You should have received a copy of the GNU General Public License
+#  along with this program; if not, write to the Free Software Foundation,
+#  Inc., 59 Temple Place - Suite 330, Boston, MA 02111-1307, USA.
+#
+
+"""module providing tools to store the results of the stress tests
+
+Class ResultsStore : a compact, array backed, store for the results
+Class Histogram    : a log bucketed histogram of latencies
+"""
+
+__author__ = "Olivier Delhomme <olivier.delhomme@free.fr>"
+__date__ = "17.10.2026"
+__version__ = "Revision: 0.0.1"
+__credits__ = "Thanks to Python makers"
+
+import math
+from array import array
+
+
+# Histograms have 2**SUB_BITS buckets for each power of two (which gives
+# a relative precision of about 3%) and record values (in nanoseconds) up
+# to 2**MAX_BITS (a bit more than 4 hours)
+SUB_BITS = 5
+SUB_COUNT = 1 << SUB_BITS
+MAX_BITS = 44
+NB_BUCKETS = (MAX_BITS - SUB_BITS) * SUB_COUNT
+
+# Percentiles printed with the stats
+PERCENTILES = (50, 90, 99, 99.9)
+
+# Two sided 95% Student's t values for 1 to 30 degrees of freedom (the
+# normal value is used beyond)
+T_95 = (12.706, 4.303, 3.182, 2.776, 2.571, 2.447, 2.365, 2.306, 2.262, \
+        2.228, 2.201, 2.179, 2.160, 2.145, 2.131, 2.120, 2.110, 2.101,  \
+        2.093, 2.086, 2.080, 2.074, 2.069, 2.064, 2.060, 2.056, 2.052,  \
+        2.048, 2.045, 2.042)
+T_95_NORMAL = 1.960
+
+# Units of the sizes (powers of 1024)
+SIZE_UNITS = (('k', 1 << 10), ('M', 1 << 20), ('G', 1 << 30))
+
+# Ways of walking a grid of parameters :
+#  . full : every combination of the values of the parameters
+#  . axes : the first values of all parameters and then each value of each
+#           parameter alone (the other ones at their first value)
+GRID_DESIGNS = ('full', 'axes')
+
+
+def summarize(values):
+    """Returns (mean, stddev, ci, cv) of a list of samples
+
+    ci is the half width of the 95% confidence interval of the mean and
+    cv the coefficient of variation (stddev / mean). stddev, ci and cv are
+    0 when there is less than two samples.
+
+    >>> mean, stddev, ci, cv = summarize([1.0, 2.0, 3.0])
+    >>> mean, stddev, round(ci, 4), round(cv, 4)
+    (2.0, 1.0, 2.4843, 0.5)
+    >>> summarize([4.0])
+    (4.0, 0.0, 0.0, 0.0)
+    >>> summarize([])
+    (0.0, 0.0, 0.0, 0.0)
+    """
+
+    nb_values = len(values)
+
+    if nb_values == 0:
+        return (0.0, 0.0, 0.0, 0.0)
+
+    mean = sum(values) / float(nb_values)
+
+    if nb_values < 2:
+        return (mean, 0.0, 0.0, 0.0)
+
+    variance = 0.0
+    for value in values:
+        variance += (value - mean) ** 2
+    stddev = math.sqrt(variance / (nb_values - 1))
+
+    if nb_values - 1 <= len(T_95):
+        t_value = T_95[nb_values - 2]
+    else:
+        t_value = T_95_NORMAL
+
+    ci = t_value * stddev / math.sqrt(nb_values)
+
+    if mean != 0:
+        cv = stddev / mean
+    else:
+        cv = 0.0
+
+    return (mean, stddev, ci, cv)
+
+# End of summarize function
+
+
+def format_interval(mean, ci, format='%5.04f'):
+    """Formats a mean and its confidence interval
+
+    >>> format_interval(1.5, 0.25)
+    '1.5000 +/- 0.2500'
+    >>> format_interval(1.5, 0.0)
+    '1.5000'
+    """
+
+    if ci > 0:
+        return (format + ' +/- ' + format) % (mean, ci)
+    else:
+        return format % mean
+
+# End of format_interval function
+
+
+def format_time(seconds):
+    """Formats a time in seconds with the most readable unit
+
+    >>> format_time(0.0000004)
+    '400ns'
+    >>> format_time(0.0000123)
+    '12.3us'
+    >>> format_time(0.00456)
+    '4.56ms'
+    >>> format_time(2)
+    '2.000s'
+    """
+
+    if seconds < 0.000001:
+        return '%dns' % round(seconds * 1e9)
+    elif seconds < 0.001:
+        return '%.1fus' % (seconds * 1e6)
+    elif seconds < 1:
+        return '%.2fms' % (seconds * 1e3)
+    else:
+        return '%.3fs' % seconds
+
+# End of format_time function
+
+
+def parse_time(text):
+    """Returns the time in seconds of a string such as '10ms'
+
+    Known units are ns, us, ms and s (seconds when no unit is given).
+    Raises ValueError if text is not a time.
+
+    >>> parse_time('10ms')
+    0.01
+    >>> parse_time('250us')
+    0.00025
+    >>> parse_time('2')
+    2.0
+    >>> parse_time('fast')
+    Traceback (most recent call last):
+    ...
+    ValueError: invalid time 'fast'
+    """
+
+    value = text.strip()
+    factor = 1.0
+
+    for (unit, unit_factor) in (('ns', 1e-9), ('us', 1e-6), ('ms', 1e-3), \
+                                ('s', 1.0)):
+        if value.endswith(unit):
+            value = value[:-len(unit)]
+            factor = unit_factor
+            break
+
+    try:
+        return float(value) * factor
+    except ValueError:
+        raise ValueError("invalid time '%s'" % text)
+
+# End of parse_time function
+
+
+def parse_size(text):
+    """Returns the number of bytes of a string such as '64k'
+
+    Known units are k, M and G (powers of 1024, bytes when no unit is
+    given). Raises ValueError if text is not a size.
+
+    >>> parse_size('64k')
+    65536
+    >>> parse_size('1M'), parse_size('512')
+    (1048576, 512)
+    >>> parse_size('big')
+    Traceback (most recent call last):
+    ...
+    ValueError: invalid size 'big'
+    """
+
+    value = text.strip()
+    factor = 1
+
+    for (unit, unit_factor) in SIZE_UNITS:
+        if value.endswith(unit):
+            value = value[:-len(unit)]
+            factor = unit_factor
+            break
+
+    try:
+        return int(value) * factor
+    except ValueError:
+        raise ValueError("invalid size '%s'" % text)
+
+# End of parse_size function
+
+
+def parse_axis(text):
+    """Returns the (name, values) of one parameter of a grid
+
+    text is NAME:VALUES where VALUES is a list of sizes (4k,64k,1M) or a
+    geometric range FROM..TO (doubling) or FROM..TO*FACTOR. Raises
+    ValueError if text is not a valid axis.
+
+    >>> parse_axis('buffer_size:512,4k,64k')
+    ('buffer_size', [512, 4096, 65536])
+    >>> parse_axis('file_size:4k..1M*4')
+    ('file_size', [4096, 16384, 65536, 262144, 1048576])
+    >>> parse_axis('nb_files:10..50')
+    ('nb_files', [10, 20, 40, 50])
+    >>> parse_axis('nb_files')
+    Traceback (most recent call last):
+    ...
+    ValueError: invalid axis 'nb_files' (NAME:VALUES expected)
+    """
+
+    (name, sep, values) = text.partition(':')
+    name = name.strip()
+
+    if name == '' or values.strip() == '':
+        raise ValueError("invalid axis '%s' (NAME:VALUES expected)" % text)
+
+    if '..' not in values:
+        return (name, [parse_size(value) for value in values.split(',')])
+
+    (first, sep, last) = values.partition('..')
+    (last, sep, factor) = last.partition('*')
+    value = parse_size(first)
+    last = parse_size(last)
+
+    if factor == '':
+        factor = 2
+    else:
+        try:
+            factor = int(factor)
+        except ValueError:
+            raise ValueError("invalid factor in axis '%s'" % text)
+
+    if value <= 0 or factor < 2 or last < value:
+        raise ValueError("invalid range in axis '%s'" % text)
+
+    axis = []
+    while value < last:
+        axis.append(value)
+        value *= factor
+    axis.append(last)
+
+    return (name, axis)
+
+# End of parse_axis function
+
+
+def grid_points(axes, design='full'):
+    """Returns the points (tuples of values) of a grid
+
+    axes is the list of the values of each parameter and design one of
+    GRID_DESIGNS. Points of the full design are in lexicographic order
+    (the last parameter varies first).
+
+    >>> grid_points([[1, 2], [10, 20, 30]])
+    [(1, 10), (1, 20), (1, 30), (2, 10), (2, 20), (2, 30)]
+    >>> grid_points([[1, 2], [10, 20, 30]], 'axes')
+    [(1, 10), (2, 10), (1, 20), (1, 30)]
+    """
+
+    if design == 'axes':
+        first = tuple([values[0] for values in axes])
+        points = [first]
+        for i in xrange(len(axes)):
+            for value in axes[i][1:]:
+                points.append(first[:i] + (value, ) + first[i + 1:])
+        return points
+
+    points = [()]
+    for values in axes:
+        points = [point + (value, ) for point in points for value in values]
+
+    return points
+
+# End of grid_points function
+
+
+def scaling(levels, throughputs):
+    """Returns the (speedup, efficiency) of each concurrency level
+
+    levels are the numbers of workers and throughputs the throughputs
+    measured at these levels. Both are relative to the first level :
+    speedup is the throughput gained and efficiency the part of the
+    ideal (linear) speedup that was really obtained.
+
+    >>> scaling([1, 2, 4], [100.0, 190.0, 240.0])
+    [(1.0, 1.0), (1.9, 0.95), (2.4, 0.6)]
+    >>> scaling([2, 4], [0.0, 10.0])
+    [(0.0, 0.0), (0.0, 0.0)]
+    """
+
+    scales = []
+
+    for i in xrange(len(levels)):
+        if throughputs[0] > 0 and levels[i] > 0:
+            speedup = throughputs[i] / throughputs[0]
+            efficiency = speedup * levels[0] / levels[i]
+        else:
+            speedup = 0.0
+            efficiency = 0.0
+        scales.append((speedup, efficiency))
+
+    return scales
+
+# End of scaling function
+
+
+class Histogram:
+    """Class Histogram : a log bucketed (HDR like) histogram
+
+    Values are recorded in nanoseconds. Values under 2 * SUB_COUNT have
+    their own bucket and then each power of two is split in SUB_COUNT
+    buckets. Memory used is fixed (NB_BUCKETS counters) whatever the
+    number of recorded values. Histograms of different workers can be
+    merged.
+
+    properties :
+        counts : array of the counters of each bucket
+        count  : number of recorded values
+        total  : sum of the recorded values (in s)
+        min    : smallest recorded value (in s)
+        max    : biggest recorded value (in s)
+
+    >>> a_histogram = Histogram()
+    >>> for i in xrange(1, 101):
+    ...     a_histogram.record(i * 0.001)
+    >>> format_time(a_histogram.percentile(50))
+    '49.81ms'
+    >>> format_time(a_histogram.percentile(99))
+    '99.61ms'
+    >>> format_time(a_histogram.percentile(100))
+    '100.00ms'
+    >>> other = Histogram.from_sparse(a_histogram.to_sparse())
+    >>> a_histogram.merge(other)
+    >>> a_histogram.count, format_time(a_histogram.mean())
+    (200, '50.50ms')
+    """
+
+    counts = None
+    count = 0
+    total = 0.0
+    min = 0.0
+    max = 0.0
+
+    def __init__(self):
+        """Creates an empty histogram"""
+
+        self.counts = array('I', [0]) * NB_BUCKETS
+        self.count = 0
+        self.total = 0.0
+        self.min = 0.0
+        self.max = 0.0
+
+
+    def bucket(self, value):
+        """Returns the bucket index of value (in nanoseconds)
+
+        >>> a_histogram = Histogram()
+        >>> [a_histogram.bucket(v) for v in (0, 63, 64, 65, 66, 127, 128)]
+        [0, 63, 64, 64, 65, 95, 96]
+        """
+
+        if value < 2 * SUB_COUNT:
+            if value < 0:
+                return 0
+            return int(value)
+
+        exponent = math.frexp(value)[1] - (SUB_BITS + 1)
+        index = (exponent + 1) * SUB_COUNT + (int(value) >> exponent) \
+                - SUB_COUNT
+
+        return min(index, NB_BUCKETS - 1)
+
+
+    def bucket_value(self, index):
+        """Returns the middle value (in nanoseconds) of a bucket"""
+
+        if index < 2 * SUB_COUNT:
+            return index
+
+        exponent = index / SUB_COUNT - 1
+        low = ((index % SUB_COUNT) + SUB_COUNT) << exponent
+
+        return low + (1 << exponent) / 2
+
+
+    def record(self, seconds):
+        """Records one value (in seconds)"""
+
+        self.counts[self.bucket(seconds * 1e9)] += 1
+
+        if self.count == 0 or seconds < self.min:
+            self.min = seconds
+        if seconds > self.max:
+            self.max = seconds
+
+        self.count += 1
+        self.total += seconds
+
+
+    def merge(self, other):
+        """Adds the values of an other histogram to this one"""
+
+        if other.count == 0:
+            return None
+
+        counts = self.counts
+        for (index, a_count) in other.sparse_counts():
+            counts[index] += a_count
+
+        if self.count == 0 or other.min < self.min:
+            self.min = other.min
+        if other.max > self.max:
+            self.max = other.max
+
+        self.count += other.count
+        self.total += other.total
+
+
+    def sparse_counts(self):
+        """Returns the list of (index, count) of the non empty buckets"""
+
+        counts = self.counts
+        return [(i, counts[i]) for i in xrange(NB_BUCKETS) if counts[i] != 0]
+
+
+    def to_sparse(self):
+        """Returns a small picklable tuple describing the histogram"""
+
+        return (self.sparse_counts(), self.count, self.total, self.min, \
+                self.max)
+
+
+    def from_sparse(sparse):
+        """Creates an histogram from a tuple returned by to_sparse()"""
+
+        a_histogram = Histogram()
+        (sparse_counts, a_histogram.count, a_histogram.total, \
+         a_histogram.min, a_histogram.max) = sparse
+
+        for (index, a_count) in sparse_counts:
+            a_histogram.counts[index] = a_count
+
+        return a_histogram
+
+    from_sparse = staticmethod(from_sparse)
+
+
+    def mean(self):
+        """Mean of the recorded values (in s)"""
+
+        if self.count > 0:
+            return self.total / self.count
+        else:
+            return 0.0
+
+
+    def percentile(self, percent):
+        """Returns the value (in s) under which percent % of the values are
+
+        The value returned is the middle of the bucket (kept between the
+        smallest and biggest recorded values).
+        """
+
+        if self.count == 0:
+            return 0.0
+
+        if percent >= 100:
+            return self.max
+
+        rank = math.ceil(self.count * percent / 100.0)
+        seen = 0
+        counts = self.counts
+
+        for index in xrange(NB_BUCKETS):
+            seen += counts[index]
+            if seen >= rank and seen > 0:
+                value = self.bucket_value(index) / 1e9
+                return min(max(value, self.min), self.max)
+
+        return self.max
+
+
+    def resume(self):
+        """Returns a string with the percentiles and the max
+
+        >>> a_histogram = Histogram()
+        >>> a_histogram.record(0.001)
+        >>> a_histogram.resume()
+        'p50 = 1.00ms ; p90 = 1.00ms ; p99 = 1.00ms ; p99.9 = 1.00ms ; max = 1.00ms'
+        """
+
+        values = []
+        for percent in PERCENTILES:
+            values.append('p%s = %s' % (percent, \
+                          format_time(self.percentile(percent))))
+
+        values.append('max = %s' % format_time(self.max))
+
+        return ' ; '.join(values)
+
+# End for Class Histogram
+
+
+class ResultsStore:
+    """Class ResultsStore : results of all the runs of one test
+
+    Results are stored in columns (typed arrays) : one row for each
+    worker of each iteration. Contexts are interned : each distinct
+    context is stored only once in a table and rows only keep an index
+    in that table.
+
+    properties :
+        cpu       : array of cpu times (in s)
+        real      : array of real times (in s)
+        worker    : array of the worker numbers
+        iteration : array of the iteration numbers
+        vary      : array of the values of the varied variable
+        contexts  : array of indexes in the context table
+        table     : context table (list of distinct contexts)
+        index     : dictionnary to find a context in the table
+        starts    : array of the first row of each iteration
+        columns   : dictionnary of the extra columns (arrays of doubles)
+                    such as 'ops' (the number of operations done) or
+                    'step' (the vary step an iteration belongs to)
+        histograms: list (one for each iteration) of dictionnaries of
+                    Histograms (by name) merged from all the workers
+
+    >>> store = ResultsStore()
+    >>> store.append(0, 0, 0.1, 0.2, ('/tmp/fss/0', '', 3), 3)
+    >>> store.append(0, 1, 0.3, 0.4, ('/tmp/fss/1', '', 3), 3)
+    >>> store.append(1, 0, 0.5, 0.6, ('/tmp/fss/0', '', 3), 3)
+    >>> len(store), store.nb_iterations(), len(store.table)
+    (3, 2, 2)
+    >>> list(store.iteration_rows(0))
+    [0, 1]
+    >>> store.nb_workers(1)
+    1
+    >>> store.real[2], store.context(2)
+    (0.6, ('/tmp/fss/0', '', 3))
+    >>> store.append(1, 1, 0.5, 0.5, ('/tmp/fss/1', '', 3), 3, ops=10)
+    >>> list(store.column('ops'))
+    [0.0, 0.0, 0.0, 10.0]
+    >>> store.throughput(1)
+    16.666666666666668
+    >>> store.bandwidth(1)
+    0.0
+    >>> a_histogram = Histogram()
+    >>> a_histogram.record(0.5)
+    >>> store.merge_histograms(1, {'op': a_histogram})
+    >>> store.merge_histograms(1, {'op': a_histogram})
+    >>> store.histograms[0], store.histograms[1]['op'].count
+    ({}, 2)
+    >>> store.merged_histograms()['op'].count
+    2
+    """
+
+    cpu = None
+    real = None
+    worker = None
+    iteration = None
+    vary = None
+    contexts = None
+    table = []
+    index = {}
+    starts = None
+    columns = {}
+    histograms = []
+
+    def __init__(self):
+        """Creates an empty store"""
+
+        self.cpu = array('d')
+        self.real = array('d')
+        self.worker = array('i')
+        self.iteration = array('i')
+        self.vary = array('d')
+        self.contexts = array('i')
+        self.table = []
+        self.index = {}
+        self.starts = array('l')
+        self.columns = {}
+        self.histograms = []
+
+
+    def __len__(self):
+        """Number of rows in the store"""
+
+        return len(self.cpu)
+
+
+    def intern(self, context):
+        """Returns the index of context in the context table
+
+        The context is added to the table if it is not already there
+        """
+
+        key = context
+        try:
+            hash(key)
+        except TypeError:
+            # Unhashable context : use its representation
+            key = repr(context)
+
+        if key not in self.index:
+            self.index[key] = len(self.table)
+            self.table.append(context)
+
+        return self.index[key]
+
+
+    def column(self, name):
+        """Returns the extra column 'name'
+
+        The column is created (and filled with 0 for the rows already
+        stored) if it does not exist yet.
+        """
+
+        if name not in self.columns:
+            self.columns[name] = array('d', [0]) * len(self.cpu)
+
+        return self.columns[name]
+
+
+    def append(self, iteration, worker, cpu, real, context, vary, **extra):
+        """Appends one row to the store
+
+        Rows must be appended in the iteration order. vary may be None
+        when the test does not vary anything (0 is then stored). extra
+        values go in the extra columns of the same name.
+        """
+
+        for name in extra:
+            self.column(name)
+
+        for (name, a_column) in self.columns.iteritems():
+            a_column.append(extra.get(name, 0))
+
+        if vary == None:
+            vary = 0
+
+        context_index = self.intern(context)
+
+        if iteration >= len(self.starts):
+            self.starts.append(len(self.cpu))
+
+        self.cpu.append(cpu)
+        self.real.append(real)
+        self.worker.append(worker)
+        self.iteration.append(iteration)
+        self.vary.append(vary)
+        self.contexts.append(context_index)
+
+
+    def nb_iterations(self):
+        """Number of iterations stored"""
+
+        return len(self.starts)
+
+
+    def iteration_rows(self, iteration):
+        """Returns the rows of one iteration (as an xrange)"""
+
+        begin = self.starts[iteration]
+        if iteration + 1 < len(self.starts):
+            end = self.starts[iteration + 1]
+        else:
+            end = len(self.cpu)
+
+        return xrange(begin, end)
+
+
+    def nb_workers(self, iteration=0):
+        """Number of workers (rows) of one iteration"""
+
+        return len(self.iteration_rows(iteration))
+
+
+    def context(self, row):
+        """Returns the context of one row"""
+
+        return self.table[self.contexts[row]]
+
+
+    def merge_histograms(self, iteration, histograms):
+        """Merges the histograms (a dictionnary) of one worker in the
+        histograms of an iteration
+        """
+
+        while len(self.histograms) <= iteration:
+            self.histograms.append({})
+
+        merged = self.histograms[iteration]
+
+        for (name, a_histogram) in histograms.iteritems():
+            if name not in merged:
+                merged[name] = Histogram()
+            merged[name].merge(a_histogram)
+
+
+    def merged_histograms(self, iterations=None):
+        """Returns the histograms of some iterations (all of them by
+        default) merged together
+        """
+
+        merged = {}
+
+        if iterations == None:
+            iterations = xrange(len(self.histograms))
+
+        for i in iterations:
+            if i >= len(self.histograms):
+                continue
+            histograms = self.histograms[i]
+            for (name, a_histogram) in histograms.iteritems():
+                if name not in merged:
+                    merged[name] = Histogram()
+                merged[name].merge(a_histogram)
+
+        return merged
+
+
+    def run_time(self, iteration):
+        """Real time of one iteration (the longest real time of its
+        workers)
+        """
+
+        longest = 0.0
+
+        for row in self.iteration_rows(iteration):
+            longest = max(longest, self.real[row])
+
+        return longest
+
+
+    def steps(self):
+        """Returns the list of the iterations of each vary step
+
+        >>> store = ResultsStore()
+        >>> for i in xrange(4):
+        ...     store.append(i, 0, 0.1, 0.2, ('', '', 3), 3, step=i / 3)
+        >>> store.steps()
+        [[0, 1, 2], [3]]
+        """
+
+        a_column = self.column('step')
+        steps = []
+        last = None
+
+        for iteration in xrange(self.nb_iterations()):
+            step = a_column[self.starts[iteration]]
+            if step != last:
+                steps.append([])
+                last = step
+            steps[-1].append(iteration)
+
+        return steps
+
+
+    def throughput(self, iteration):
+        """Aggregate throughput (in ops/s) of one iteration
+
+        It is the number of operations done by all the workers divided
+        by the longest real time among them. 0 is returned when no
+        operation was counted.
+        """
+
+        ops = self.column('ops')
+        nb_ops = 0
+        longest = 0
+
+        for row in self.iteration_rows(iteration):
+            nb_ops += ops[row]
+            longest = max(longest, self.real[row])
+
+        if longest > 0:
+            return nb_ops / longest
+        else:
+            return 0.0
+
+
+    def bandwidth(self, iteration):
+        """Aggregate bandwidth (in bytes/s) of one iteration
+
+        It is the number of bytes transfered by all the workers divided
+        by the longest real time among them.
+        """
+
+        nb_bytes = 0
+        longest = 0
+
+        if 'bytes' in self.columns:
+            column = self.columns['bytes']
+            for row in self.iteration_rows(iteration):
+                nb_bytes += column[row]
+                longest = max(longest, self.real[row])
+
+        if longest > 0:
+            return nb_bytes / longest
+        else:
+            return 0.0
+
+# End for Class ResultsStore
@@ -25,6 +25,7 @@
 
 Class TestSuite : a collection of tests
 Class Test : one single test
+Class Mix : several tests running at the same time
 """
 
 __author__ = "Olivier Delhomme <olivier.delhomme@free.fr>"
@@ -33,9 +34,33 @@ __version__ = "Revision: 0.0.1"
 __credits__ = "Thanks to Python makers"
 
 import os
-import threading
+import math
 import multiprocessing
-import time
+
+import meter
+import workers
+import results
+
+
+# Bandwidths are printed in MB/s
+MEGA_BYTE = 1024.0 * 1024.0
+
+# Repetitions of a step can not stop before MIN_REPEAT_RUNS runs
+MIN_REPEAT_RUNS = 3
+
+# Calibration can not run the test more than MAX_CALIBRATION_RUNS times and
+# can not grow the workload by more than MAX_CALIBRATION_FACTOR at once
+MAX_CALIBRATION_RUNS = 20
+MAX_CALIBRATION_FACTOR = 16
+
+# The search of the knee under a latency SLO probes at most MAX_KNEE_PROBES
+# levels, starts (for rates) at KNEE_START_RATE ops/s and stops when the
+# passing and failing rates are within KNEE_RESOLUTION of each other. Rate
+# probes last KNEE_PROBE_DURATION seconds unless a duration is set
+MAX_KNEE_PROBES = 24
+KNEE_START_RATE = 100.0
+KNEE_RESOLUTION = 0.05
+KNEE_PROBE_DURATION = 1
 
 
 class TestSuite:
@@ -49,11 +74,13 @@ class TestSuite:
         name         : name of the TestSuite itself
         description  : description of the TestSuite
         testlist     : list of available tests (fill with add_test method)
+        pool         : WorkerPool shared by all the tests of the TestSuite
     """
 
     name = ''
     description = ''
     testlist = []
+    pool = None
 
     def __init__(self, name, desc=''):
         """creates a newly create TestSuite
@@ -64,14 +91,17 @@ class TestSuite:
         self.name = name
         self.description = desc
         self.testlist = []
+        self.pool = workers.WorkerPool()
 
 
     def add_test(self, test):
         """add a test to the TestSuite
 
         test : A valid Test object
-        It will be added to the testlist
+        It will be added to the testlist and will use the pool of workers
+        of the TestSuite
         """
+        test.pool = self.pool
         self.testlist.append(test)
 
 
@@ -137,12 +167,45 @@ class TestSuite:
             print("Testname %s was not found !" % name)
 
 
+    def set_option(self, name, value):
+        """Sets the property 'name' of all tests of the test suite"""
+
+        for a_test in self.testlist:
+            setattr(a_test, name, value)
+
+
+    def set_worker_kind(self, kind):
+        """Sets the kind of workers ('processes' or 'threads') that run
+        all the tests of the test suite
+
+        The workers of the previous kind are stopped.
+
+        >>> suite = TestSuite('Suite')
+        >>> suite.add_test(Test('Test'))
+        >>> suite.set_worker_kind('threads')
+        >>> suite.testlist[0].get_pool() is suite.pool
+        True
+        >>> suite.pool.__class__.__name__
+        'ThreadPool'
+        """
+
+        debug = self.pool.debug
+        self.stop_workers()
+        self.pool = workers.make_pool(kind, debug)
+
+        for a_test in self.testlist:
+            a_test.worker_kind = kind
+            a_test.pool = self.pool
+
+
     def set_debug_mode(self, debug):
         """Sets debug mode to all tests of the test suite"""
 
         print("Setting debug mode for all tests for testsuite '%s'" % \
               self.name)
 
+        self.pool.debug = debug
+
         for a_test in self.testlist:
             print(" - test : %s" % a_test.name)
             a_test.debug = debug
@@ -195,6 +258,16 @@ class TestSuite:
         elif self.debug == True:
             print("Testname %s was not found !" % name)
 
+
+    def stop_workers(self):
+        """Stops the workers of the TestSuite (and of its tests)"""
+
+        self.pool.stop()
+
+        for a_test in self.testlist:
+            if a_test.pool != None and a_test.pool != self.pool:
+                a_test.pool.stop()
+
 # End for Class TestSuite
 
 
@@ -217,6 +290,9 @@ class Test:
                    execution.
     exec_func    : function being executed by the test. takes only one argument
                    as the context. Must return a tuple : (boolean, context)
+                   It should loop over its operations with
+                   meter.get_meter().ops(nb) in order to be metered (and
+                   time-boxed)
     final_func   : function being called at the end of the test
                    execution
     vary_func    : function being used to vary the context between
@@ -233,18 +309,62 @@ class Test:
                                the variable beeing stepped
                     - vary   : the function must return an integer with the value
                                of the variable beeing stepped
-    times        : list of list of execution times tuples
-                   (cpu, real_time, context)
-    process_times: list of execution time tuples for one process
+    times        : ResultsStore of the execution times (cpu, real_time)
+                   of every worker of every run along with their context
     debug        : debug mode : on = True (verbose), off = False
     lock         : Lock() to avoid unwanted side effects with processes
-    ok_to_go     : Event() to say to all processes "ready... heady...
-                   steady.... GOOOoooo !!"
+    pool         : WorkerPool used to run the test (shared with the other
+                   tests of the TestSuite)
+    spawn_time   : time spent (in s) spawning workers for this test. It is
+                   reported separately from the measured times
     step         : an integer to indicate to the vary function a step (it
                    can be used as the conceptor of the vary function
                    wants)
     result       : result for the test : True test succeded and can
                    continue again. False : the test failed and must stop
+    duration     : if greater than 0, each worker repeats the operations of
+                   the test until duration seconds have elapsed (time-boxed
+                   mode) instead of doing a fixed number of operations
+    latency      : if True each operation is timed and latency percentiles
+                   are printed with the stats
+    calibration  : if greater than 0, the workload is grown (with the vary
+                   function) until one run takes calibration seconds
+                   before the tests really begin
+    calibrated   : True when the calibration has been done
+    warmup       : number of runs done (and discarded) before each step
+    repeat       : maximum number of measured runs for each step
+    target_cv    : if greater than 0, the runs of a step stop as soon as the
+                   coefficient of variation of their times falls under it
+    nb_steps     : number of steps already done
+    rusage       : if True the resources used by the workers are printed
+                   with the stats
+    worker_kind  : kind of the workers that run the test : 'processes'
+                   (default) or 'threads'
+    rate         : if greater than 0, each worker issues the operations of
+                   the test at rate operations per second (open loop, see
+                   meter.OpMeter)
+    total_rate   : if greater than 0, the same but rate is shared among
+                   all the workers
+    sweep        : list of concurrency levels (numbers of workers) : when
+                   not empty the test is run once at each level instead of
+                   a varied series (see start_sweep)
+    slo_p99      : if greater than 0, a latency SLO (in s) : the highest
+                   load with a p99 latency under it is searched instead of
+                   running a varied series (see find_knee)
+    knee_knob    : load that grows while searching the knee : 'rate'
+                   (total rate of an open loop) or 'workers'
+    knee_max     : if greater than 0, the maximum load of the search
+    knee_probes  : list of (level, p99, throughput, passed) tuples of the
+                   levels probed by the search
+    knee         : (passing, failing) levels found by the search
+    parameters   : dictionnary of the parameters of the test that a grid
+                   may set : the index of each one in the contexts
+    grid         : list of (name, values) of the parameters of a grid :
+                   when not empty the test is run once at each point of
+                   the grid instead of a varied series (see start_grid)
+    grid_design  : the way the grid is walked (see results.grid_points)
+    grid_points  : list of the points (tuples of values in the order of
+                   grid) of the steps done
     """
 
     # default functions (init, test, final and vary) for the default
@@ -295,137 +415,258 @@ class Test:
         self.print_c_func = print_c_func
         self.context_list = context_list
         self.debug = debug
-        self.times = []
-        self.process_times = []
+        self.times = results.ResultsStore()
         self.lock = multiprocessing.Lock()
-        self.ok_to_go = multiprocessing.Event()
+        self.pool = None
+        self.spawn_time = 0.0
         self.step = step
         self.result = True
         self.nb_process = 0
+        self.duration = 0
+        self.latency = False
+        self.calibration = 0
+        self.calibrated = False
+        self.warmup = 0
+        self.repeat = 1
+        self.target_cv = 0
+        self.nb_steps = 0
+        self.rusage = False
+        self.worker_kind = 'processes'
+        self.rate = 0
+        self.total_rate = 0
+        self.sweep = []
+        self.slo_p99 = 0
+        self.knee_knob = 'rate'
+        self.knee_max = 0
+        self.knee_probes = []
+        self.knee = None
+        self.parameters = {}
+        self.grid = []
+        self.grid_design = 'full'
+        self.grid_points = []
+
+
+    def get_pool(self):
+        """Returns the pool of workers used to run the test
+
+        The pool is usually the one of the TestSuite that owns the test.
+        If the test does not belong to any TestSuite, it gets its own
+        pool of worker_kind workers.
+        """
+
+        if self.pool == None:
+            self.pool = workers.make_pool(self.worker_kind, self.debug)
+
+        return self.pool
 
-    def start_test(self, child_conn, i, vary, context):
-        """Starts the test in a multiprosessed way
 
-        Takes an index (i) that tells which context is used in the
-        context_list and take one boolean argument, which tells wether
-        to run the vary function or not (by default it will not) and the
-        context itself.
-        When the test is processed, init function is called with the
-        context; then the test itself is called (and the time it took is
-        recorded) ; then the final function is called (you may
-        clean things or such here). If a vary test has been launched
-        then the vary function is called at last.
-        context is safe to edit (not self.context_list)
+    def run_settings(self, nb_workers=1):
+        """Returns the settings of the test sent to the workers
+
+        They are used to create the OpMeter of each worker. total_rate
+        (if any) is shared among the nb_workers workers.
+
+        >>> a_test = Test('Test')
+        >>> a_test.total_rate = 100
+        >>> a_test.run_settings(4)['rate']
+        25.0
         """
 
-        if self.debug == True:
-            print("Now running test '%s' ; context : %s" %
-                 (self.name, str(context)))
-            print("start_test(%s, %d, %s, %s)" %
-                 (str(child_conn), i, str(vary), str(context)))
+        rate = self.rate
+        if self.total_rate > 0 and nb_workers > 0:
+            rate = float(self.total_rate) / nb_workers
 
-        context = self.init_func(context)
-        child_conn.send(1) # Sending that initialisation is done.
+        return {'duration': self.duration, 'latency': self.latency, \
+                'rate': rate}
 
-        # Wait for the event "start"
-        self.ok_to_go.wait()
 
-        if self.debug == True:
-            print("Test started")
+    def record_results(self, iteration, run_results):
+        """Records the results of one run in the ResultsStore
 
-        begin_cpu = time.clock()
-        begin_time = time.time()
+        run_results is the list returned by WorkerPool.run(). The
+        context_list is updated with the contexts returned by the workers.
+        """
 
-        result, context = self.exec_func(context)
+        i = 0
+        for a_tuple in run_results:
+            (record, a_context, context, result, histograms) = a_tuple
+            values = dict(zip(workers.RESULT_FIELDS, record))
+            cpu_time = values.pop('cpu')
+            real_time = values.pop('real')
+            del values['status']
+
+            self.times.append(iteration, i, cpu_time, real_time, a_context, \
+                              self.print_c_func('vary', a_context),       \
+                              step=self.nb_steps, **values)
+            self.times.merge_histograms(iteration, histograms)
+            self.context_list[i] = context
+            self.result = self.result and result
+            i += 1
 
-        end_time = time.time()
-        end_cpu = time.clock()
 
-        # This calculation is here to record the exact test context time
-        a_time = end_cpu - begin_cpu, end_time - begin_time, context
+    def run_once(self, vary=False):
+        """Runs the test once without recording anything
 
-        context = self.final_func(context)
+        Each context of the context_list is run by one worker of the pool.
+        Workers are spawned only once and the time spent to spawn them is
+        accounted in spawn_time (not in the measured times). Returns the
+        list returned by WorkerPool.run()
+        """
 
-        if (vary == True and result == True):
-            context = self.vary_func(self.step, context)
+        nb_process = len(self.context_list)
+        pool = self.get_pool()
+        iteration = self.times.nb_iterations()
 
-        # Puting all results in a tuple and send it in the connection
-        a_tuple = a_time, context, result
+        self.spawn_time += pool.grow(nb_process)
 
-        child_conn.send(a_tuple)
-        child_conn.close()
+        functions = self.init_func, self.exec_func, self.final_func, \
+                    self.vary_func
 
-        if self.debug == True:
-            print("Test ended")
-            print("")
+        run_results = pool.run(functions, self.step, vary, \
+                               self.context_list, iteration, \
+                               self.run_settings(nb_process))
+        self.nb_process = len(run_results)
+
+        return run_results
 
 
     def start_once(self, vary=False):
-        """Starts the test only once
+        """Starts one step of the test
 
-        Tests are launched each in process
+        The test is first run warmup times (nothing is recorded) and then
+        up to repeat times (results are recorded). Repetitions stop as
+        soon as the coefficient of variation of the run times falls
+        under target_cv (after at least MIN_REPEAT_RUNS runs). If vary is
+        True the contexts are then varied for the next step.
         """
         if self.result == True:
 
-            nb_process = len(self.context_list)
-            process_list = []
-            self.process_times = []
-            self.nb_process = 0
-
-            for i in xrange(nb_process):
-                if self.debug == True:
-                    print('Spawing a new process...')
-                parent_conn, child_conn = multiprocessing.Pipe()
-                a_process = multiprocessing.Process(target=self.start_test,    \
-                                                    args=(child_conn, i, vary, \
-                                                    self.context_list[i]))
-                a_process.start()
-                a_tuple = a_process, parent_conn
-                process_list.append(a_tuple)
+            for i in xrange(self.warmup):
                 if self.debug == True:
-                    print('%s' % str(a_process))
+                    print('Warmup run %d / %d' % (i + 1, self.warmup))
 
+                for a_tuple in self.run_once(False):
+                    self.result = self.result and a_tuple[3]
 
-            # Sending the event to really start
-            # waiting that the last process finishes its init ...
+            run_times = []
+            i = 0
 
-            for process_context in process_list:
-                (a_process, parent_conn) = process_context
-                self.nb_process += parent_conn.recv()
+            while i < self.repeat and self.result == True:
+                iteration = self.times.nb_iterations()
+                run_results = self.run_once(False)
+                self.record_results(iteration, run_results)
+                run_times.append(self.times.run_time(iteration))
+                i += 1
 
-            if self.debug == True:
-                print('%d =? %d' % (self.nb_process, nb_process))
+                if self.target_cv > 0 and i >= MIN_REPEAT_RUNS:
+                    (mean, stddev, ci, cv) = results.summarize(run_times)
+                    if cv <= self.target_cv:
+                        if self.debug == True:
+                            print('Converged after %d runs (cv = %.2f%%)' % \
+                                  (i, cv * 100))
+                        break
 
-            self.ok_to_go.set()
+            self.nb_steps += 1
 
-            i = 0
-            for process_context in process_list:
-                (a_process, parent_conn) = process_context
+            if vary == True and self.result == True:
+                self.vary_contexts(self.step)
 
-                a_tuple = parent_conn.recv()
-                (a_time, context, result) = a_tuple
 
-                self.process_times.append(a_time)
-                self.context_list[i] = context
-                self.result = self.result and result
-                i += 1
+    def vary_contexts(self, step):
+        """Varies all the contexts of the context_list with the vary
+        function
+        """
+
+        for i in xrange(len(self.context_list)):
+            self.context_list[i] = self.vary_func(step, self.context_list[i])
+
+
+    def calibrate(self):
+        """Grows the workload until one run takes about calibration seconds
+
+        The test is run (nothing is recorded) and, while the longest
+        worker took less than the calibration target, the contexts are
+        varied (with the vary function) by a factor estimated from the
+        time taken. The varied series then starts from the calibrated
+        contexts. Nothing is done in time-boxed mode.
+        """
+
+        if self.calibration <= 0 or self.duration > 0 or \
+           self.context_list == None:
+            return None
 
-                a_process.join()
+        before = self.print_c_func('vary', self.context_list[0])
+        longest = 0
 
-            # Every processes has joined and we have now the times in the
-            # list process_times
-            self.ok_to_go.clear()
-            self.times.append(self.process_times)
-            del self.process_times
+        for i in xrange(MAX_CALIBRATION_RUNS):
+            run_results = self.run_once(False)
+            longest = 0
+            run_ok = True
+            j = 0
+
+            for a_tuple in run_results:
+                (record, a_context, context, result, histograms) = a_tuple
+                values = dict(zip(workers.RESULT_FIELDS, record))
+                longest = max(longest, values['real'])
+                run_ok = run_ok and result
+                self.context_list[j] = context
+                j += 1
+
+            if self.debug == True:
+                print("Calibration run %d : %s took %5.04f s" % (i + 1, \
+                      str(self.print_c_func('vary', self.context_list[0])), \
+                      longest))
+
+            if run_ok == False:
+                print("Calibration of test '%s' stopped : the test failed" \
+                      % self.name)
+                break
+
+            if longest >= self.calibration:
+                break
+
+            if longest > 0:
+                factor = int(math.ceil(self.calibration / longest))
+            else:
+                factor = MAX_CALIBRATION_FACTOR
+
+            factor = min(max(factor, 2), MAX_CALIBRATION_FACTOR)
+            self.vary_contexts(factor)
+
+        print("Calibrated test '%s' : %s -> %s (%5.04f s for a run)" % \
+              (self.name, str(before),                                   \
+               str(self.print_c_func('vary', self.context_list[0])), longest))
 
 
     def start_vary(self, nb_times):
-        """Start a vary test nb_times times"""
+        """Start a vary test nb_times times
+
+        The workload is calibrated first (if asked). When a concurrency
+        sweep (see start_sweep), a latency SLO (see find_knee) or a grid
+        of parameters (see start_grid) is asked it is run instead.
+        """
+
+        if self.slo_p99 > 0:
+            return self.find_knee()
+
+        if self.sweep != []:
+            return self.start_sweep(self.sweep)
+
+        if self.grid != []:
+            return self.start_grid()
+
+        if self.context_list != None:
+            self.get_pool().reserve(len(self.context_list), \
+                                    nb_times * self.repeat)
+
+        if self.calibrated == False:
+            self.calibrate()
+            self.calibrated = True
 
         for i in xrange(nb_times):
 
             if self.debug == True:
-                print('Run number %d / %d :' % (i+1, nb_times))
+                print('Step number %d / %d :' % (i+1, nb_times))
 
             if self.result == True:
                 if i == (nb_times - 1):
@@ -436,40 +677,690 @@ class Test:
                 return None
 
 
+    def start_sweep(self, levels):
+        """Runs one step of the test at each concurrency level of levels
+
+        A level is a number of workers : the first level contexts of the
+        context_list are used (the workload of each worker stays the
+        same, the contexts are not varied). Levels beyond the length of
+        the context_list are skipped. The workload is calibrated (if
+        asked) at the largest level.
+
+        >>> import cpu_stress
+        >>> a_test = cpu_stress.Cpu_Tests(4, 2, False).testlist[1]
+        >>> a_test.start_sweep([1, 2, 4])
+        >>> store = a_test.times
+        >>> [store.nb_workers(iterations[0]) for iterations in store.steps()]
+        [1, 2, 4]
+        >>> a_test.get_pool().stop()
+        """
+
+        if self.context_list == None:
+            return None
+
+        full = self.context_list
+        asked = levels
+        levels = [level for level in asked if 0 < level <= len(full)]
+
+        if len(levels) < len(asked):
+            print("Test '%s' has %d contexts : levels are limited to %s" % \
+                  (self.name, len(full), str(levels)))
+
+        if levels == []:
+            return None
+
+        self.get_pool().reserve(max(levels), len(levels) * self.repeat)
+
+        if self.calibrated == False:
+            self.calibrate()
+            self.calibrated = True
+
+        for level in levels:
+            if self.result != True:
+                break
+
+            if self.debug == True:
+                print('Concurrency level : %d workers' % level)
+
+            self.context_list = full[:level]
+            self.start_once(False)
+            full[:level] = self.context_list
+
+        self.context_list = full
+
+
+    def set_parameters(self, context, point):
+        """Returns context where the parameters of the grid are set to
+        the values of point
+
+        >>> a_test = Test('Test')
+        >>> a_test.parameters = {'file_size': 1, 'nb_files': 2}
+        >>> a_test.grid = [('nb_files', [1, 2]), ('file_size', [512])]
+        >>> a_test.set_parameters(('/tmp', 4096, 10), (2, 512))
+        ('/tmp', 512, 2)
+        """
+
+        context = list(context)
+
+        for i in xrange(len(self.grid)):
+            context[self.parameters[self.grid[i][0]]] = point[i]
+
+        return tuple(context)
+
+
+    def start_grid(self):
+        """Runs one step of the test at each point of the grid
+
+        Each point sets the parameters of the grid in all the contexts of
+        the context_list (the other values of the contexts stay the
+        same). Tests that do not have all the parameters of the grid are
+        not run. The workload is not calibrated : the grid sets it.
+
+        >>> import fss
+        >>> suite = fss.FileSystem_Tests('/tmp/grid', 1, 2, False, 512)
+        >>> a_test = suite.find_test_by_name('Space filed files creation')
+        >>> a_test.grid = [('file_size', [512, 4096]), ('buffer_size', [512])]
+        >>> a_test.start_grid()
+        >>> a_test.grid_points
+        [(512, 512), (4096, 512)]
+        >>> a_test.grid = [('depth', [4])]
+        >>> a_test.start_grid()
+        Test 'Space filed files creation' has no parameter depth : not run
+        >>> suite.stop_workers()
+        >>> import shutil
+        >>> shutil.rmtree('/tmp/grid')
+        """
+
+        if self.context_list == None:
+            return None
+
+        missing = [name for (name, values) in self.grid \
+                   if name not in self.parameters]
+
+        if missing != []:
+            print("Test '%s' has no parameter %s : not run" % (self.name, \
+                  ', '.join(missing)))
+            return None
+
+        points = results.grid_points([values for (name, values) in \
+                                      self.grid], self.grid_design)
+        full = self.context_list
+
+        self.get_pool().reserve(len(full), len(points) * self.repeat)
+
+        for point in points:
+            if self.result != True:
+                break
+
+            if self.debug == True:
+                print('Grid point : %s' % self.format_point(point))
+
+            self.context_list = [self.set_parameters(a_context, point) \
+                                 for a_context in full]
+            nb_steps = self.nb_steps
+            self.start_once(False)
+
+            if self.nb_steps > nb_steps:
+                self.grid_points.append(point)
+
+        self.context_list = full
+
+
+    def format_point(self, point):
+        """Returns a string that resumes a point of the grid
+
+        >>> a_test = Test('Test')
+        >>> a_test.grid = [('nb_files', [1, 2]), ('file_size', [512])]
+        >>> a_test.format_point((2, 512))
+        'nb_files=2 file_size=512'
+        """
+
+        return ' '.join(['%s=%s' % (self.grid[i][0], point[i]) \
+                         for i in xrange(len(point))])
+
+
+    def grid_rows(self):
+        """Returns one (point, runs, real, ops, ops_ci, bw, p50, p99)
+        tuple for each step of the grid
+
+        real is the mean run time of the step, ops its throughput (and
+        the 95% confidence interval of it) and bw its bandwidth (in
+        bytes/s, 0 if the test does not count bytes). p50 and p99 are the
+        latencies of the operations (None if they were not timed).
+        """
+
+        store = self.times
+        steps = store.steps()
+        rows = []
+
+        for i in xrange(min(len(steps), len(self.grid_points))):
+            summary = self.step_summary(steps[i])
+            merged = store.merged_histograms(steps[i])
+            if 'op' in merged:
+                p50 = merged['op'].percentile(50)
+                p99 = merged['op'].percentile(99)
+            else:
+                p50 = None
+                p99 = None
+
+            rows.append((self.grid_points[i], len(steps[i]),             \
+                         summary['run'][0], summary['ops'][0],           \
+                         summary['ops'][2], summary['bw'][0], p50, p99))
+
+        return rows
+
+
+    def best_grid_row(self, rows):
+        """Returns the row (see grid_rows) of the best point of the grid
+
+        The best point has the highest bandwidth when the test counts
+        bytes and the highest throughput otherwise.
+        """
+
+        if max([row[5] for row in rows]) > 0:
+            measure = 5
+        else:
+            measure = 3
+
+        best = rows[0]
+        for row in rows:
+            if row[measure] > best[measure]:
+                best = row
+
+        return best
+
+
+    def probe_knee(self, level, full):
+        """Runs one step of the test at a load level and tells wether the
+        p99 latency of its operations stayed under slo_p99
+
+        level is a total rate (in ops/s) or a number of workers (see
+        knee_knob) ; full is the whole context list. The probe is added
+        to knee_probes.
+        """
+
+        if self.result != True:
+            return False
+
+        if self.knee_knob == 'workers':
+            self.context_list = full[:level]
+        else:
+            self.total_rate = level
+
+        self.start_once(False)
+
+        if self.knee_knob == 'workers':
+            full[:level] = self.context_list
+            self.context_list = full
+
+        iterations = self.times.steps()[-1]
+        merged = self.times.merged_histograms(iterations)
+        throughput = self.step_summary(iterations)['ops'][0]
+
+        if 'op' in merged:
+            p99 = merged['op'].percentile(99)
+            passed = self.result == True and p99 <= self.slo_p99
+        else:
+            p99 = 0.0
+            passed = False
+
+        self.knee_probes.append((level, p99, throughput, passed))
+
+        if self.debug == True:
+            print('Probe at %s : p99 = %s' % (str(level), \
+                  results.format_time(p99)))
+
+        return passed
+
+
+    def find_knee(self):
+        """Finds the highest load the test sustains with a p99 latency
+        under slo_p99
+
+        The load (a total rate in open loop or a number of workers, see
+        knee_knob) grows geometrically (by step) until the SLO is missed
+        and then a binary search runs between the last passing and the
+        first failing levels. Operations are always timed and rate
+        probes are time-boxed (the settings of the test are restored
+        afterwards). knee is set to the (passing, failing) levels (0 when
+        not found).
+
+        >>> import cpu_stress
+        >>> a_test = cpu_stress.Cpu_Tests(4, 2, False).testlist[1]
+        >>> a_test.slo_p99 = 1.0
+        >>> a_test.knee_knob = 'workers'
+        >>> a_test.find_knee()
+        >>> a_test.knee
+        (4, 0)
+        >>> [probe[0] for probe in a_test.knee_probes]
+        [1, 2, 4]
+        >>> a_test.latency, a_test.total_rate, a_test.duration
+        (False, 0, 0)
+        >>> a_test.get_pool().stop()
+        """
+
+        if self.context_list == None:
+            return None
+
+        full = self.context_list
+        saved_rate = self.total_rate
+        saved_duration = self.duration
+        saved_latency = self.latency
+        self.latency = True
+        self.knee_probes = []
+        factor = max(self.step, 2)
+
+        if self.knee_knob == 'workers':
+            level = 1
+            maximum = len(full)
+            if self.knee_max > 0:
+                maximum = min(maximum, int(self.knee_max))
+        else:
+            level = KNEE_START_RATE
+            maximum = self.knee_max
+            if self.duration <= 0:
+                self.duration = KNEE_PROBE_DURATION
+
+        self.get_pool().reserve(len(full), MAX_KNEE_PROBES * self.repeat)
+
+        passing = 0
+        failing = 0
+
+        # Growing the load until the SLO is missed
+        while len(self.knee_probes) < MAX_KNEE_PROBES:
+            if self.probe_knee(level, full) == True:
+                passing = level
+                if maximum > 0 and level >= maximum:
+                    break
+                level = level * factor
+                if maximum > 0:
+                    level = min(level, maximum)
+            else:
+                failing = level
+                break
+
+        # Binary search between the last passing and first failing levels
+        while passing > 0 and failing > 0 and self.result == True and \
+              len(self.knee_probes) < MAX_KNEE_PROBES:
+
+            if self.knee_knob == 'workers':
+                if failing - passing <= 1:
+                    break
+                level = (passing + failing) / 2
+            else:
+                if failing - passing <= passing * KNEE_RESOLUTION:
+                    break
+                level = (passing + failing) / 2.0
+
+            if self.probe_knee(level, full) == True:
+                passing = level
+            else:
+                failing = level
+
+        self.knee = (passing, failing)
+        self.total_rate = saved_rate
+        self.duration = saved_duration
+        self.latency = saved_latency
+
+
+    def format_knee_level(self, level):
+        """Returns a string of a load level of the knee search"""
+
+        if self.knee_knob == 'workers':
+            return '%d workers' % level
+        else:
+            return '%5.01f ops/s' % level
+
+
+    def print_knee_stats(self):
+        """Prints the probes and the knee found under the latency SLO"""
+
+        if self.knee == None:
+            print("%s - No tests has been ran !" % self.name)
+            return None
+
+        print("SLO search for test '%s' (p99 <= %s, %s)" % (self.name, \
+              results.format_time(self.slo_p99), self.knee_knob))
+        print("%s;%s;%s;%s;%s" % ('probe'.center(7), 'level'.center(19), \
+              'ops/s'.center(14), 'p99'.center(11), 'SLO'.center(6)))
+
+        i = 0
+        for (level, p99, throughput, passed) in self.knee_probes:
+            i += 1
+            if passed == True:
+                passed_str = 'ok'
+            else:
+                passed_str = 'missed'
+            print("%s;%s ;%s ;%s ; %s" % (str(i).center(7),          \
+                  self.format_knee_level(level).rjust(18),           \
+                  ('%5.01f' % throughput).rjust(13),                 \
+                  results.format_time(p99).rjust(10), passed_str))
+
+        (passing, failing) = self.knee
+
+        if passing == 0:
+            print("Knee : the SLO is missed from the first level on")
+        elif failing == 0:
+            print("Knee : not reached (SLO met up to %s)" % \
+                  self.format_knee_level(passing))
+        else:
+            print("Knee : %s (the SLO is missed at %s)" % \
+                  (self.format_knee_level(passing), \
+                   self.format_knee_level(failing)))
+
+        self.print_spawn_time()
+        self.print_teardown_time()
+        print("")
+
+
+    def print_sweep_stats(self):
+        """Prints throughput, scaling and latency at each concurrency level
+        of a sweep
+
+        speedup and efficiency are relative to the first level (see
+        results.scaling). Latencies are the ones of the operations ('op'
+        histograms) if they were timed.
+        """
+
+        store = self.times
+        steps = store.steps()
+
+        if len(steps) == 0:
+            print("%s - No tests has been ran !" % self.name)
+            return None
+
+        levels = []
+        throughputs = []
+        for iterations in steps:
+            levels.append(store.nb_workers(iterations[0]))
+            throughputs.append(self.step_summary(iterations)['ops'][0])
+
+        scales = results.scaling(levels, throughputs)
+
+        print("Concurrency sweep for test '%s'" % self.name)
+        print("%s;%s;%s;%s;%s;%s;%s" % ('workers'.center(9),             \
+              'runs'.center(6), 'ops/s'.center(25), 'speedup'.center(9),  \
+              'efficiency'.center(12), 'p50'.center(11), 'p99'.center(11)))
+
+        for i in xrange(len(steps)):
+            summary = self.step_summary(steps[i])
+            ops_str = results.format_interval(summary['ops'][0], \
+                                              summary['ops'][2], '%5.01f')
+            merged = store.merged_histograms(steps[i])
+            if 'op' in merged:
+                p50_str = results.format_time(merged['op'].percentile(50))
+                p99_str = results.format_time(merged['op'].percentile(99))
+            else:
+                p50_str = '-'
+                p99_str = '-'
+
+            (speedup, efficiency) = scales[i]
+            print("%s;%s;%s ;%s ;%s ;%s ;%s" % (str(levels[i]).center(9), \
+                  str(len(steps[i])).center(6), ops_str.rjust(24),         \
+                  ('%4.02f' % speedup).rjust(8),                           \
+                  ('%5.01f%%' % (efficiency * 100)).rjust(11),              \
+                  p50_str.rjust(10), p99_str.rjust(10)))
+
+        self.print_details()
+        self.print_resources(False)
+        self.print_spawn_time()
+        self.print_teardown_time()
+        print("")
+
+
+    def print_grid_stats(self):
+        """Prints one line for each point of a grid of parameters
+
+        The table is tidy : one column for each parameter followed by the
+        number of runs, the mean run time, the throughput, the bandwidth
+        and the latencies of the operations of the point. The best point
+        (see best_grid_row) is printed at the end.
+        """
+
+        rows = self.grid_rows()
+
+        if len(rows) == 0:
+            print("%s - No tests has been ran !" % self.name)
+            return None
+
+        names = [name for (name, values) in self.grid]
+        widths = [max(len(name), 9) for name in names]
+
+        print("Grid of parameters for test '%s' (%s design)" % (self.name, \
+              self.grid_design))
+        header = ';'.join([names[i].center(widths[i] + 2) \
+                           for i in xrange(len(names))])
+        print("%s;%s;%s;%s;%s;%s;%s" % (header, 'runs'.center(6),      \
+              'run time'.center(11), 'ops/s'.center(25),                \
+              'MB/s'.center(11), 'p50'.center(11), 'p99'.center(11)))
+
+        for (point, runs, real, ops, ops_ci, bw, p50, p99) in rows:
+            values = ';'.join([(' %d ' % point[i]).rjust(widths[i] + 2) \
+                               for i in xrange(len(point))])
+            ops_str = results.format_interval(ops, ops_ci, '%5.01f')
+            if p50 != None:
+                p50_str = results.format_time(p50)
+                p99_str = results.format_time(p99)
+            else:
+                p50_str = '-'
+                p99_str = '-'
+
+            print("%s;%s;%s ;%s ;%s ;%s ;%s" % (values,                 \
+                  str(runs).center(6), ('%5.04f' % real).rjust(10),     \
+                  ops_str.rjust(24), ('%5.02f' % (bw / MEGA_BYTE)).rjust(10),\
+                  p50_str.rjust(10), p99_str.rjust(10)))
+
+        (point, runs, real, ops, ops_ci, bw, p50, p99) = \
+            self.best_grid_row(rows)
+        if bw > 0:
+            print("Best : %s (%5.02f MB/s)" % (self.format_point(point), \
+                  bw / MEGA_BYTE))
+        else:
+            print("Best : %s (%5.01f ops/s)" % (self.format_point(point), \
+                  ops))
+
+        self.print_details()
+        self.print_resources(False)
+        self.print_spawn_time()
+        self.print_teardown_time()
+        print("")
+
+
+    def save_grid_in_gnuplot(self, path):
+        """Saves the results of a grid of parameters in gnuplot ready
+        files
+
+        NAME-grid.dat is the tidy table of the grid : one column for each
+        parameter, then runs, run time, ops/s, its 95% confidence
+        interval, MB/s, p50 and p99 latencies (in s, 0 if not timed). A
+        blank line separates the values of the first parameter so that
+        gnuplot sees a full grid of two parameters as a surface.
+        NAME-grid.p plots MB/s (or ops/s if the test does not count bytes)
+        against the parameters : a heatmap for two parameters or more (the
+        two first ones) and a curve for one parameter.
+        """
+
+        rows = self.grid_rows()
+
+        if len(rows) == 0:
+            return None
+
+        names = [name for (name, values) in self.grid]
+        data_name = '%s/%s-grid.dat' % (path, self.name)
+        file_name = '%s/%s-grid.p' % (path, self.name)
+
+        nb_names = len(names)
+        if max([row[5] for row in rows]) > 0:
+            (column, label) = (nb_names + 6, 'MB/s')
+        else:
+            (column, label) = (nb_names + 3, 'ops/s')
+
+        try:
+            data = open(data_name, 'w')
+            data.write('# %s runs time ops/s ci MB/s p50 p99\n' % \
+                       ' '.join(names))
+
+            last = None
+            for (point, runs, real, ops, ops_ci, bw, p50, p99) in rows:
+                if last != None and point[0] != last:
+                    data.write('\n')
+                last = point[0]
+                data.write('%s %d %f %f %f %f %g %g\n' % (              \
+                           ' '.join([str(value) for value in point]),   \
+                           runs, real, ops, ops_ci, bw / MEGA_BYTE,      \
+                           p50 or 0.0, p99 or 0.0))
+
+            data.close()
+
+            gnuplot = open(file_name, 'w')
+            gnuplot.write('set terminal png transparent nocrop enhanced small \
+size 1280,960\n')
+            gnuplot.write('set title "Grid of parameters for test %s"\n' % \
+                          self.name)
+            gnuplot.write('set logscale x 2\n')
+
+            if nb_names > 1:
+                gnuplot.write('set logscale y 2\n')
+                gnuplot.write('set xlabel "%s"\n' % names[1])
+                gnuplot.write('set ylabel "%s"\n' % names[0])
+                gnuplot.write('set cblabel "%s"\n' % label)
+                gnuplot.write('set view map\n')
+                gnuplot.write('splot "%s" using 2:1:%d title "%s" with \
+points pointtype 5 pointsize 4 palette\n' % (data_name, column, label))
+            else:
+                gnuplot.write('set xlabel "%s"\n' % names[0])
+                gnuplot.write('set ylabel "%s"\n' % label)
+                gnuplot.write('plot "%s" using 1:%d title "%s" with \
+linespoints\n' % (data_name, column, label))
+
+            gnuplot.close()
+
+        except (OSError, IOError), err:
+            if self.debug == True:
+                print('Something went wrong while trying to write %s file' % \
+                      file_name)
+            return None
+
+
+    def save_sweep_in_gnuplot(self, path):
+        """Saves the results of a concurrency sweep in a gnuplot ready file
+
+        Columns are : workers, ops/s, its 95% confidence interval,
+        efficiency, p50 and p99 latencies (in s, 0 if not timed).
+        Throughput is plotted against the number of workers (and p99
+        latency on the second axis).
+        """
+
+        store = self.times
+        steps = store.steps()
+
+        if len(steps) == 0:
+            return None
+
+        file_name = '%s/%s-sweep.p' % (path, self.name)
+
+        levels = []
+        throughputs = []
+        for iterations in steps:
+            levels.append(store.nb_workers(iterations[0]))
+            throughputs.append(self.step_summary(iterations)['ops'][0])
+
+        scales = results.scaling(levels, throughputs)
+
+        try:
+            gnuplot = open(file_name, 'w')
+            gnuplot.write('set terminal png transparent nocrop enhanced small \
+size 1280,960\n')
+            gnuplot.write('set title "Concurrency sweep for test %s"\n' % \
+                          self.name)
+            gnuplot.write('set xlabel "workers"\n')
+            gnuplot.write('set ylabel "ops/s"\n')
+            gnuplot.write('set y2label "p99 latency (in s)"\n')
+            gnuplot.write('set y2tics\n')
+            gnuplot.write('plot \'-\' using 1:2:3 title "ops/s" with \
+yerrorlines, \'-\' using 1:6 axes x1y2 title "p99" with linespoints\n')
+
+            lines = []
+            for i in xrange(len(steps)):
+                summary = self.step_summary(steps[i])
+                merged = store.merged_histograms(steps[i])
+                if 'op' in merged:
+                    p50 = merged['op'].percentile(50)
+                    p99 = merged['op'].percentile(99)
+                else:
+                    p50 = 0.0
+                    p99 = 0.0
+                lines.append('%d %f %f %f %g %g\n' % (levels[i],          \
+                             summary['ops'][0], summary['ops'][2],        \
+                             scales[i][1], p50, p99))
+
+            # one data block for each curve
+            for curve in xrange(2):
+                gnuplot.writelines(lines)
+                gnuplot.write('e\n')
+
+            gnuplot.close()
+
+        except (OSError, IOError), err:
+            if self.debug == True:
+                print('Something went wrong while trying to write %s file' %
+                       file_name)
+
+        return None
+
+
     def print_normal_stats(self):
         """Prints normal statistics for the running session"""
 
-        nb_tests = len(self.times)
+        store = self.times
+        nb_tests = store.nb_iterations()
         if nb_tests > 0:
             avg_cpu = 0
             avg_real = 0
+            avg_throughput = 0
             print("Results for test '%s'" % self.name)
-            print("%s;%s;%s;%s" % ('Tests'.center(8),  \
+            print("%s;%s;%s;%s;%s" % ('Tests'.center(8),  \
                   'CPU'.center(15), 'real time'.center(15), \
-                  'context'.center(38)))
-            nb_process = len(self.times[0])
-
-            i = 0
-            for times in self.times:
-                i += 1
-                j = 0
-                for result in times:
-                    j += 1
-                    cpu_time, real_time, context = result
+                  'ops/s'.center(15), 'context'.center(38)))
+            nb_process = store.nb_workers()
+            ops = store.column('ops')
+
+            for i in xrange(nb_tests):
+                for row in store.iteration_rows(i):
+                    cpu_time = store.cpu[row]
+                    real_time = store.real[row]
                     avg_cpu += cpu_time
                     avg_real += real_time
                     cpu_str = '%5.02f' % cpu_time
                     real_str = '%5.04f' % real_time
-                    context_resumed = self.print_c_func('print', context)
-                    print("%3d.%3d ; %s ; %s ; %s" %(i, j, \
-                          cpu_str.rjust(13),          \
-                          real_str.rjust(13),        \
+                    if real_time > 0:
+                        ops_str = '%5.01f' % (ops[row] / real_time)
+                    else:
+                        ops_str = '-'
+                    context_resumed = self.print_c_func('print', \
+                                                        store.context(row))
+                    print("%3d.%3d ; %s ; %s ; %s ; %s" %(i + 1,    \
+                          store.worker[row] + 1,                    \
+                          cpu_str.rjust(13),                        \
+                          real_str.rjust(13),                       \
+                          ops_str.rjust(13),                        \
                           str(context_resumed).rjust(37)))
+                avg_throughput += store.throughput(i)
 
-            avg_cpu_str = '%5.04f' % (avg_cpu/(nb_tests * nb_process))
-            avg_real_str = '%5.04f' % (avg_real/(nb_tests * nb_process))
+            avg_cpu_str = '%5.04f' % (avg_cpu/len(store))
+            avg_real_str = '%5.04f' % (avg_real/len(store))
             print("Averages : %s ; %s (over %d tests of %d processes)" %        \
                   (avg_cpu_str, avg_real_str, nb_tests, nb_process))
+            print("Throughput : %5.01f ops/s (all processes, averaged over \
+the tests)" % (avg_throughput / nb_tests))
+            self.print_target_rate(nb_process)
+            self.print_bandwidth(True)
+            self.print_steps()
+            self.print_latencies()
+            self.print_details()
+            self.print_resources(True)
+            self.print_spawn_time()
+            self.print_teardown_time()
             print("")
         else:
             print("%s - No tests has been ran !" % self.name)
@@ -478,46 +1369,363 @@ class Test:
     def print_cumulative_stats(self):
         """Prints cumulative statistics for the running session"""
 
-        nb_tests = len(self.times)
+        store = self.times
+        nb_tests = store.nb_iterations()
         if nb_tests > 0:
             print("Results for test '%s'" % self.name)
-            print("%s;%s;%s;%s;%s" % ('Tests'.center(8),          \
-                  'CPU'.center(13), 'real time'.center(13), \
-                  'processes'.center(11), 'context'.center(31)))
-            nb_process = len(self.times[0])
+            print("%s;%s;%s;%s;%s;%s;%s" % ('Tests'.center(8),          \
+                  'CPU'.center(13), 'real time'.center(23), \
+                  'ops/s'.center(23), 'processes'.center(11),  \
+                  'runs'.center(6), 'context'.center(31)))
 
             i = 0
-            for times in self.times:
+            for iterations in store.steps():
                 i += 1
-                cpu_total = 0
-                real_total = 0
-
-                for result in times:
-                    cpu_time, real_time, context = result
-                    cpu_total += cpu_time
-                    real_total += real_time
-
-                cpu_str = '%5.04f' % (cpu_total)
-                real_str = '%5.04f' % (real_total)
-                context_resumed = str(self.print_c_func('vary', context))
-                print("%s;%s ;%s ;%s;%s" % (str(i).center(8),                 \
-                      cpu_str.rjust(12), real_str.rjust(12),                  \
-                      str(nb_process).center(11), context_resumed.rjust(31)))
-
+                summary = self.step_summary(iterations)
+                nb_process = store.nb_workers(iterations[0])
+                row = store.iteration_rows(iterations[-1])[-1]
+
+                cpu_str = '%5.04f' % summary['cpu'][0]
+                real_str = results.format_interval(summary['real'][0], \
+                                                   summary['real'][2])
+                ops_str = results.format_interval(summary['ops'][0],   \
+                                                  summary['ops'][2], '%5.01f')
+                context_resumed = '%d' % store.vary[row]
+                print("%s;%s ;%s ;%s ;%s;%s;%s" % (str(i).center(8),          \
+                      cpu_str.rjust(12), real_str.rjust(22),                  \
+                      ops_str.rjust(22), str(nb_process).center(11),          \
+                      str(len(iterations)).center(6),                         \
+                      context_resumed.rjust(31)))
+
+            self.print_bandwidth(False)
+            self.print_details()
+            self.print_resources(False)
+            self.print_spawn_time()
+            self.print_teardown_time()
             print("")
         else: # here nb_tests <= 0
             print("%s - No tests has been ran !" % self.name)
 
 
+    def step_summary(self, iterations):
+        """Summarizes the runs (iterations) of one step
+
+        Returns a dictionnary of (mean, stddev, ci, cv) tuples (see
+        results.summarize) for :
+         . 'cpu'  : the cpu time of all processes of a run,
+         . 'real' : the real time of all processes of a run,
+         . 'run'  : the real time of a run (its longest process),
+         . 'ops'  : the throughput of a run (all processes),
+         . 'bw'   : the bandwidth (in bytes/s) of a run (all processes).
+        """
+
+        store = self.times
+        samples = {'cpu': [], 'real': [], 'run': [], 'ops': [], 'bw': []}
+
+        for i in iterations:
+            cpu_total = 0
+            real_total = 0
+
+            for row in store.iteration_rows(i):
+                cpu_total += store.cpu[row]
+                real_total += store.real[row]
+
+            samples['cpu'].append(cpu_total)
+            samples['real'].append(real_total)
+            samples['run'].append(store.run_time(i))
+            samples['ops'].append(store.throughput(i))
+            samples['bw'].append(store.bandwidth(i))
+
+        summary = {}
+        for (name, values) in samples.iteritems():
+            summary[name] = results.summarize(values)
+
+        return summary
+
+
+    def print_steps(self):
+        """Prints mean and 95% confidence interval of each step that was
+        run more than once
+        """
+
+        store = self.times
+        steps = store.steps()
+
+        if max([len(iterations) for iterations in steps]) < 2:
+            return None
+
+        print("Steps (mean +/- 95% confidence interval over the runs) :")
+        print("%s;%s;%s;%s;%s;%s" % ('Step'.center(6), 'runs'.center(6), \
+              'run time'.center(23), 'cv'.center(8), 'ops/s'.center(23), \
+              'context'.center(38)))
+
+        i = 0
+        for iterations in steps:
+            i += 1
+            summary = self.step_summary(iterations)
+            (mean, stddev, ci, cv) = summary['run']
+            run_str = results.format_interval(mean, ci)
+            cv_str = '%.2f%%' % (cv * 100)
+            ops_str = results.format_interval(summary['ops'][0], \
+                                              summary['ops'][2], '%5.01f')
+            context = store.context(store.starts[iterations[0]])
+
+            print("%s;%s;%s ;%s ;%s ; %s" % (str(i).center(6),          \
+                  str(len(iterations)).center(6), run_str.rjust(22),   \
+                  cv_str.rjust(7), ops_str.rjust(22),                  \
+                  self.print_c_func('print', context)))
+
+
+    def print_latencies(self):
+        """Prints the percentiles of the latencies recorded (if any)
+
+        One line for each test and each histogram name and then the same
+        for all tests merged together.
+        """
+
+        store = self.times
+        merged = store.merged_histograms()
+
+        if len(merged) == 0:
+            return None
+
+        print("Latencies :")
+
+        for i in xrange(len(store.histograms)):
+            histograms = store.histograms[i]
+            for name in sorted(histograms.keys()):
+                print("%3d     ; %s ; %s" % (i + 1, name.rjust(8), \
+                      histograms[name].resume()))
+
+        for name in sorted(merged.keys()):
+            print("All     ; %s ; %s" % (name.rjust(8), merged[name].resume()))
+
+
+    def print_bandwidth(self, per_worker):
+        """Prints the bandwidth (in MB/s) of the tests that count the
+        bytes they transfer
+
+        Prints one line for each process of each test and one line for
+        each test (all processes) when per_worker is True and one line
+        for each step (mean and 95% confidence interval over its runs)
+        otherwise.
+        """
+
+        store = self.times
+
+        if 'bytes' not in store.columns or \
+           max(store.columns['bytes'] or [0]) <= 0:
+            return None
+
+        nb_bytes = store.column('bytes')
+        print("Bandwidth :")
+
+        if per_worker == True:
+            for i in xrange(store.nb_iterations()):
+                for row in store.iteration_rows(i):
+                    if store.real[row] > 0:
+                        mbs = nb_bytes[row] / store.real[row] / MEGA_BYTE
+                        print("%3d.%3d ; %s MB/s" % (i + 1,             \
+                              store.worker[row] + 1,                    \
+                              ('%5.02f' % mbs).rjust(10)))
+                print("%3d     ; %s MB/s (all processes)" % (i + 1,     \
+                      ('%5.02f' % (store.bandwidth(i) / MEGA_BYTE)).rjust(10)))
+        else:
+            i = 0
+            for iterations in store.steps():
+                i += 1
+                (mean, stddev, ci, cv) = self.step_summary(iterations)['bw']
+                print("%s ; %s MB/s (all processes)" % (str(i).center(7), \
+                      results.format_interval(mean / MEGA_BYTE,             \
+                                              ci / MEGA_BYTE, '%5.02f')))
+
+
+    def print_resources(self, per_worker):
+        """Prints the resources used by the tests (if asked to)
+
+        Prints one line for each process of each test when per_worker is
+        True and one line for each test (all processes added) otherwise.
+        maxrss is the peak resident set size (in KB) of the processes
+        (the largest one when added). read and write are the bytes (in
+        KB) really read from and written to the storage layer : reads
+        served by the page cache are not counted.
+        """
+
+        if self.rusage != True:
+            return None
+
+        store = self.times
+        columns = {}
+        for name in meter.RESOURCE_FIELDS:
+            columns[name] = store.column(name)
+
+        print("Resources used :")
+        print("%s;%s;%s;%s;%s;%s;%s;%s;%s;%s;%s;%s" % ('Tests'.center(8), \
+              'user'.center(9), 'sys'.center(9), 'vcsw'.center(8),       \
+              'ivcsw'.center(8), 'minflt'.center(9), 'majflt'.center(8),  \
+              'inblk'.center(9), 'oublk'.center(9), 'maxrss KB'.center(11),\
+              'read KB'.center(11), 'write KB'.center(11)))
+
+        for i in xrange(store.nb_iterations()):
+            rows = store.iteration_rows(i)
+            if per_worker == True:
+                lines = [('%3d.%3d' % (i + 1, store.worker[row] + 1), [row]) \
+                         for row in rows]
+            else:
+                lines = [(str(i + 1).center(7), rows)]
+
+            for (label, line_rows) in lines:
+                used = {}
+                for name in meter.RESOURCE_FIELDS:
+                    values = [columns[name][row] for row in line_rows]
+                    if name == 'maxrss':
+                        used[name] = max(values)
+                    else:
+                        used[name] = sum(values)
+
+                print("%s ; %s ; %s ; %s ; %s ; %s ; %s ; %s ; %s ; %s ; %s \
+; %s" % (label, ('%5.03f' % used['utime']).rjust(7),                 \
+                         ('%5.03f' % used['stime']).rjust(7),        \
+                         ('%d' % used['nvcsw']).rjust(6),            \
+                         ('%d' % used['nivcsw']).rjust(6),           \
+                         ('%d' % used['minflt']).rjust(7),           \
+                         ('%d' % used['majflt']).rjust(6),           \
+                         ('%d' % used['inblock']).rjust(7),          \
+                         ('%d' % used['oublock']).rjust(7),          \
+                         ('%d' % used['maxrss']).rjust(9),           \
+                         ('%d' % (used['read_bytes'] / 1024)).rjust(9),\
+                         ('%d' % (used['write_bytes'] / 1024)).rjust(9)))
+
+
+    def save_latencies_in_gnuplot(self, path):
+        """Saves the latency histograms of all the runs (if any) in a
+        gnuplot ready file
+        """
+
+        merged = self.times.merged_histograms()
+
+        if len(merged) == 0:
+            return None
+
+        file_name = '%s/%s-latency.p' % (path, self.name)
+
+        try:
+            gnuplot = open(file_name, 'w')
+            gnuplot.write('set terminal png transparent nocrop enhanced small \
+size 1280,960\n')
+            gnuplot.write('set title "Latencies for test %s"\n' % self.name)
+            gnuplot.write('set xlabel "latency (in s)"\n')
+            gnuplot.write('set ylabel "number of operations"\n')
+            gnuplot.write('set logscale x\n')
+
+            names = sorted(merged.keys())
+            plot_str = []
+            for name in names:
+                plot_str.append('\'-\' title "%s" with steps' % name)
+            gnuplot.write('plot ' + ', '.join(plot_str) + '\n')
+
+            for name in names:
+                a_histogram = merged[name]
+                for (index, a_count) in a_histogram.sparse_counts():
+                    gnuplot.write('%g %d\n' %                              \
+                                  (a_histogram.bucket_value(index) / 1e9,   \
+                                   a_count))
+                gnuplot.write('e\n')
+
+            gnuplot.close()
+
+        except (OSError, IOError), err:
+            if self.debug == True:
+                print('Something went wrong while trying to write %s file' %
+                       file_name)
+
+        return None
+
+
+    def print_target_rate(self, nb_process):
+        """Prints the rate asked in open loop mode (if any) to be compared
+        with the throughput really achieved
+        """
+
+        if self.total_rate > 0:
+            target = self.total_rate
+        elif self.rate > 0:
+            target = self.rate * nb_process
+        else:
+            return None
+
+        print("Target rate : %5.01f ops/s (open loop, all processes)" % target)
+
+
+    def print_details(self):
+        """Prints the details that the test gives on each of its runs
+
+        print_c_func('details', context) returns a list of lines (or
+        None) from the context returned by one process of the test (the
+        files created in each size class for instance). They are printed
+        for each process of each test, whatever the way the stats are
+        printed (normal, cumulative, sweep or grid).
+        """
+
+        store = self.times
+        printed = False
+
+        for i in xrange(store.nb_iterations()):
+            for row in store.iteration_rows(i):
+                lines = self.print_c_func('details', store.context(row))
+                if not isinstance(lines, list):
+                    continue
+
+                if printed == False:
+                    print("Details :")
+                    printed = True
+
+                for line in lines:
+                    print("%3d.%3d ; %s" % (i + 1, store.worker[row] + 1, \
+                          line))
+
+
+    def print_spawn_time(self):
+        """Prints the time spent spawning workers for this test"""
+
+        print("Spawn overhead : %5.04f s (not included in measured times)" % \
+              self.spawn_time)
+
+
+    def print_teardown_time(self):
+        """Prints the time spent in the final functions of the test
+
+        Workers run their final function (which removes what the test
+        created) after the measured part of each run. The teardown of one
+        run is the one of its slowest worker.
+        """
+
+        store = self.times
+        column = store.column('teardown')
+        total = 0.0
+        for i in xrange(store.nb_iterations()):
+            rows = store.iteration_rows(i)
+            if len(rows) > 0:
+                total = total + max([column[row] for row in rows])
+
+        print("Teardown : %5.04f s (not included in measured times)" % total)
+
+
     def print_stats(self, stats):
         """Prints statistics on the running sessions of the test
 
         Each running session is timed (cpu and real time). These times
-        are saved along with the context used for the test (in a list
-        of list). This method prints all thoses values.
+        are saved along with the context used for the test (in a
+        ResultsStore). This method prints all thoses values.
         """
 
-        if stats == 1:
+        if self.slo_p99 > 0:
+            self.print_knee_stats()
+        elif self.sweep != []:
+            self.print_sweep_stats()
+        elif self.grid != []:
+            self.print_grid_stats()
+        elif stats == 1:
             self.print_normal_stats()
         else:
             self.print_cumulative_stats()
@@ -543,41 +1751,31 @@ normal way."""
             gnuplot.write('set terminal png transparent nocrop enhanced small \
 size 1280,960\n')
 
-            nb_tests = len(self.times)
+            store = self.times
+            nb_tests = store.nb_iterations()
             if nb_tests > 0:
-                nb_process = len(self.times[0])
-                cpu_time, real_time, context = self.times[0][0]
-                inverse = []
+                nb_process = store.nb_workers()
 
                 gnuplot.write('set title "Results for test %s (%d processes)"\n' \
                                % (self.name, nb_process))
                 gnuplot.write('set ylabel "time (in s)"\n')
                 gnuplot.write('set xlabel "%s"\n' % \
-                              self.print_c_func('config', context))
+                              self.print_c_func('config', store.context(0)))
                 process_str = 'plot \'-\' title "Process 0" with lines'
 
                 for i in xrange(nb_process-1):
                     process_str += ', \'-\' title "Process ' + str(i+1) + \
                                   '" with lines'
-                    inverse.append([])
 
                 gnuplot.write(process_str + '\n')
-                inverse.append([])
-
-                for i in xrange(nb_tests):
-                    nb_process = len(self.times[i])
-                    self.process_times = self.times[i]
-                    for j in xrange(nb_process):
-                        cpu_time, real_time, context = self.process_times[j]
-                        inverse[j].append(self.process_times[j])
 
                 for j in xrange(nb_process):
-                    a_process = inverse[j]
                     for i in xrange(nb_tests):
-                        cpu_time, real_time, context = a_process[i]
-                        gnuplot.write('%d %f\n' %                         \
-                                     (self.print_c_func('vary', context), \
-                                     real_time))
+                        rows = store.iteration_rows(i)
+                        if j < len(rows):
+                            row = rows[j]
+                            gnuplot.write('%d %f\n' %                      \
+                                          (store.vary[row], store.real[row]))
                     gnuplot.write('e\n')
 
                 gnuplot.close()
@@ -611,23 +1809,19 @@ normal way."""
         try:
             gnuplot = open(file_name, 'a+')
 
-            nb_tests = len(self.times)
+            store = self.times
+            nb_tests = store.nb_iterations()
             if nb_tests > 0:
-                nb_process = len(self.times[0])
-                cpu_time, real_time, context = self.times[0][0]
-                inverse = []
-
-                for times in self.times:
-                    cpu_total = 0
-                    real_total = 0
-                    for result in times:
-                        cpu_time, real_time, context = result
-                        cpu_total += cpu_time
-                        real_total += real_time
-
-                    gnuplot.write('%d %f %f\n' %                          \
-                                     (self.print_c_func('vary', context), \
-                                     cpu_total, real_total))
+
+                # vary cpu real ops/s real_ci (means over the runs of a step)
+                for iterations in store.steps():
+                    summary = self.step_summary(iterations)
+                    row = store.starts[iterations[0]]
+
+                    gnuplot.write('%d %f %f %f %f\n' %                 \
+                                  (store.vary[row], summary['cpu'][0],  \
+                                   summary['real'][0], summary['ops'][0], \
+                                   summary['real'][2]))
 
                 gnuplot.write('e\n')
                 gnuplot.close()
@@ -650,16 +1844,23 @@ normal way."""
         """Saves statistics on the running session in a gnuplot ready file
 
         Each running session is timed (cpu and real time). These times
-        are saved along with the context used for the test (in a list
-        of list). This method saves all thoses values into a gnuplot ready
+        are saved along with the context used for the test (in a
+        ResultsStore). This method saves all thoses values into a gnuplot ready
         file
         """
 
-        if stats == 1:
+        if self.sweep != [] and os.path.exists(path):
+            self.save_sweep_in_gnuplot(path)
+        elif self.grid != [] and os.path.exists(path):
+            self.save_grid_in_gnuplot(path)
+        elif stats == 1:
             self.save_in_gnuplot_normal(path)
         else:
             self.save_in_gnuplot_cumulative(path)
 
+        if os.path.exists(path):
+            self.save_latencies_in_gnuplot(path)
+
 
 
     name = ''                      # name for the test
@@ -675,18 +1876,263 @@ normal way."""
     print_c_func = default_print_c # function that must resume the
                                    # context into a maximum of 37
                                    # printable characters
-    times = []                     # execution times tuples
-                                   # (cpu, real_time, context)
+    times = None                   # ResultsStore of the execution
+                                   # times (cpu, real_time, context)
     debug = False                  # debug mode on = True ; off = False
-    process_times = []             # list of execution times for one
-                                   # process
     lock = None                    # lock to manage a critical section
                                    # in the process
-    ok_to_go = None                # A specific signal send to the
-                                   # processes in order that they all
-                                   # begin at the same time (more or
-                                   # less)
+    pool = None                    # pool of workers running the test
+    spawn_time = 0.0               # time spent spawning workers
     step = 2                       # A step for the vary function
+    duration = 0                   # Time box (in s) of each run (0 means
+                                   # a fixed number of operations)
+    latency = False                # Times each operation or not
+    calibration = 0                # Target time (in s) of one run when
+                                   # calibrating the workload
+    calibrated = False             # Calibration done or not
+    warmup = 0                     # Discarded runs before each step
+    repeat = 1                     # Maximum measured runs of each step
+    target_cv = 0                  # Convergence threshold of the runs
+    nb_steps = 0                   # Number of steps done
+    rusage = False                 # Prints the resources used or not
+    worker_kind = 'processes'      # Kind of the workers running the test
+                                   # ('processes' or 'threads')
+    rate = 0                       # Open loop rate (ops/s) of each worker
+    total_rate = 0                 # Open loop rate (ops/s) of all workers
+    sweep = []                     # Concurrency levels of a sweep
+    slo_p99 = 0                    # Latency SLO (in s) of a knee search
+    knee_knob = 'rate'             # Load grown by the knee search
+    knee_max = 0                   # Maximum load of the knee search
+    knee_probes = []               # Levels probed by the knee search
+    knee = None                    # (passing, failing) levels found
+    parameters = {}                # Index in the contexts of each parameter
+    grid = []                      # (name, values) of a parameters grid
+    grid_design = 'full'           # Way the grid is walked
+    grid_points = []               # Points of the grid already done
 
 # End for Class Test
 
+
+
+class Mix:
+    """Class Mix : several tests running at the same time
+
+    Each test of the mix runs on weight workers and all the workers of
+    all the tests start together (one single barrier) : this measures
+    the interference between the tests (cpu and filesystem load on the
+    same node for instance). Each test records its own results in its
+    own ResultsStore and its stats are printed separately.
+
+    properties :
+        name       : name of the mix
+        tests      : list of (test, weight) tuples
+        pool       : WorkerPool running all the workers of the mix
+        spawn_time : time spent (in s) spawning the workers of the mix
+        nb_runs    : number of runs done (recorded or not)
+
+    >>> import cpu_stress
+    >>> suite = cpu_stress.Cpu_Tests(2, 2, False)
+    >>> a_mix = Mix('cpu mix')
+    >>> a_mix.add_test(suite.find_test_by_name('Cpu hash tests'), 2)
+    >>> a_mix.add_test(suite.find_test_by_name('Cpu encode stress'), 1)
+    >>> a_mix.resume()
+    'Cpu hash tests x 2, Cpu encode stress x 1'
+    >>> a_mix.start_vary(2)
+    >>> hash_test = a_mix.tests[0][0]
+    >>> hash_test.times.nb_iterations(), hash_test.times.nb_workers()
+    (2, 2)
+    >>> a_mix.tests[1][0].times.nb_workers()
+    1
+    >>> a_mix.add_test(hash_test, 3)
+    Traceback (most recent call last):
+    ...
+    ValueError: test 'Cpu hash tests' has only 2 contexts (3 wanted)
+    >>> a_mix.stop_workers()
+    """
+
+    name = ''
+    tests = []
+    pool = None
+    spawn_time = 0.0
+    nb_runs = 0
+
+    def __init__(self, name, worker_kind='processes', debug=False):
+        """Creates an empty mix whose workers are of worker_kind"""
+
+        self.name = name
+        self.tests = []
+        self.pool = workers.make_pool(worker_kind, debug)
+        self.spawn_time = 0.0
+        self.nb_runs = 0
+
+
+    def add_test(self, test, weight):
+        """Adds a test to the mix : it will run on weight workers
+
+        The weight first contexts of the context list of the test are
+        used.
+        """
+
+        if test.context_list == None or len(test.context_list) < weight:
+            if test.context_list == None:
+                nb_contexts = 0
+            else:
+                nb_contexts = len(test.context_list)
+            raise ValueError("test '%s' has only %d contexts (%d wanted)" % \
+                             (test.name, nb_contexts, weight))
+
+        self.tests.append((test, weight))
+
+
+    def resume(self):
+        """Returns a string that resumes the mix"""
+
+        return ', '.join(['%s x %d' % (a_test.name, weight) \
+                          for (a_test, weight) in self.tests])
+
+
+    def result(self):
+        """Returns True if no test of the mix has failed"""
+
+        for (a_test, weight) in self.tests:
+            if a_test.result != True:
+                return False
+
+        return True
+
+
+    def run_once(self):
+        """Runs all the tests of the mix once at the same time
+
+        Returns the list of the results (as returned by WorkerPool.run)
+        of each test in the order of the tests.
+        """
+
+        jobs = []
+        for (a_test, weight) in self.tests:
+            functions = a_test.init_func, a_test.exec_func,  \
+                        a_test.final_func, a_test.vary_func
+            settings = a_test.run_settings(weight)
+            for context in a_test.context_list[:weight]:
+                jobs.append((functions, a_test.step, False, settings, context))
+            a_test.nb_process = weight
+
+        self.spawn_time += self.pool.grow(len(jobs))
+        run_results = self.pool.run_jobs(jobs, self.nb_runs)
+        self.nb_runs += 1
+
+        tests_results = []
+        begin = 0
+        for (a_test, weight) in self.tests:
+            tests_results.append(run_results[begin:begin + weight])
+            begin += weight
+
+        return tests_results
+
+
+    def start_once(self, vary=False):
+        """Starts one step of all the tests of the mix
+
+        The mix is run (and discarded) as many times as the largest
+        warmup of its tests and then run (and recorded) as many times as
+        the largest repeat of its tests. If vary is True the contexts of
+        every test are then varied for the next step. A test that fails
+        during the warmup is marked as failed (as in Test.start_once) and
+        the mix stops.
+
+        >>> def same(context):
+        ...     return context
+        >>> def failing_test(context):
+        ...     return (False, context)
+        >>> def vary(step, context):
+        ...     return context
+        >>> def print_c(what, context):
+        ...     return str(context)
+        >>> functions = (same, failing_test, same, vary, print_c)
+        >>> a_test = Test('Failing', 'Always fails', functions, [1], 2, False)
+        >>> a_test.warmup = 1
+        >>> a_mix = Mix('failing mix', 'threads')
+        >>> a_mix.add_test(a_test, 1)
+        >>> a_mix.start_vary(3)
+        Warmup of the mix 'failing mix' failed : test 'Failing' failed
+        >>> a_test.result, a_test.times.nb_iterations(), a_mix.nb_runs
+        (False, 0, 1)
+        >>> a_mix.stop_workers()
+        """
+
+        if self.result() != True:
+            return None
+
+        warmup = max([a_test.warmup for (a_test, weight) in self.tests])
+        repeat = max([a_test.repeat for (a_test, weight) in self.tests])
+
+        for i in xrange(warmup):
+            tests_results = self.run_once()
+            for j in xrange(len(self.tests)):
+                a_test = self.tests[j][0]
+                for a_tuple in tests_results[j]:
+                    a_test.result = a_test.result and a_tuple[3]
+                if a_test.result != True:
+                    print("Warmup of the mix '%s' failed : test '%s' failed" \
+                          % (self.name, a_test.name))
+
+            if self.result() != True:
+                return None
+
+        for i in xrange(repeat):
+            tests_results = self.run_once()
+            for j in xrange(len(self.tests)):
+                a_test = self.tests[j][0]
+                iteration = a_test.times.nb_iterations()
+                a_test.record_results(iteration, tests_results[j])
+
+            if self.result() != True:
+                return None
+
+        for (a_test, weight) in self.tests:
+            a_test.nb_steps += 1
+            if vary == True:
+                a_test.vary_contexts(a_test.step)
+
+
+    def start_vary(self, nb_times):
+        """Starts the mix nb_times, varying the tests between each step"""
+
+        nb_workers = sum([weight for (a_test, weight) in self.tests])
+        self.pool.reserve(nb_workers, 1)
+
+        for i in xrange(nb_times):
+            if self.result() != True:
+                return None
+
+            self.start_once(i != (nb_times - 1))
+
+
+    def print_stats(self, stats):
+        """Prints the statistics of each test of the mix"""
+
+        print("Results for mix '%s' (%s)" % (self.name, self.resume()))
+
+        for (a_test, weight) in self.tests:
+            a_test.print_stats(stats)
+
+        print("Spawn overhead of the mix : %5.04f s (not included in measured \
+times)" % self.spawn_time)
+        print("")
+
+
+    def save_in_gnuplot(self, path, stats):
+        """Saves the statistics of each test of the mix in gnuplot ready
+        files
+        """
+
+        for (a_test, weight) in self.tests:
+            a_test.save_in_gnuplot(path, stats)
+
+
+    def stop_workers(self):
+        """Stops the workers of the mix"""
+
+        self.pool.stop()
+
+# End for Class Mix
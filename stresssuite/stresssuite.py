@@ -40,7 +40,11 @@ import getopt
 
 import stress
 import fss
+import mds
 import cpu_stress
+import workers
+import results
+import buffers
 
 
 class Collection:
@@ -48,14 +52,17 @@ class Collection:
 
     suite_list : a list of stress suites
     debug : a boolean saying wether we are in debug mode or not
+    worker_kind : kind of the workers ('processes' or 'threads')
     """
 
     suite_list = []
     debug = False
+    worker_kind = 'processes'
 
     def __init__(self):
         self.suite_list = []
         debug = False
+        self.worker_kind = 'processes'
 
 
     def add_suite(self, stress_suite):
@@ -120,6 +127,30 @@ class Collection:
             a_suite.run_test_suite_once_vary(nb_times)
 
 
+    def make_mix(self, mix):
+        """Makes a Mix of tests
+
+        mix is a list of (testname, weight) tuples. Returns the Mix or
+        None if a test was not found or has not enough contexts.
+        """
+
+        a_mix = stress.Mix('mix', self.worker_kind, self.debug)
+
+        for (name, weight) in mix:
+            a_test = self.find_test_by_name(name)
+            if a_test == None:
+                print("Test '%s' was not found !" % name)
+                return None
+
+            try:
+                a_mix.add_test(a_test, weight)
+            except ValueError, err:
+                print("%s" % str(err))
+                return None
+
+        return a_mix
+
+
     def list_all_suites(self):
         """Lists all suites and tests available in the collection"""
 
@@ -142,6 +173,22 @@ class Collection:
             a_suite.save_in_gnuplot(path, stats)
 
 
+    def set_option(self, name, value):
+        """Sets the property 'name' of all tests of all test suites"""
+
+        for a_suite in self.suite_list:
+            a_suite.set_option(name, value)
+
+
+    def set_worker_kind(self, kind):
+        """Sets the kind of workers of every test suite"""
+
+        self.worker_kind = kind
+
+        for a_suite in self.suite_list:
+            a_suite.set_worker_kind(kind)
+
+
     def set_debug_mode(self, debug):
         """Sets debug mode for everyone"""
 
@@ -150,6 +197,13 @@ class Collection:
         for a_suite in self.suite_list:
             a_suite.set_debug_mode(debug)
 
+
+    def stop_workers(self):
+        """Stops the workers of every test suite"""
+
+        for a_suite in self.suite_list:
+            a_suite.stop_workers()
+
 # End of Class Collection
 
 
@@ -165,6 +219,39 @@ class Options:
     testsuite   : string, name of one test suite
     gnuplot     : string, if set, generates gnuplot ready files at the location
                   indicated by the path
+    duration    : int, if set, each run of a test lasts duration seconds
+                  (time-boxed mode)
+    latency     : boolean, says wether to time each operation or not
+    calibration : float, if set, target time (in s) of one run used to
+                  calibrate the workload of the tests
+    warmup      : int, number of discarded runs before each step
+    repeat      : int, maximum number of measured runs of each step
+    target_cv   : float, convergence threshold (coefficient of variation)
+                  of the runs of a step
+    rusage      : boolean, says wether to print the resources used or not
+    worker_kind : string, kind of the workers ('processes' or 'threads')
+    mix         : list of (testname, weight) tuples of the tests to run at
+                  the same time
+    rate        : float, open loop rate (ops/s) of each process
+    total_rate  : float, open loop rate (ops/s) of all the processes
+    sweep       : list of the numbers of processes of a concurrency sweep
+    slo_p99     : float, latency SLO (in s) of a knee search
+    knee_knob   : string, load grown by the knee search ('rate' or
+                  'workers')
+    knee_max    : float, maximum load of the knee search
+    fill        : string, fill pattern of the buffers written to the files
+    read_access : string, way the random read tests read the files ('pread'
+                  or 'mmap')
+    durability  : string, durability mode of the durable write test
+    layouts     : list of the layouts of the entries created by the files
+                  and metadata tests
+    grid        : list of (name, values) of the parameters of a grid
+    grid_design : string, way the grid is walked ('full' or 'axes')
+    iodepth     : int, number of operations each process keeps in flight
+    size_dist   : string, distribution of the sizes of the files of the
+                  mixed sizes files creation test
+    size_seed   : int, seed of the sizes of the files of this test
+    shared_modes: list of the modes of the shared file test
     """
     runs = 0
     print_stats = 1
@@ -177,6 +264,31 @@ class Options:
     step = 2
     buffer_size = 512
     gnuplot = ''
+    duration = 0
+    latency = False
+    calibration = 0
+    warmup = 0
+    repeat = 1
+    target_cv = 0
+    rusage = False
+    worker_kind = 'processes'
+    mix = []
+    rate = 0
+    total_rate = 0
+    sweep = []
+    slo_p99 = 0
+    knee_knob = 'rate'
+    knee_max = 0
+    fill = 'constant'
+    read_access = 'pread'
+    durability = 'fsync'
+    layouts = ['flat']
+    grid = []
+    grid_design = 'full'
+    iodepth = 1
+    size_dist = fss.MFT_SIZE_DIST
+    size_seed = fss.MFT_SEED
+    shared_modes = fss.SHARED_MODES
 
     def __init__(self):
         """Init function
@@ -198,6 +310,31 @@ class Options:
         self.step = 2
         self.buffer_size = 512
         self.gnuplot = ''
+        self.duration = 0
+        self.latency = False
+        self.calibration = 0
+        self.warmup = 0
+        self.repeat = 1
+        self.target_cv = 0
+        self.rusage = False
+        self.worker_kind = 'processes'
+        self.mix = []
+        self.rate = 0
+        self.total_rate = 0
+        self.sweep = []
+        self.slo_p99 = 0
+        self.knee_knob = 'rate'
+        self.knee_max = 0
+        self.fill = 'constant'
+        self.read_access = 'pread'
+        self.durability = 'fsync'
+        self.layouts = ['flat']
+        self.grid = []
+        self.grid_design = 'full'
+        self.iodepth = 1
+        self.size_dist = fss.MFT_SIZE_DIST
+        self.size_seed = fss.MFT_SEED
+        self.shared_modes = list(fss.SHARED_MODES)
 
     # Help message for main program
     def usage(self, exit_value):
@@ -248,6 +385,171 @@ class Options:
       --buffer-size=NUM
         Tells the buffer size to use when creating files (512 by default)
 
+      --fill=PATTERN
+        Fill pattern of the buffers written to the files : constant
+        (spaces, by default), zeros, random (seeded pseudo-random bytes,
+        random:SEED to choose the seed) or incompressible (random bytes :
+        the writes walk through a block of 8 MB of them, so that files
+        bigger than one buffer are not one buffer repeated)
+
+      --read-access=ACCESS
+        Tells how the random read tests read their files : with
+        positioned reads (ACCESS is 'pread', the default) or through a
+        read only memory mapping of the files (ACCESS is 'mmap')
+
+      --durability=MODE
+        Tells how the durable write test makes its files durable : none
+        (nothing is synced), fsync (one fsync per file, the default),
+        fdatasync or fdatasync:N (one fdatasync every N writes and at
+        the end of each file), dsync (files opened with O_DSYNC) or
+        direct (files opened with O_DIRECT, when the filesystem supports
+        it). Write and sync latencies are printed separately
+
+      --layout=LAYOUT[,LAYOUT...]
+        Layout of the entries created by the directories creation, files
+        creation and stat tests : flat (all in one directory, the
+        default), hashed or hashed:L (L levels, 2 by default, of 256
+        directories named after the md5 of the entries) or fanout or
+        fanout:N (a tree whose directories hold N entries at most, 256
+        by default). When several layouts are given, these tests are run
+        once for each of them (their names then end with the layout) in
+        order to compare their rates
+
+      --grid=NAME:VALUES[;NAME:VALUES...]
+        Grid of parameters : each test is run once at each point of the
+        grid, a point giving one value to each parameter NAME. VALUES is
+        a list of sizes (4k,64k,1M) or a geometric range FROM..TO
+        (doubling) or FROM..TO*FACTOR. For instance :
+        --grid='file_size:4k..16M*4;buffer_size:512,4k,64k'
+        Parameters are nb_files, file_size, buffer_size, block_size,
+        nb_reads, nb_records, record_size, seed, iodepth or depth
+        depending on the test : tests that lack one of them are not run.
+        A tidy table of the points (and with --gnuplot a NAME-grid.dat
+        file and a heatmap) is printed along with the best point. The
+        number of runs (-m) is then ignored
+
+      --grid-design=DESIGN
+        Points of the grid that are run : full (every combination of the
+        values, the default) or axes (the first values of all parameters
+        and then each value of each parameter alone)
+
+      --iodepth=NUM
+        Number of operations (files created, blocks read or files
+        written) that each process of the space filed files creation,
+        random read and durable write tests keeps in flight (one by
+        default), as fio's iodepth : NUM threads of each process issue
+        them (with --workers=threads their cpu time is not counted). The
+        queue depth may also be a parameter of a grid
+        (--grid='iodepth:1..64')
+
+      --size-dist=DIST
+        Distribution of the sizes of the files created by the mixed
+        sizes files creation test : fixed:SIZE, uniform:MIN,MAX,
+        lognormal:MEDIAN,SIGMA (many small files and a few big ones,
+        lognormal:4k,2.5 by default) or histogram:PATH (an empirical
+        histogram read in the file PATH : one 'SIZE WEIGHT' line for each
+        size). Sizes may be given with the k, M or G units. Files,
+        bytes, files/s and MB/s (over the whole run) and mean latency of
+        each size class are printed with the stats along with the
+        latencies of each class
+
+      --size-seed=NUM
+        Seed of the sizes drawn by the mixed sizes files creation test (1
+        by default, each process adds its number to it)
+
+      --shared-mode=MODE[,MODE...]
+        Modes of the shared file test, where all the processes write
+        records to one single file : append (the file is opened with
+        O_APPEND), disjoint (pwrite in a region of the file owned by each
+        process), interleaved (pwrite at offsets alternating with the
+        other processes) or locked (each record is written at the end of
+        the file under an fcntl byte-range lock, as a shared log). The
+        test is run once for each mode (all of them by default) and the
+        time spent waiting for the locks of the other processes is
+        printed with the stats (threads of one process, see --iodepth,
+        wait for each other in the 'mutex' latencies)
+
+      --duration=SECONDS
+        Time-boxed mode : each process repeats the operations of the test
+        until SECONDS seconds have elapsed instead of doing a fixed number
+        of operations. Throughput (ops/s) is then the value to compare
+
+      --latency
+        Times each operation of the tests and prints latency percentiles
+        (p50, p90, p99, p99.9 and max) with the stats
+
+      --calibrate=SECONDS
+        Before running a test, grows its workload (with its vary function)
+        until one run takes at least SECONDS seconds (may be a decimal
+        number such as 0.5). The varied series then starts from this
+        calibrated workload. Ignored in time-boxed mode (--duration)
+
+      --warmup=NUM
+        Runs each step of a test NUM times before measuring it (these
+        runs are discarded)
+
+      --repeat=NUM
+        Runs each step of a test up to NUM times (one by default). Mean
+        and 95% confidence interval over the runs are printed with the
+        stats
+
+      --target-cv=PCT
+        Stops repeating a step as soon as the coefficient of variation of
+        its run times falls under PCT percent (eg 2% or 2). At least 3
+        runs are done
+
+      --rusage
+        Prints the resources used by each process of each test (user and
+        sys time, context switches, page faults, blocks in and out, max
+        RSS) along with the bytes really read from and written to the
+        storage (/proc/self/io) which tells page cache hits from device
+        I/O
+
+      --workers=KIND
+        Runs the tests with processes (KIND is 'processes', the default)
+        or with threads (KIND is 'threads') of one single process. cpu
+        times and resources are then the ones of each thread
+
+      --mix=NAME:NUM[,NAME:NUM...]
+        Runs several tests at the same time : test NAME runs on NUM
+        workers and all the workers start together. Each test is then
+        reported separately (under the shared load). For instance :
+        --mix='Files creation:4,Cpu hash tests:2'
+
+      --rate=NUM
+        Open loop mode : each process issues the operations of the tests
+        at NUM operations per second (may be a decimal number) whatever
+        the time the previous ones took. Latencies ('op') are measured
+        from the time each operation should have been issued, so that
+        queueing delays are reported ; 'service' latencies are measured
+        from the time it really began
+
+      --total-rate=NUM
+        Same as --rate but NUM operations per second are shared among
+        all the processes of a test
+
+      --sweep=NUM[,NUM...]
+        Concurrency sweep : each test is run once with each number of
+        processes of the list (--sweep=1,3,6) or with 1, 2, 4, ... up to
+        NUM processes (--sweep=NUM). Throughput, speedup, parallel
+        efficiency and latencies are printed for each number of
+        processes. The number of runs (-m) is then ignored
+
+      --slo-p99=TIME
+        Searches the highest load a test sustains while the p99 latency
+        of its operations stays under TIME (eg 10ms, 250us or 1s). The
+        load grows geometrically (by the step, see -s) until TIME is
+        missed, then a binary search runs between the last passing and
+        the first failing loads and the knee is printed
+
+      --knee=KNOB
+        The load grown by --slo-p99 : 'rate' (default, the total rate
+        of an open loop, starting at 100 ops/s) or 'workers' (the
+        number of processes, up to --process)
+
+      --knee-max=NUM
+        Maximum load (ops/s or processes) of the --slo-p99 search
+
       -s, --step=NUM
         Used in the vary function to step the algorithm (generally it
         is used to multiply the number of tests but it depends on the
@@ -302,6 +604,179 @@ class Options:
 
     # End of transform_to_int function
 
+
+    def transform_to_float(self, opt, arg):
+        """transform 'arg' argument from the command line to a float where
+        possible
+
+        >>> my_opts = Options()
+        >>> my_opts.transform_to_float('', '0.5')
+        0.5
+        """
+
+        try :
+            arg = float(arg)
+        except:
+            print("Error (%s), NUM must be a number. Here '%s'" % \
+                 (str(opt), str(arg)))
+            sys.exit(2)
+
+        if arg > 0:
+            return arg
+        else:
+            print("Error (%s), NUM must be positive. Here %s" % (str(opt), \
+                  str(arg)))
+            sys.exit(2)
+
+    # End of transform_to_float function
+
+
+    def transform_to_mix(self, opt, arg):
+        """transform 'arg' argument from the command line to a list of
+        (testname, weight) tuples
+
+        >>> my_opts = Options()
+        >>> my_opts.transform_to_mix('', 'Files creation:4,Cpu hash tests:2')
+        [('Files creation', 4), ('Cpu hash tests', 2)]
+        """
+
+        mix = []
+
+        for item in arg.split(','):
+            (name, sep, weight) = item.rpartition(':')
+            if name.strip() == '':
+                print("Error (%s), expecting NAME:NUM. Here '%s'" % \
+                     (str(opt), str(item)))
+                sys.exit(2)
+            mix.append((name.strip(), self.transform_to_int(opt, weight)))
+
+        return mix
+
+    # End of transform_to_mix function
+
+
+    def transform_to_time(self, opt, arg):
+        """transform 'arg' argument from the command line to a time (in
+        seconds) where possible
+
+        >>> my_opts = Options()
+        >>> my_opts.transform_to_time('', '10ms')
+        0.01
+        """
+
+        try :
+            arg = results.parse_time(arg)
+        except ValueError, err:
+            print("Error (%s), TIME must be a time such as 10ms. Here '%s'" \
+                  % (str(opt), str(arg)))
+            sys.exit(2)
+
+        if arg > 0:
+            return arg
+        else:
+            print("Error (%s), TIME must be positive. Here %s" % (str(opt), \
+                  str(arg)))
+            sys.exit(2)
+
+    # End of transform_to_time function
+
+
+    def transform_to_levels(self, opt, arg):
+        """transform 'arg' argument from the command line to a list of
+        concurrency levels
+
+        >>> my_opts = Options()
+        >>> my_opts.transform_to_levels('', '6')
+        [1, 2, 4, 6]
+        >>> my_opts.transform_to_levels('', '1,3,6')
+        [1, 3, 6]
+        """
+
+        if ',' in arg:
+            return [self.transform_to_int(opt, level) \
+                    for level in arg.split(',')]
+
+        maximum = self.transform_to_int(opt, arg)
+        levels = []
+        level = 1
+        while level < maximum:
+            levels.append(level)
+            level *= 2
+        levels.append(maximum)
+
+        return levels
+
+    # End of transform_to_levels function
+
+
+    def transform_to_layouts(self, opt, arg):
+        """transform 'arg' argument from the command line to a list of
+        layouts (see fss.layout_namer) where possible
+
+        >>> my_opts = Options()
+        >>> my_opts.transform_to_layouts('', 'flat,hashed:2')
+        ['flat', 'hashed:2']
+        """
+
+        layouts = []
+        for layout in arg.split(','):
+            try:
+                fss.parse_layout(layout)
+            except ValueError, err:
+                print("Error (%s), %s. LAYOUT must be one of %s" % \
+                      (str(opt), str(err), ', '.join(fss.LAYOUTS)))
+                sys.exit(2)
+            layouts.append(layout)
+
+        return layouts
+
+    # End of transform_to_layouts function
+
+
+    def transform_to_shared_modes(self, opt, arg):
+        """transform 'arg' argument from the command line to a list of
+        modes of the shared file test (see fss.SHARED_MODES) where
+        possible
+
+        >>> my_opts = Options()
+        >>> my_opts.transform_to_shared_modes('', 'append,locked')
+        ['append', 'locked']
+        """
+
+        modes = []
+        for mode in arg.split(','):
+            if mode not in fss.SHARED_MODES:
+                print("Error (%s), unknown shared file mode '%s'. MODE must \
+be one of %s" % (str(opt), mode, ', '.join(fss.SHARED_MODES)))
+                sys.exit(2)
+            modes.append(mode)
+
+        return modes
+
+    # End of transform_to_shared_modes function
+
+
+    def transform_to_grid(self, opt, arg):
+        """transform 'arg' argument from the command line to a list of
+        (name, values) of the parameters of a grid where possible
+
+        >>> my_opts = Options()
+        >>> my_opts.transform_to_grid('', 'file_size:4k..16k;nb_files:2,3')
+        [('file_size', [4096, 8192, 16384]), ('nb_files', [2, 3])]
+        """
+
+        grid = []
+        for axis in arg.split(';'):
+            try:
+                grid.append(results.parse_axis(axis))
+            except ValueError, err:
+                print("Error (%s), %s" % (str(opt), str(err)))
+                sys.exit(2)
+
+        return grid
+
+    # End of transform_to_grid function
+
 # End of Class Options
 
 
@@ -313,7 +788,13 @@ def parse_command_line(my_opts):
     long_options = ['help', 'list', 'once', 'no-stats', 'debug',     \
                     'multiple=', 'testname=', 'testsuite=', 'path=', \
                     'process=', 'step=', 'buffer-size=', 'gnuplot=', \
-                    'cumulative']
+                    'cumulative', 'duration=', 'latency', 'calibrate=', \
+                    'warmup=', 'repeat=', 'target-cv=', 'rusage',  \
+                    'workers=', 'mix=', 'rate=', 'total-rate=', \
+                    'sweep=', 'slo-p99=', 'knee=', 'knee-max=', \
+                    'fill=', 'read-access=', 'durability=', 'layout=', \
+                    'grid=', 'grid-design=', 'iodepth=', 'size-dist=', \
+                    'size-seed=', 'shared-mode=']
 
     # Read options and arguments
     try:
@@ -336,7 +817,7 @@ def parse_command_line(my_opts):
             my_opts.runs = 1
         elif opt in ('-n', '--no-stats'):
             my_opts.print_stats = 0
-        elif opt in ('c', '--cumulative'):
+        elif opt in ('-c', '--cumulative'):
             my_opts.print_stats = 2
         elif opt in ('-m', '--multiple'):
             my_opts.runs = my_opts.transform_to_int(opt, arg)
@@ -356,12 +837,105 @@ def parse_command_line(my_opts):
             my_opts.buffer_size = my_opts.transform_to_int(opt, arg)
         elif opt in ('--gnuplot'):
             my_opts.gnuplot = arg
+        elif opt in ('--duration'):
+            my_opts.duration = my_opts.transform_to_int(opt, arg)
+        elif opt in ('--latency'):
+            my_opts.latency = True
+        elif opt in ('--calibrate'):
+            my_opts.calibration = my_opts.transform_to_float(opt, arg)
+        elif opt in ('--warmup'):
+            my_opts.warmup = my_opts.transform_to_int(opt, arg)
+        elif opt in ('--repeat'):
+            my_opts.repeat = my_opts.transform_to_int(opt, arg)
+        elif opt in ('--target-cv'):
+            arg = arg.rstrip('%')
+            my_opts.target_cv = my_opts.transform_to_float(opt, arg) / 100
+        elif opt in ('--rusage'):
+            my_opts.rusage = True
+        elif opt in ('--workers'):
+            if arg in workers.WORKER_KINDS:
+                my_opts.worker_kind = arg
+            else:
+                print("Error (%s), KIND must be one of %s. Here '%s'" % \
+                      (str(opt), ', '.join(workers.WORKER_KINDS), str(arg)))
+                sys.exit(2)
+        elif opt in ('--mix'):
+            my_opts.mix = my_opts.transform_to_mix(opt, arg)
+        elif opt in ('--rate'):
+            my_opts.rate = my_opts.transform_to_float(opt, arg)
+        elif opt in ('--total-rate'):
+            my_opts.total_rate = my_opts.transform_to_float(opt, arg)
+        elif opt in ('--sweep'):
+            my_opts.sweep = my_opts.transform_to_levels(opt, arg)
+        elif opt in ('--slo-p99'):
+            my_opts.slo_p99 = my_opts.transform_to_time(opt, arg)
+        elif opt in ('--knee'):
+            if arg in ('rate', 'workers'):
+                my_opts.knee_knob = arg
+            else:
+                print("Error (%s), KNOB must be rate or workers. Here '%s'" \
+                      % (str(opt), str(arg)))
+                sys.exit(2)
+        elif opt in ('--knee-max'):
+            my_opts.knee_max = my_opts.transform_to_float(opt, arg)
+        elif opt in ('--fill'):
+            try:
+                buffers.parse_pattern(arg)
+            except ValueError, err:
+                print("Error (%s), %s. PATTERN must be one of %s" % \
+                      (str(opt), str(err), ', '.join(buffers.PATTERNS)))
+                sys.exit(2)
+            my_opts.fill = arg
+        elif opt in ('--read-access'):
+            if arg in fss.READ_ACCESSES:
+                my_opts.read_access = arg
+            else:
+                print("Error (%s), ACCESS must be one of %s. Here '%s'" % \
+                      (str(opt), ', '.join(fss.READ_ACCESSES), str(arg)))
+                sys.exit(2)
+        elif opt in ('--durability'):
+            try:
+                fss.parse_durability(arg)
+            except ValueError, err:
+                print("Error (%s), %s. MODE must be one of %s" % \
+                      (str(opt), str(err), ', '.join(fss.DURABILITIES)))
+                sys.exit(2)
+            my_opts.durability = arg
+        elif opt in ('--layout'):
+            my_opts.layouts = my_opts.transform_to_layouts(opt, arg)
+        elif opt in ('--grid'):
+            my_opts.grid = my_opts.transform_to_grid(opt, arg)
+        elif opt in ('--grid-design'):
+            if arg in results.GRID_DESIGNS:
+                my_opts.grid_design = arg
+            else:
+                print("Error (%s), DESIGN must be one of %s. Here '%s'" % \
+                      (str(opt), ', '.join(results.GRID_DESIGNS), str(arg)))
+                sys.exit(2)
+        elif opt in ('--iodepth'):
+            my_opts.iodepth = my_opts.transform_to_int(opt, arg)
+        elif opt in ('--size-dist'):
+            try:
+                fss.parse_size_dist(arg)
+                my_opts.size_dist = arg
+            except ValueError, err:
+                print("Error (%s), %s. DIST must be one of %s" % \
+                      (str(opt), str(err), ', '.join(fss.SIZE_DISTRIBUTIONS)))
+                sys.exit(2)
+        elif opt in ('--size-seed'):
+            my_opts.size_seed = my_opts.transform_to_int(opt, arg)
+        elif opt in ('--shared-mode'):
+            my_opts.shared_modes = my_opts.transform_to_shared_modes(opt, \
+                                                                     arg)
 
     return my_opts
 # End function parse_command_line()
 
 
-def init_all_tests(collec, base_path, nb_process, step, debug, buffer_size):
+def init_all_tests(collec, base_path, nb_process, step, debug, buffer_size, \
+                   fill='constant', read_access='pread', durability='fsync', \
+                   layouts=('flat',), iodepth=1, size_dist=fss.MFT_SIZE_DIST,\
+                   size_seed=fss.MFT_SEED, shared_modes=fss.SHARED_MODES):
     """Inits the collection
 
     Add all tests_suites to the collection
@@ -370,12 +944,18 @@ def init_all_tests(collec, base_path, nb_process, step, debug, buffer_size):
     # Add here your own stress suite !
 
     stressfs = fss.FileSystem_Tests(base_path, nb_process, step, debug, \
-                                    buffer_size)
+                                    buffer_size, fill, read_access,   \
+                                    durability, layouts, iodepth,     \
+                                    size_dist, size_seed, shared_modes)
 
     stresscpu = cpu_stress.Cpu_Tests(nb_process, step, debug)
 
+    stressmd = mds.Metadata_Tests(base_path, nb_process, step, debug, \
+                                  layouts)
+
     collec.add_suite(stressfs)
     collec.add_suite(stresscpu)
+    collec.add_suite(stressmd)
 
     return collec
 # End of function init_all_tests()
@@ -389,9 +969,59 @@ def main():
     # parsing options from the command line
     my_opts = parse_command_line(my_opts)
 
+    # Each test of a mix needs as many contexts as its weight
+    nb_process = my_opts.nb_process
+    for (name, weight) in my_opts.mix:
+        nb_process = max(nb_process, weight)
+
+    # and a sweep needs as many contexts as its largest level
+    if my_opts.sweep != []:
+        nb_process = max(nb_process, max(my_opts.sweep))
+
     collec = init_all_tests(collec, my_opts.base_path,          \
-                            my_opts.nb_process, my_opts.step,   \
-                            my_opts.debug, my_opts.buffer_size)
+                            nb_process, my_opts.step,           \
+                            my_opts.debug, my_opts.buffer_size, \
+                            my_opts.fill, my_opts.read_access,  \
+                            my_opts.durability, my_opts.layouts, \
+                            my_opts.iodepth, my_opts.size_dist,  \
+                            my_opts.size_seed, my_opts.shared_modes)
+
+    if my_opts.duration > 0:
+        collec.set_option('duration', my_opts.duration)
+
+    if my_opts.latency == True:
+        collec.set_option('latency', True)
+
+    if my_opts.calibration > 0:
+        collec.set_option('calibration', my_opts.calibration)
+
+    collec.set_option('warmup', my_opts.warmup)
+    collec.set_option('repeat', my_opts.repeat)
+    collec.set_option('target_cv', my_opts.target_cv)
+
+    if my_opts.rusage == True:
+        collec.set_option('rusage', True)
+
+    if my_opts.sweep != []:
+        collec.set_option('sweep', my_opts.sweep)
+
+    if my_opts.grid != []:
+        collec.set_option('grid', my_opts.grid)
+        collec.set_option('grid_design', my_opts.grid_design)
+
+    if my_opts.slo_p99 > 0:
+        collec.set_option('slo_p99', my_opts.slo_p99)
+        collec.set_option('knee_knob', my_opts.knee_knob)
+        collec.set_option('knee_max', my_opts.knee_max)
+
+    if my_opts.rate > 0:
+        collec.set_option('rate', my_opts.rate)
+
+    if my_opts.total_rate > 0:
+        collec.set_option('total_rate', my_opts.total_rate)
+
+    if my_opts.worker_kind != 'processes':
+        collec.set_worker_kind(my_opts.worker_kind)
 
     if my_opts.debug == True:
        print('Debug mode is on')
@@ -404,7 +1034,21 @@ def main():
         sys.exit(0)
 
     # Running the tests
-    if my_opts.testname != '':
+    if my_opts.mix != []:
+        a_mix = collec.make_mix(my_opts.mix)
+
+        if a_mix != None:
+            a_mix.start_vary(my_opts.runs)
+
+            if my_opts.print_stats != 0:
+                a_mix.print_stats(my_opts.print_stats)
+
+            if my_opts.gnuplot != '':
+                a_mix.save_in_gnuplot(my_opts.gnuplot, my_opts.print_stats)
+
+            a_mix.stop_workers()
+
+    elif my_opts.testname != '':
         if my_opts.debug == True:
             print("Selected testname is : %s" % my_opts.testname)
 
@@ -445,6 +1089,8 @@ def main():
         if my_opts.gnuplot != '':
             collec.save_in_gnuplot(my_opts.gnuplot, my_opts.print_stats)
 
+    collec.stop_workers()
+
 # End of main function
 
 
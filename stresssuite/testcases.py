@@ -65,7 +65,12 @@ def main():
     # Test some functions/classes
     testModule('fss')
     testModule('cpu_stress')
+    testModule('mds')
     testModule('stress')
+    testModule('workers')
+    testModule('results')
+    testModule('meter')
+    testModule('buffers')
     testModule('stresssuite')
 #
 
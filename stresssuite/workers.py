@@ -0,0 +1,697 @@
+#!/usr/bin/env python
+# -*- encoding: utf8 -*-
+#
+#  Long lived workers used to run the stress tests
+#
+#  (C) Copyright 2009 Olivier Delhomme
+#  e-mail : olivier.delhomme@free.fr
+#
+#  This program is free software; you can redistribute it and/or modify
+#  it under the terms of the GNU General Public License as published by
+#  the Free Software Foundation; either version 2, or (at your option)
+#  any later version.
+#
+#  This program is distributed in the hope that it will be useful,
+#  but WITHOUT ANY WARRANTY; without even the implied warranty of
+#  MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#  GNU General Public License for more details.
+#
+#  You should have received a copy of the GNU General Public License
+#  along with this program; if not, write to the Free Software Foundation,
+#  Inc., 59 Temple Place - Suite 330, Boston, MA 02111-1307, USA.
+#
+
+"""module providing long lived workers for the stress tests
+
+Class WorkerPool : a set of processes spawned once and reused for every
+                   run of every test
+Class ThreadPool : the same with threads (in-process concurrency)
+"""
+
+__author__ = "Olivier Delhomme <olivier.delhomme@free.fr>"
+__date__ = "17.10.2026"
+__version__ = "Revision: 0.0.1"
+__credits__ = "Thanks to Python makers"
+
+import time
+import Queue
+import threading
+import traceback
+import multiprocessing
+
+import meter
+from results import Histogram
+
+
+# Kinds of workers that may run the tests
+WORKER_KINDS = ('processes', 'threads')
+
+# Fixed layout of one record of the results block : timings, status,
+# number of operations and of bytes transfered, time taken by the final
+# function (teardown) followed by the resources used by the test
+RESULT_FIELDS = ('cpu', 'real', 'status', 'ops', 'bytes', 'teardown') + \
+                meter.RESOURCE_FIELDS
+
+
+def context_delta(old, new):
+    """Returns what changed between two contexts
+
+    Contexts are tuples : only the (index, value) pairs of the elements
+    that changed are returned. If the two contexts can not be compared
+    element by element, the whole new context is returned in a one
+    element list.
+
+    >>> context_delta(('/tmp/fss', '', 3), ('/tmp/fss', '', 6))
+    [(2, 6)]
+    >>> context_delta(('/tmp/fss', '', 3), ('/tmp/fss', '', 3))
+    []
+    >>> context_delta(('a', 1), ('a', 1, 2))
+    [(-1, ('a', 1, 2))]
+    """
+
+    if type(old) != tuple or type(new) != tuple or len(old) != len(new):
+        return [(-1, new)]
+
+    delta = []
+    for i in xrange(len(new)):
+        if new[i] is not old[i] and new[i] != old[i]:
+            delta.append((i, new[i]))
+
+    return delta
+
+# End of context_delta function
+
+
+def apply_delta(context, delta):
+    """Applies a delta (as returned by context_delta) to a context
+
+    >>> apply_delta(('/tmp/fss', '', 3), [(2, 6)])
+    ('/tmp/fss', '', 6)
+    >>> apply_delta(('a', 1), [(-1, ('a', 1, 2))])
+    ('a', 1, 2)
+    """
+
+    if len(delta) == 1 and delta[0][0] == -1:
+        return delta[0][1]
+
+    context = list(context)
+    for (i, value) in delta:
+        context[i] = value
+
+    return tuple(context)
+
+# End of apply_delta function
+
+
+class ResultsBlock:
+    """Class ResultsBlock : a preallocated shared memory results block
+
+    The block is an array of doubles with a fixed layout : one record of
+    len(RESULT_FIELDS) values for each worker and each iteration.
+    Iterations wrap around when they go beyond nb_iterations. Workers
+    write their own records and the parent reads them without any
+    pickling.
+
+    >>> block = ResultsBlock(2, 3)
+    >>> block.write(1, 4, (0.5, 1.5, 1, 10))
+    >>> block.read(1, 4)[:4]
+    (0.5, 1.5, 1.0, 10.0)
+    >>> block.read(1, 1)[:4]
+    (0.5, 1.5, 1.0, 10.0)
+    >>> block.read(0, 4)[:4]
+    (0.0, 0.0, 0.0, 0.0)
+    >>> len(block.read(0, 4)) == len(RESULT_FIELDS)
+    True
+    """
+
+    nb_workers = 0
+    nb_iterations = 0
+    data = None
+
+    def __init__(self, nb_workers, nb_iterations):
+        """Allocates the block for nb_workers and nb_iterations"""
+
+        self.nb_workers = nb_workers
+        self.nb_iterations = nb_iterations
+        size = nb_workers * nb_iterations * len(RESULT_FIELDS)
+        self.data = multiprocessing.Array('d', size, lock=False)
+
+
+    def offset(self, worker, iteration):
+        """Returns the offset of the record of worker at iteration"""
+
+        record = worker * self.nb_iterations + iteration % self.nb_iterations
+        return record * len(RESULT_FIELDS)
+
+
+    def write(self, worker, iteration, values):
+        """Writes the values (in RESULT_FIELDS order) of one record"""
+
+        offset = self.offset(worker, iteration)
+        self.data[offset:offset + len(values)] = values
+
+
+    def read(self, worker, iteration):
+        """Reads one record (a tuple in RESULT_FIELDS order)"""
+
+        offset = self.offset(worker, iteration)
+        return tuple(self.data[offset:offset + len(RESULT_FIELDS)])
+
+# End for Class ResultsBlock
+
+
+def run_test(worker_id, answers, block, ok_to_go, debug, order, \
+             threaded=False):
+    """Runs one test in a worker
+
+    order is a tuple containing the functions of the test (init, exec,
+    final and vary functions), the step, a boolean telling wether to run
+    the vary function or not, the iteration number, the settings of the
+    test (a dictionnary used to create the OpMeter of the worker) and the
+    context to use.
+    init function is called with the context ; then the worker tells the
+    parent that it is ready and waits for the ok_to_go event. Then the
+    test itself is called (and the time it took is recorded) ; then the
+    final function is called and, if asked and if the test succeded, the
+    vary function.
+    Times, status, number of operations, the time taken by the final
+    function (the teardown, which is not part of the measured times) and
+    the resources used by the test (see meter.resources) are written in
+    the results block. When
+    threaded is True the worker is a thread : the cpu time and the
+    resources are then the ones of the thread only. Only the changes
+    made to the context travel back to the parent through answers : the
+    ones made by the test itself (compared to the initialised context)
+    and the ones made by final and vary functions (compared to the
+    received context), along with the histograms of the meter (if any).
+    """
+
+    functions, step, vary, iteration, settings, context = order
+    init_func, exec_func, final_func, vary_func = functions
+
+    a_meter = meter.OpMeter(settings)
+    meter.set_meter(a_meter)
+
+    if debug == True:
+        print("Now running context : %s" % str(context))
+
+    received = context
+    try:
+        context = init_func(context)
+    finally:
+        answers.put((worker_id, 'ready', None)) # initialisation is done.
+
+    initialised = context
+
+    # Wait for the event "start"
+    ok_to_go.wait()
+
+    a_meter.start()
+    begin_resources = meter.resources(threaded)
+    begin_cpu = time.clock()
+    begin_time = time.time()
+
+    result, context = exec_func(context)
+
+    end_time = time.time()
+    end_cpu = time.clock()
+    end_resources = meter.resources(threaded)
+
+    # This calculation is here to record the exact test context time
+    used = meter.resources_delta(begin_resources, end_resources)
+    if threaded == True:
+        # time.clock() is the cpu time of the whole process
+        cpu_time = used[0] + used[1]
+    else:
+        cpu_time = end_cpu - begin_cpu
+    exec_delta = context_delta(initialised, context)
+
+    begin_teardown = time.time()
+    context = final_func(context)
+    teardown_time = time.time() - begin_teardown
+
+    block.write(worker_id, iteration, (cpu_time, end_time - begin_time, \
+                result == True, a_meter.count, a_meter.bytes,           \
+                teardown_time) + used)
+
+    if (vary == True and result == True):
+        context = vary_func(step, context)
+
+    answers.put((worker_id, 'done', (exec_delta,                \
+                 context_delta(received, context), a_meter.export())))
+
+# End of run_test function
+
+
+def worker_loop(conn, worker_id, answers, block, ok_to_go, debug, \
+                threaded=False):
+    """Main loop of a worker
+
+    Tells the parent that the worker is up and then waits for orders on
+    conn. An order is a tuple whose first element says what to do :
+     . ('run', functions, step, vary, iteration, settings, context) : runs
+       one test (see run_test)
+     . ('quit', ) : leaves the loop
+    threaded tells wether the worker is a thread or a process.
+    """
+
+    answers.put((worker_id, 'up', None))
+
+    while True:
+        try:
+            order = conn.recv()
+        except EOFError:
+            break
+
+        if order[0] == 'quit':
+            break
+
+        try:
+            run_test(worker_id, answers, block, ok_to_go, debug, order[1:], \
+                     threaded)
+        except:
+            # The parent waits for us : never leave it without an answer
+            # (and never before the other workers are started : when the
+            # init failed, they may still be initialising)
+            traceback.print_exc()
+            ok_to_go.wait()
+            iteration = order[4]
+            block.write(worker_id, iteration, (0.0, ) * len(RESULT_FIELDS))
+            answers.put((worker_id, 'done', ([], [], {})))
+
+    conn.close()
+
+# End of worker_loop function
+
+
+class QueueConn:
+    """Class QueueConn : the orders channel of a thread worker
+
+    Has the send(), recv() and close() methods of the Pipe used by the
+    processes but simply passes the orders (without any pickling)
+    through a Queue. Only the parent sends and only the worker receives.
+
+    >>> conn = QueueConn()
+    >>> conn.send(('quit', ))
+    >>> conn.recv()
+    ('quit',)
+    """
+
+    orders = None
+
+    def __init__(self):
+        """Creates an empty channel"""
+
+        self.orders = Queue.Queue()
+
+
+    def send(self, order):
+        """Sends an order to the worker"""
+
+        self.orders.put(order)
+
+
+    def recv(self):
+        """Waits for the next order"""
+
+        return self.orders.get()
+
+
+    def close(self):
+        """Nothing to close"""
+
+        pass
+
+# End for Class QueueConn
+
+
+class WorkerPool:
+    """Class WorkerPool : a set of long lived processes
+
+    Workers are spawned once (when needed) and then receive their orders
+    through a reusable Pipe. Every run uses the same ok_to_go event to
+    start all the workers at the same time. Timings and status are
+    written by the workers in a shared results block and the small
+    answers (readiness and context changes) of all the workers come back
+    through one single queue.
+
+    properties :
+        workers    : list of (process, parent_conn) tuples
+        ok_to_go   : Event() to say to all workers "ready... heady...
+                     steady.... GOOOoooo !!"
+        answers    : Queue() where all workers put their answers
+        pending    : list of the answers received while waiting for
+                     answers of an other kind (see wait_answers)
+        block      : ResultsBlock shared with the workers
+        spawn_time : time spent (in s) spawning the workers. It is not
+                     included in any measured time
+        debug      : debug mode : on = True (verbose), off = False
+
+    >>> import cpu_stress
+    >>> functions = (cpu_stress.cpu_est_init, cpu_stress.cpu_hash_stress_test,
+    ...              cpu_stress.cpu_est_final, cpu_stress.cpu_est_vary)
+    >>> pool = WorkerPool()
+    >>> results = pool.run(functions, 2, True, [('a', 10), ('b', 20)])
+    >>> [(a_result[2], a_result[3]) for a_result in results]
+    [(('a', 20), True), (('b', 40), True)]
+    >>> results = pool.run(functions, 2, False, [('c', 10)], 1)
+    >>> results[0][1]
+    ('c', 10)
+    >>> results[0][0][3]
+    10.0
+    >>> len(pool.workers)
+    2
+    >>> pool.spawn_time > 0
+    True
+    >>> pool.stop()
+    >>> len(pool.workers)
+    0
+    """
+
+    workers = []
+    ok_to_go = None
+    answers = None
+    pending = []
+    block = None
+    spawn_time = 0.0
+    debug = False
+
+    def __init__(self, debug=False):
+        """Creates an empty pool : workers are spawned when needed"""
+
+        self.workers = []
+        self.ok_to_go = multiprocessing.Event()
+        self.answers = multiprocessing.Queue()
+        self.pending = []
+        self.block = None
+        self.spawn_time = 0.0
+        self.debug = debug
+
+
+    def reserve(self, nb_workers, nb_iterations):
+        """Makes sure that the results block is big enough
+
+        The block is shared through inheritance only : when it has to be
+        reallocated, the workers are stopped (and will be spawned again
+        when needed).
+        """
+
+        block = self.block
+
+        if block == None or block.nb_workers < nb_workers or \
+           block.nb_iterations < nb_iterations:
+
+            if block != None:
+                nb_workers = max(nb_workers, block.nb_workers)
+                nb_iterations = max(nb_iterations, block.nb_iterations)
+
+            self.stop()
+            self.block = ResultsBlock(nb_workers, nb_iterations)
+
+
+    def wait_answers(self, kind, nb_answers):
+        """Waits for nb_answers answers of a kind from the workers
+
+        Returns a dictionnary of the payloads indexed by the worker
+        number. Answers of an other kind (a worker whose init failed may
+        already be done while the others are still initialising) are
+        kept in pending for the next waits.
+
+        >>> pool = WorkerPool()
+        >>> pool.answers.put((1, 'done', 'b'))
+        >>> pool.answers.put((0, 'ready', 'a'))
+        >>> pool.wait_answers('ready', 1)
+        {0: 'a'}
+        >>> pool.wait_answers('done', 1)
+        {1: 'b'}
+        >>> pool.pending
+        []
+        """
+
+        payloads = {}
+
+        for answer in self.pending[:]:
+            if len(payloads) >= nb_answers:
+                break
+            (worker_id, a_kind, payload) = answer
+            if a_kind == kind:
+                payloads[worker_id] = payload
+                self.pending.remove(answer)
+
+        while len(payloads) < nb_answers:
+            (worker_id, a_kind, payload) = self.answers.get()
+            if a_kind == kind:
+                payloads[worker_id] = payload
+            else:
+                if self.debug == True:
+                    print("Early '%s' answer from worker %d" % \
+                          (a_kind, worker_id))
+                self.pending.append((worker_id, a_kind, payload))
+
+        return payloads
+
+
+    def grow(self, nb_workers):
+        """Spawns workers until the pool has at least nb_workers
+
+        Returns the time spent (in s) to spawn the new workers (0 if
+        none was needed).
+        """
+
+        self.reserve(nb_workers, 1)
+
+        if len(self.workers) >= nb_workers:
+            return 0.0
+
+        begin_time = time.time()
+        nb_new = nb_workers - len(self.workers)
+
+        while len(self.workers) < nb_workers:
+            if self.debug == True:
+                print('Spawing a new worker...')
+            self.workers.append(self.spawn(len(self.workers)))
+
+        # Waiting for every new worker to be really up
+        self.wait_answers('up', nb_new)
+
+        spent = time.time() - begin_time
+        self.spawn_time += spent
+
+        return spent
+
+
+    def spawn(self, worker_id):
+        """Starts a new worker process
+
+        Returns the (process, parent_conn) tuple of the worker.
+        """
+
+        parent_conn, child_conn = multiprocessing.Pipe()
+        args = (child_conn, worker_id, self.answers, self.block, \
+                self.ok_to_go, self.debug)
+        a_process = multiprocessing.Process(target=worker_loop, args=args)
+        a_process.daemon = True
+        a_process.start()
+
+        return (a_process, parent_conn)
+
+
+    def run(self, functions, step, vary, context_list, iteration=0, \
+            settings=None):
+        """Runs a test once on len(context_list) workers
+
+        functions is a tuple (init, exec, final, vary). Each worker gets
+        one context of context_list. iteration tells where to write the
+        records in the results block and settings are the settings of the
+        test (see OpMeter). Returns the list of the (record, a_context,
+        context, result, histograms) tuples in the same order as
+        context_list where record is the record of the worker (in
+        RESULT_FIELDS order), a_context is the context as returned by the
+        test itself, context the context returned by the final (and vary)
+        functions and histograms a dictionnary of the Histograms recorded
+        by the worker.
+        """
+
+        if settings == None:
+            settings = {}
+
+        jobs = []
+        for context in context_list:
+            jobs.append((functions, step, vary, settings, context))
+
+        return self.run_jobs(jobs, iteration)
+
+
+    def run_jobs(self, jobs, iteration=0):
+        """Runs several jobs at the same time on len(jobs) workers
+
+        Each job is a tuple (functions, step, vary, settings, context)
+        and may belong to a different test : every worker runs its own
+        job but all of them start together (after the last one is
+        initialised). Returns the same list as run() in the order of
+        jobs.
+
+        >>> import cpu_stress
+        >>> hash_functions = (cpu_stress.cpu_est_init,
+        ...                   cpu_stress.cpu_hash_stress_test,
+        ...                   cpu_stress.cpu_est_final, cpu_stress.cpu_est_vary)
+        >>> encode_functions = (cpu_stress.cpu_est_init,
+        ...                     cpu_stress.cpu_encode_stress_test,
+        ...                     cpu_stress.cpu_est_final,
+        ...                     cpu_stress.cpu_est_vary)
+        >>> pool = WorkerPool()
+        >>> results = pool.run_jobs([(hash_functions, 2, False, {}, ('a', 10)),
+        ...                          (encode_functions, 2, False, {}, ('b', 5))])
+        >>> [(a_result[2], a_result[0][3]) for a_result in results]
+        [(('a', 10), 10.0), (('b', 5), 5.0)]
+        >>> pool.stop()
+
+        A worker whose init fails answers (as failed) once the others
+        are started, whatever the order of their answers :
+
+        >>> import sys, StringIO
+        >>> def failing_init(context):
+        ...     raise ValueError('init failed')
+        >>> def slow_init(context):
+        ...     time.sleep(1)
+        ...     return context
+        >>> failing_functions = (failing_init,) + hash_functions[1:]
+        >>> slow_functions = (slow_init,) + hash_functions[1:]
+        >>> pool = ThreadPool()
+        >>> stderr = sys.stderr
+        >>> sys.stderr = StringIO.StringIO()
+        >>> results = pool.run_jobs([(failing_functions, 2, False, {},
+        ...                           ('a', 10)),
+        ...                          (slow_functions, 2, False, {},
+        ...                           ('b', 10))])
+        >>> sys.stderr = stderr
+        >>> [a_result[3] for a_result in results]
+        [False, True]
+        >>> pool.stop()
+        """
+
+        nb_workers = len(jobs)
+        self.grow(nb_workers)
+
+        for i in xrange(nb_workers):
+            (a_process, parent_conn) = self.workers[i]
+            (functions, step, vary, settings, context) = jobs[i]
+            parent_conn.send(('run', functions, step, vary, iteration, \
+                              settings, context))
+
+        # Sending the event to really start
+        # waiting that the last worker finishes its init ...
+        ready = self.wait_answers('ready', nb_workers)
+
+        if self.debug == True:
+            print('%d =? %d' % (len(ready), nb_workers))
+
+        self.ok_to_go.set()
+        deltas = self.wait_answers('done', nb_workers)
+        self.ok_to_go.clear()
+
+        results = []
+        for i in xrange(nb_workers):
+            record = self.block.read(i, iteration)
+            status = record[RESULT_FIELDS.index('status')]
+            received = jobs[i][4]
+            (exec_delta, final_delta, exported) = deltas[i]
+            a_context = apply_delta(received, exec_delta)
+            context = apply_delta(received, final_delta)
+            histograms = {}
+            for (name, sparse) in exported.iteritems():
+                histograms[name] = Histogram.from_sparse(sparse)
+            results.append((record, a_context, context, status == 1.0, \
+                            histograms))
+
+        return results
+
+
+    def stop(self):
+        """Stops all workers of the pool"""
+
+        for (a_process, parent_conn) in self.workers:
+            try:
+                parent_conn.send(('quit', ))
+            except (OSError, IOError), err:
+                pass
+
+        for (a_process, parent_conn) in self.workers:
+            a_process.join()
+            parent_conn.close()
+
+        self.workers = []
+        self.pending = []
+
+# End for Class WorkerPool
+
+
+class ThreadPool(WorkerPool):
+    """Class ThreadPool : a set of long lived threads
+
+    Same as WorkerPool but the workers are threads of the current
+    process : orders go through QueueConn channels and the event and
+    answers queue are the threading ones. hashlib and most of the file
+    system calls release the GIL, so this measures in-process
+    concurrency and allows hundreds of workers without the memory cost
+    of one process each.
+
+    >>> import cpu_stress
+    >>> functions = (cpu_stress.cpu_est_init, cpu_stress.cpu_hash_stress_test,
+    ...              cpu_stress.cpu_est_final, cpu_stress.cpu_est_vary)
+    >>> pool = ThreadPool()
+    >>> results = pool.run(functions, 2, True, [('a', 10), ('b', 20)])
+    >>> [(a_result[2], a_result[3]) for a_result in results]
+    [(('a', 20), True), (('b', 40), True)]
+    >>> results[1][0][3]
+    20.0
+    >>> pool.stop()
+    >>> len(pool.workers)
+    0
+    """
+
+    def __init__(self, debug=False):
+        """Creates an empty pool : threads are started when needed"""
+
+        WorkerPool.__init__(self, debug)
+        self.ok_to_go = threading.Event()
+        self.answers = Queue.Queue()
+
+
+    def spawn(self, worker_id):
+        """Starts a new worker thread
+
+        Returns the (thread, conn) tuple of the worker.
+        """
+
+        conn = QueueConn()
+        args = (conn, worker_id, self.answers, self.block, self.ok_to_go, \
+                self.debug, True)
+        a_thread = threading.Thread(target=worker_loop, args=args)
+        a_thread.daemon = True
+        a_thread.start()
+
+        return (a_thread, conn)
+
+# End for Class ThreadPool
+
+
+def make_pool(kind='processes', debug=False):
+    """Returns a new pool whose workers are of kind (see WORKER_KINDS)
+
+    >>> make_pool('threads').__class__.__name__
+    'ThreadPool'
+    >>> make_pool('fibers')
+    Traceback (most recent call last):
+    ...
+    ValueError: unknown kind of workers 'fibers'
+    """
+
+    if kind == 'threads':
+        return ThreadPool(debug)
+    elif kind == 'processes':
+        return WorkerPool(debug)
+    else:
+        raise ValueError("unknown kind of workers '%s'" % kind)
+
+# End of make_pool function